@@ -2,16 +2,46 @@
 """The entry point for Pulp Smash's user interface."""
 from __future__ import print_function, unicode_literals
 
+import argparse
+import sys
 import textwrap
 from os.path import join
-from pulp_smash.config import ServerConfig
 from xdg import BaseDirectory
+from pulp_smash.commands import (
+    baseline,
+    benchmark,
+    load,
+    results,
+    runner,
+    seed,
+    soak,
+    stub,
+    upload,
+    verify,
+)
+from pulp_smash.config import ServerConfig
+
+COMMANDS = (
+    baseline,
+    benchmark,
+    load,
+    results,
+    runner,
+    seed,
+    soak,
+    stub,
+    upload,
+    verify,
+)
+"""The modules that add subcommands. See :mod:`pulp_smash.commands`."""
+
 
 MESSAGE = tuple((
     '''\
-    Pulp Smash's command line interface has not yet been fleshed out. Please
-    create a configuration file at {} and call `python -m unittest2 discover
-    pulp_smash.tests`. The configuration file should have this structure:
+    To test a Pulp server, create a configuration file at {} and call `python
+    -m unittest2 discover pulp_smash.tests`, or `python -m pulp_smash run` to
+    run the tests in parallel. `python -m pulp_smash --help` lists the other
+    subcommands. The configuration file should have this structure:
     ''',
     '''\
     {"default": {
@@ -38,10 +68,14 @@ MESSAGE = tuple((
     selection syntax, and consult the source code to see which test modules are
     available.
     ''',
+    '''\
+    Each subcommand describes itself. For example, `python -m pulp_smash load
+    --help` describes how to generate load against a server.
+    ''',
 ))
 
 
-def main():
+def _print_message():
     """Provide usage instructions to the user."""
     cfg_path = join(
         # pylint:disable=protected-access
@@ -58,8 +92,33 @@ def main():
     wrapper.subsequent_indent = '  '
     message += '\n\n' + wrapper.fill(textwrap.dedent(MESSAGE[4]))
     message += '\n\n' + wrapper.fill(textwrap.dedent(MESSAGE[5]))
+    message += '\n\n' + wrapper.fill(textwrap.dedent(MESSAGE[6]))
     print(message)
 
 
+def _make_parser():
+    """Return a parser for Pulp Smash's command line arguments."""
+    parser = argparse.ArgumentParser(prog='python -m pulp_smash')
+    subparsers = parser.add_subparsers()
+    for command in COMMANDS:
+        command.add_parsers(subparsers)
+    return parser
+
+
+def main(argv=None):
+    """Parse command line arguments, and act on them.
+
+    If no arguments are given, provide usage instructions to the user.
+
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv:
+        _print_message()
+        return
+    args = _make_parser().parse_args(argv)
+    args.func(args)
+
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,387 @@
+# coding=utf-8
+"""A client for working with Pulp's API.
+
+Test cases should not call ``requests.post`` and friends directly. Doing so
+opens a new TCP (and possibly TLS) connection for every request, and it forces
+each caller to unpack a :class:`pulp_smash.config.ServerConfig` by hand.
+Instead, test cases should use a :class:`Client`, which wraps a single pooled
+``requests.Session``:
+
+>>> from pulp_smash.api import get_client
+>>> response = get_client().post('/pulp/api/v2/actions/login/')
+
+"""
+from __future__ import unicode_literals
+
+import atexit
+import os
+import time
+from multiprocessing.pool import ThreadPool
+from os.path import join
+import requests
+from xdg import BaseDirectory
+from pulp_smash import auth, metrics, utils
+from pulp_smash.cassette import Cassette, CassetteAdapter
+from pulp_smash.config import get_config, get_section
+from pulp_smash.tasks import spawned_task_hrefs, task_id
+from pulp_smash.utils import monotonic
+
+
+# The number of connections that a `Client` keeps alive to its server.
+DEFAULT_POOL_SIZE = 10
+
+# Settings that are applied to a `requests.Session` once, instead of being
+# passed along with each request. "verify" and "proxies" are not among them,
+# because environment variables such as REQUESTS_CA_BUNDLE and HTTPS_PROXY
+# override those settings when they are made on a session.
+_SESSION_ATTRS = ('auth', 'cert')
+
+# Per-request settings that also apply to the request that fetches a login
+# certificate.
+_LOGIN_KWARGS = ('proxies', 'timeout', 'verify')
+
+# `get_client` uses this as a cache, in the same spirit as
+# `pulp_smash.config._CONFIG`.
+_CLIENT = None
+
+
+def get_client():
+    """Return the global :class:`Client` object.
+
+    This method makes use of a cache. If the cache is empty, a new client is
+    built from :func:`pulp_smash.config.get_config`. Otherwise, the cached
+    client is returned. Sharing a single client lets all test cases share a
+    single pool of keep-alive connections.
+
+    If the ``PULP_SMASH_CASSETTE`` environment variable is set, the new client
+    uses a :class:`pulp_smash.cassette.Cassette` in that mode. The cassette is
+    saved when the client is closed by :func:`reset_client`, or when the
+    Python interpreter exits.
+
+    The new client authenticates with a login certificate if it can. See
+    :mod:`pulp_smash.auth`.
+
+    :returns: The global ``Client`` object.
+    :rtype: pulp_smash.api.Client
+
+    """
+    global _CLIENT  # pylint:disable=global-statement
+    if _CLIENT is None:
+        server_config = get_config()
+        cassette = None
+        mode = os.environ.get('PULP_SMASH_CASSETTE')
+        if mode:
+            cassette = _get_cassette(server_config, mode, get_section())
+        _CLIENT = Client(
+            server_config,
+            cassette=cassette,
+            login_cert=True,
+        )
+        if cassette is not None:
+            atexit.register(cassette.save)
+    return _CLIENT
+
+
+def reset_client():
+    """Close and discard the global :class:`Client` object.
+
+    Closing the client saves its cassette, if it has one. The next call to
+    :func:`get_client` builds a new client. Call this after calling
+    :func:`pulp_smash.config.reset`, and before a process that does not run
+    ``atexit`` handlers ends.
+
+    :returns: Nothing.
+
+    """
+    global _CLIENT  # pylint:disable=global-statement
+    client, _CLIENT = _CLIENT, None
+    if client is not None:
+        client.close()
+
+
+def _get_cassette(server_config, mode, section):
+    """Return a cassette for ``server_config``, stored in the XDG cache.
+
+    If recording, the server's version is fetched, so that responses from
+    other versions of Pulp are discarded.
+
+    """
+    cassette_dir = BaseDirectory.save_cache_path(
+        join('pulp_smash', 'cassettes')
+    )
+    os.chmod(cassette_dir, 0o700)
+    path = join(cassette_dir, '{}.json.gz'.format(section))
+    server_version = None
+    if mode == 'record':
+        with Client(server_config, recorder=None) as client:
+            server_version = utils.get_server_version(client)
+    return Cassette(path, mode, section, server_version)
+
+
+def _can_use_login_cert(server_config, cassette):
+    """Tell whether a :class:`Client` can use a login certificate.
+
+    A replaying cassette would answer the login with a redacted certificate,
+    which must not be stored where live clients would find it.
+
+    """
+    return (
+        (cassette is None or cassette.mode != 'replay') and
+        server_config['base_url'].startswith('https://') and
+        isinstance(server_config.get('auth'), (list, tuple)) and
+        len(server_config['auth']) == 2 and
+        'cert' not in server_config
+    )
+
+
+def _share_json(response, body):
+    """Make the next ``response.json()`` call return ``body``.
+
+    Later calls, and calls with arguments, decode the body as usual. Each
+    call thus still returns an object of its own.
+
+    """
+    decode = response.json
+
+    def json(**kwargs):
+        """Return ``body`` once, and then decode the response as usual."""
+        response.json = decode
+        if kwargs:
+            return decode(**kwargs)
+        return body
+
+    response.json = json
+
+
+class Client(object):
+    """A pooled HTTP client for talking to a single server.
+
+    The server's ``base_url`` is prepended to each path, and the ``auth`` and
+    ``cert`` settings are applied to the underlying session once. All
+    other settings in ``server_config`` are passed to each request, just as if
+    they had been splatted into a call to ``requests.request``. Any of these
+    settings may be overridden on a per-request basis:
+
+    >>> from pulp_smash.api import Client
+    >>> from pulp_smash.config import get_config
+    >>> client = Client(get_config())
+    >>> response = client.post('/pulp/api/v2/actions/login/', auth=('', ''))
+
+    Several requests may be sent at once with :meth:`request_many`.
+
+    Each request is timed and reported to a
+    :class:`pulp_smash.metrics.Recorder`, as are the tasks spawned by each
+    call report received.
+
+    :param server_config: A :class:`pulp_smash.config.ServerConfig` object.
+    :param pool_size: An integer. The maximum number of connections to keep
+        alive to the server. This is also the default number of requests that
+        :meth:`request_many` sends at once.
+    :param recorder: A :class:`pulp_smash.metrics.Recorder`, or ``None`` to
+        not record requests.
+    :param cassette: A :class:`pulp_smash.cassette.Cassette`. If given,
+        responses are recorded to or replayed from it. The cassette is saved
+        when the client is closed.
+    :param login_cert: A boolean. Whether to log in once and authenticate
+        with a login certificate, instead of sending the "auth" credentials
+        with each request. This is done only if the server's ``base_url``
+        starts with "https://", "auth" is a ``(username, password)`` pair,
+        no "cert" is configured, and ``cassette`` is not replaying. If the
+        server rejects the certificate with an HTTP 401 response, a new
+        certificate is fetched and the request is sent again. Requests that
+        are given their own ``auth`` or ``cert`` are sent as-is.
+
+    """
+
+    def __init__(  # pylint:disable=too-many-arguments
+            self,
+            server_config,
+            pool_size=DEFAULT_POOL_SIZE,
+            recorder=metrics.RECORDER,
+            cassette=None,
+            login_cert=False):
+        self.server_config = server_config
+        self.pool_size = pool_size
+        self.recorder = recorder
+        self.base_url = server_config['base_url']
+        self.session = requests.Session()
+        adapter_kwargs = {'pool_connections': 1, 'pool_maxsize': pool_size}
+        if cassette is None:
+            adapter = requests.adapters.HTTPAdapter(**adapter_kwargs)
+        else:
+            adapter = CassetteAdapter(cassette, **adapter_kwargs)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.login_cert = None
+        if login_cert and _can_use_login_cert(server_config, cassette):
+            self.login_cert = auth.get_login_cert(server_config)
+        self._request_kwargs = {}
+        for key, value in server_config.items():
+            if key == 'base_url':
+                continue
+            elif key == 'auth' and self.login_cert is not None:
+                continue
+            elif key in _SESSION_ATTRS:
+                setattr(self.session, key, value)
+            else:
+                self._request_kwargs[key] = value
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Close all connections held by this client, and save its cassette.
+
+        The cassette, if any, is saved by the adapter that replays or records
+        it, when the session closes that adapter.
+
+        """
+        self.session.close()
+
+    def url(self, path):
+        """Return an absolute URL for ``path``.
+
+        :param path: A string. Either a path such as ``/pulp/api/v2/``, which
+            is appended to the server's ``base_url``, or an absolute URL,
+            which is returned unchanged.
+        :returns: A string.
+
+        """
+        if path.startswith(('http://', 'https://')):
+            return path
+        return self.base_url + path
+
+    def request(self, method, path, **kwargs):
+        """Send an HTTP request and return the response.
+
+        :param method: A string, such as "GET" or "POST".
+        :param path: A string. See :meth:`url`.
+        :param kwargs: Passed on to ``requests.Session.request``.
+        :returns: A ``requests.Response`` object.
+
+        """
+        for key, value in self._request_kwargs.items():
+            kwargs.setdefault(key, value)
+        if self.login_cert is None or 'auth' in kwargs or 'cert' in kwargs:
+            return self._send(method, path, **kwargs)
+        login_kwargs = {
+            key: kwargs[key] for key in _LOGIN_KWARGS if key in kwargs
+        }
+        kwargs['cert'] = self.login_cert.get(self.session, **login_kwargs)
+        sent = time.time()
+        response = self._send(method, path, **kwargs)
+        if response.status_code == 401:
+            response.close()
+            kwargs['cert'] = self.login_cert.refresh(
+                self.session,
+                sent,
+                **login_kwargs
+            )
+            response = self._send(method, path, **kwargs)
+        return response
+
+    def _send(self, method, path, **kwargs):
+        """Send an HTTP request, record it, and return the response."""
+        if self.recorder is None:
+            return self.session.request(method, self.url(path), **kwargs)
+        start = monotonic()
+        try:
+            response = self.session.request(method, self.url(path), **kwargs)
+        except requests.exceptions.RequestException:
+            self.recorder.record(method, path, None, 0, monotonic() - start)
+            raise
+        if kwargs.get('stream'):
+            nbytes = int(response.headers.get('Content-Length', 0))
+        else:
+            nbytes = len(response.content)
+        self.recorder.record(
+            method,
+            path,
+            response.status_code,
+            nbytes,
+            monotonic() - start,
+        )
+        if response.status_code == 202 and not kwargs.get('stream'):
+            self._record_tasks(response)
+        return response
+
+    def _record_tasks(self, response):
+        """Record the tasks spawned by a call report, if it is one.
+
+        The decoded call report is handed to the caller's next call to
+        ``response.json()``, so that it is decoded only once.
+
+        """
+        received = time.time()
+        try:
+            call_report = response.json()
+        except ValueError:
+            return
+        _share_json(response, call_report)
+        try:
+            hrefs = spawned_task_hrefs(call_report)
+        except (KeyError, TypeError):
+            return
+        self.recorder.record_tasks(
+            [task_id(href) for href in hrefs],
+            received,
+        )
+
+    def request_many(self, calls, concurrency=None):
+        """Send several HTTP requests concurrently and return the responses.
+
+        Each call is a ``(method, path, payload)`` triple. The payload is
+        serialized to JSON and sent as the request body. If the payload is
+        ``None``, no body is sent. For example:
+
+        >>> from pulp_smash.api import get_client
+        >>> responses = get_client().request_many((
+        ...     ('POST', '/pulp/api/v2/actions/login/', None),
+        ...     ('GET', '/pulp/api/v2/repositories/', None),
+        ... ))
+
+        If any request raises an exception, that exception is re-raised.
+
+        :param calls: An iterable of ``(method, path, payload)`` triples.
+        :param concurrency: An integer. The maximum number of requests that
+            may be in flight at once. Defaults to the client's ``pool_size``.
+        :returns: A tuple of ``requests.Response`` objects, in the same order
+            as ``calls``.
+
+        """
+        calls = tuple(calls)
+        if not calls:
+            return ()
+        if concurrency is None:
+            concurrency = self.pool_size
+        pool = ThreadPool(min(concurrency, len(calls)))
+        try:
+            return tuple(pool.map(self._request_call, calls))
+        finally:
+            pool.terminate()
+
+    def _request_call(self, call):
+        """Send a single call. See :meth:`request_many`."""
+        method, path, payload = call
+        if payload is None:
+            return self.request(method, path)
+        return self.request(method, path, json=payload)
+
+    def delete(self, path, **kwargs):
+        """Send an HTTP DELETE request. See :meth:`request`."""
+        return self.request('DELETE', path, **kwargs)
+
+    def get(self, path, **kwargs):
+        """Send an HTTP GET request. See :meth:`request`."""
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        """Send an HTTP POST request. See :meth:`request`."""
+        return self.request('POST', path, **kwargs)
+
+    def put(self, path, **kwargs):
+        """Send an HTTP PUT request. See :meth:`request`."""
+        return self.request('PUT', path, **kwargs)
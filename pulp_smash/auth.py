@@ -0,0 +1,170 @@
+# coding=utf-8
+"""Tools for authenticating with login certificates instead of passwords.
+
+When a request carries HTTP Basic credentials, Pulp checks the password
+before it does anything else, and password checks are deliberately slow.
+Pulp's login endpoint offers a cheaper alternative: it trades a username and
+password for a certificate and private key, which may then be presented as a
+TLS client certificate. A :class:`LoginCert` logs in on behalf of a
+:class:`pulp_smash.config.ServerConfig`, and it stores the resulting
+certificate in Pulp Smash's XDG cache directory, where other processes
+targeting the same server may find it:
+
+>>> import requests
+>>> from pulp_smash.auth import get_login_cert
+>>> from pulp_smash.config import get_config
+>>> cert_path = get_login_cert(get_config()).get(requests.Session())
+
+Settings such as ``verify`` are not read from the server config here, so
+callers pass them along, as :class:`pulp_smash.api.Client` does:
+
+>>> cert_path = get_login_cert(get_config()).get(
+...     requests.Session(),
+...     verify=False,
+... )
+
+Client certificates can only be presented over TLS, so this is of use only
+with servers whose ``base_url`` starts with "https://".
+:class:`pulp_smash.api.Client` does all of this when created with
+``login_cert=True``, as :func:`pulp_smash.api.get_client` does.
+
+"""
+from __future__ import unicode_literals
+
+import hashlib
+import os
+import threading
+import time
+from os.path import join
+from xdg import BaseDirectory
+from pulp_smash.constants import LOGIN_PATH
+from pulp_smash.utils import write_atomically
+
+
+DEFAULT_LIFETIME = 6 * 24 * 60 * 60
+"""The number of seconds for which a login certificate is trusted.
+
+Pulp issues certificates that are valid for a week by default. A day of
+margin is left, in case the server's clock is ahead of ours.
+
+"""
+
+# `get_login_cert` uses this as a cache. It maps (base_url, username) tuples
+# to `LoginCert` objects.
+_LOGIN_CERTS = {}
+_LOGIN_CERTS_LOCK = threading.Lock()
+
+
+def get_login_cert(server_config):
+    """Return the :class:`LoginCert` for ``server_config``.
+
+    This method makes use of a cache, so that one login certificate is shared
+    by all clients for a given server and user.
+
+    :param server_config: A :class:`pulp_smash.config.ServerConfig` object,
+        with a ``(username, password)`` "auth" setting.
+    :returns: A :class:`LoginCert`.
+
+    """
+    key = (server_config['base_url'], server_config['auth'][0])
+    with _LOGIN_CERTS_LOCK:
+        if key not in _LOGIN_CERTS:
+            _LOGIN_CERTS[key] = LoginCert(server_config)
+        return _LOGIN_CERTS[key]
+
+
+class LoginCert(object):
+    """A login certificate for a single server and user.
+
+    The certificate and its private key are stored together in a single PEM
+    file, which only the current user may read. A new certificate is fetched
+    whenever the stored one is missing or older than ``lifetime``. This class
+    is thread safe.
+
+    :param server_config: A :class:`pulp_smash.config.ServerConfig` object,
+        with a ``(username, password)`` "auth" setting.
+    :param lifetime: A number. How many seconds a certificate is trusted for.
+    :param path: A string. The file in which the certificate is stored.
+        Defaults to a file in Pulp Smash's XDG cache directory, named after
+        the server and user.
+
+    """
+
+    def __init__(self, server_config, lifetime=DEFAULT_LIFETIME, path=None):
+        self.server_config = server_config
+        self.lifetime = lifetime
+        if path is None:
+            path = _default_path(server_config)
+        self.path = path
+        self._lock = threading.Lock()
+
+    def get(self, session, **kwargs):
+        """Return the path to a fresh certificate, logging in if needed.
+
+        :param session: A ``requests.Session`` with which to log in.
+        :param kwargs: Passed on to ``session.post`` when logging in, such as
+            ``verify``, ``proxies`` and ``timeout``.
+        :returns: A string. The path to a PEM file holding a certificate and
+            its private key, as accepted by the ``cert`` argument to
+            ``requests.request``.
+        :raises requests.exceptions.HTTPError: If logging in fails.
+
+        """
+        with self._lock:
+            if self._issued() + self.lifetime <= time.time():
+                self._login(session, **kwargs)
+            return self.path
+
+    def refresh(self, session, since, **kwargs):
+        """Fetch a new certificate, unless one was fetched after ``since``.
+
+        Call this when the server rejects the certificate. If several threads
+        or processes find that the certificate is rejected at once, only the
+        first logs in again.
+
+        :param session: A ``requests.Session`` with which to log in.
+        :param since: A timestamp, as returned by ``time.time()``. Typically,
+            the time at which the rejected request was sent.
+        :param kwargs: The same as for :meth:`get`.
+        :returns: The same as :meth:`get`.
+        :raises requests.exceptions.HTTPError: If logging in fails.
+
+        """
+        with self._lock:
+            if self._issued() < since:
+                self._login(session, **kwargs)
+            return self.path
+
+    def _issued(self):
+        """Return the time at which the stored certificate was fetched.
+
+        If no certificate is stored, return zero.
+
+        """
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return 0
+
+    def _login(self, session, **kwargs):
+        """Log in, and atomically replace the stored certificate."""
+        response = session.post(
+            self.server_config['base_url'] + LOGIN_PATH,
+            auth=tuple(self.server_config['auth']),
+            **kwargs
+        )
+        response.raise_for_status()
+        body = response.json()
+        pem = '{0}\n{1}\n'.format(body['key'], body['certificate'])
+        write_atomically(self.path, pem.encode('utf-8'))
+
+
+def _default_path(server_config):
+    """Return a private cache file path for ``server_config``'s certificate."""
+    cert_dir = BaseDirectory.save_cache_path(join('pulp_smash', 'certs'))
+    os.chmod(cert_dir, 0o700)
+    digest = hashlib.sha256()
+    for part in (server_config['base_url'], server_config['auth'][0]):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return join(cert_dir, '{}.pem'.format(digest.hexdigest()))
@@ -0,0 +1,237 @@
+# coding=utf-8
+"""Tools for catching latency regressions between Pulp builds.
+
+A :class:`BaselineStore` keeps the request metrics of past runs, keyed by
+configuration file section and by the version of Pulp that the section's
+server was running. The metrics of a new run can be compared against a stored
+baseline with :func:`compare`, which tests each endpoint's latencies for a
+significant change:
+
+>>> from pulp_smash.baseline import BaselineStore, compare, format_comparison
+>>> store = BaselineStore(BaselineStore.default_path())
+>>> store.put('default', '2.7.0', old_metrics)
+>>> store.save()
+>>> rows = compare(store.get('default', '2.7.0'), new_metrics)
+>>> print(format_comparison(rows))
+
+Metrics are reports from :meth:`pulp_smash.metrics.Recorder.report`, which
+include a random sample of each endpoint's latencies. The samples are
+compared with :func:`pulp_smash.stats.mann_whitney_u`. Because many endpoints
+are tested at once, a Bonferroni correction is applied: each endpoint is
+tested at ``alpha`` divided by the number of endpoints tested. A significant
+change counts only if the median latency also moves by more than a
+``threshold``, so that huge samples do not flag trivial changes.
+
+This module backs the ``python -m pulp_smash baseline`` and ``python -m
+pulp_smash compare`` commands.
+
+"""
+from __future__ import division, unicode_literals
+
+import json
+from datetime import datetime
+from os.path import join
+from xdg import BaseDirectory
+from pulp_smash import stats
+from pulp_smash.jsonstore import JsonStore
+
+
+MIN_SAMPLES = 20
+"""The fewest latencies per endpoint that :func:`compare` will test."""
+
+
+class BaselineStore(JsonStore):
+    """A store of request metrics, keyed by section and server version.
+
+    The store is a :class:`pulp_smash.jsonstore.JsonStore`, so several runs
+    may save it at once.
+
+    :param path: A string. The file in which baselines are stored. It need not
+        exist.
+
+    """
+
+    @staticmethod
+    def default_path():
+        """Return the path to a store in Pulp Smash's XDG data directory.
+
+        Unlike timings and fingerprints, baselines cannot be regenerated once
+        the server has been upgraded, so they are not kept in the cache
+        directory.
+
+        """
+        data_dir = BaseDirectory.save_data_path('pulp_smash')
+        return join(data_dir, 'baselines.json')
+
+    def versions(self, section):
+        """Return the server versions that ``section`` has baselines for.
+
+        :param section: A string. The name of a configuration file section.
+        :returns: A list of strings, from the least to the most recently
+            saved.
+
+        """
+        baselines = self._sections.get(section, {})
+        return sorted(baselines, key=lambda key: baselines[key]['saved'])
+
+    def get(self, section, version):
+        """Return the baseline for a section and server version.
+
+        :param section: A string. The name of a configuration file section.
+        :param version: A string, such as "2.7.0".
+        :returns: A dict, as returned by
+            :meth:`pulp_smash.metrics.Recorder.report`, or ``None`` if there
+            is no such baseline.
+
+        """
+        baseline = self._sections.get(section, {}).get(version)
+        return None if baseline is None else baseline['metrics']
+
+    def put(self, section, version, metrics):
+        """Store a baseline, replacing any with the same key.
+
+        Only the metrics' endpoints are kept.
+
+        :param section: A string. The name of a configuration file section.
+        :param version: A string, such as "2.7.0".
+        :param metrics: A dict, as returned by
+            :meth:`pulp_smash.metrics.Recorder.report`.
+        :returns: Nothing.
+
+        """
+        self._set(section, version, {
+            'metrics': {'endpoints': metrics['endpoints']},
+            'saved': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
+        })
+
+
+def read_metrics(path, section):
+    """Read the request metrics for a section from a report file.
+
+    :param path: A string. The path to a report written by ``python -m
+        pulp_smash run --report``, or to a ``metrics.json`` file.
+    :param section: A string. The configuration file section to read metrics
+        for. It is ignored if the file is a ``metrics.json`` file.
+    :returns: A dict, as returned by
+        :meth:`pulp_smash.metrics.Recorder.report`.
+    :raises KeyError: If the report has no metrics for ``section``.
+
+    """
+    with open(path) as handle:
+        report = json.load(handle)
+    if 'endpoints' in report:
+        return report
+    return report['metrics'][section]
+
+
+def compare(baseline, current, alpha=0.01, threshold=0.05):
+    """Compare each endpoint's latencies against a baseline.
+
+    :param baseline: A dict, as returned by
+        :meth:`pulp_smash.metrics.Recorder.report`.
+    :param current: A dict, as returned by
+        :meth:`pulp_smash.metrics.Recorder.report`.
+    :param alpha: A number. The chance of wrongly flagging any endpoint at
+        all, if nothing has changed.
+    :param threshold: A number. How much the median latency must change by,
+        as a fraction, for a significant change to count.
+    :returns: A list of dicts, one per endpoint, sorted by path and method.
+        Each has the keys "method", "path", "baseline" and "current" (median
+        latencies in seconds, or ``None``), "change" (the fractional change
+        in median latency, or ``None``), "p" (the p-value, or ``None`` if the
+        endpoint was not tested), and "verdict". The verdict is one of
+        "slower", "faster", "unchanged", "new", "gone" or "few samples".
+
+    """
+    samples = {}
+    for which, report in (('baseline', baseline), ('current', current)):
+        for endpoint in report['endpoints']:
+            key = (endpoint['path'], endpoint['method'])
+            samples.setdefault(key, {})[which] = sorted(
+                endpoint['latency'].get('samples', ())
+            )
+    tested = sum(
+        1 for pair in samples.values()
+        if min(len(pair.get('baseline', ())), len(pair.get('current', ())))
+        >= MIN_SAMPLES
+    )
+    rows = []
+    for (path, method), pair in sorted(samples.items()):
+        before = pair.get('baseline', [])
+        after = pair.get('current', [])
+        row = {
+            'method': method,
+            'path': path,
+            'baseline': stats.percentile(before, 50),
+            'current': stats.percentile(after, 50),
+            'change': None,
+            'p': None,
+        }
+        if row['baseline'] and row['current'] is not None:
+            row['change'] = row['current'] / row['baseline'] - 1
+        if 'baseline' not in pair:
+            row['verdict'] = 'new'
+        elif 'current' not in pair:
+            row['verdict'] = 'gone'
+        elif min(len(before), len(after)) < MIN_SAMPLES:
+            row['verdict'] = 'few samples'
+        else:
+            row['p'] = stats.mann_whitney_u(before, after)[1]
+            row['verdict'] = 'unchanged'
+            if row['p'] < alpha / tested and row['change'] is not None:
+                if row['change'] > threshold:
+                    row['verdict'] = 'slower'
+                elif row['change'] < -threshold:
+                    row['verdict'] = 'faster'
+        rows.append(row)
+    return rows
+
+
+def regressed(rows):
+    """Tell whether any endpoint in a comparison got slower.
+
+    :param rows: A list of dicts, as returned by :func:`compare`.
+    :returns: A boolean.
+
+    """
+    return any(row['verdict'] == 'slower' for row in rows)
+
+
+def format_comparison(rows, changed_only=False):
+    """Return a human-readable table of a comparison.
+
+    :param rows: A list of dicts, as returned by :func:`compare`.
+    :param changed_only: A boolean. Whether to omit endpoints whose verdict is
+        "unchanged".
+    :returns: A string.
+
+    """
+    lines = ['{0:<12} {1:>9} {2:>9} {3:>8} {4:>8}  {5}'.format(
+        'verdict', 'baseline', 'current', 'change', 'p', 'endpoint'
+    )]
+    for row in rows:
+        if changed_only and row['verdict'] == 'unchanged':
+            continue
+        lines.append('{0:<12} {1:>9} {2:>9} {3:>8} {4:>8}  {5} {6}'.format(
+            row['verdict'],
+            _format_ms(row['baseline']),
+            _format_ms(row['current']),
+            '-' if row['change'] is None else '{0:+.1%}'.format(row['change']),
+            '-' if row['p'] is None else '{0:.2g}'.format(row['p']),
+            row['method'],
+            row['path'],
+        ))
+    counts = {}
+    for row in rows:
+        counts[row['verdict']] = counts.get(row['verdict'], 0) + 1
+    lines.append('')
+    lines.append(', '.join(
+        '{0} {1}'.format(count, verdict)
+        for verdict, count in sorted(counts.items())
+    ))
+    return '\n'.join(lines)
+
+
+def _format_ms(seconds):
+    """Format a number of seconds as milliseconds, or "-" if it is ``None``."""
+    return '-' if seconds is None else '{0:.1f}ms'.format(seconds * 1000)
@@ -0,0 +1,9 @@
+# coding=utf-8
+"""Benchmarks that measure how Pulp's operations scale.
+
+Unlike the tests in :mod:`pulp_smash.tests`, benchmarks do not pass or fail.
+They create large amounts of data on a server, time an operation, and report
+how its duration grows with the amount of data.
+
+"""
+from __future__ import unicode_literals
@@ -0,0 +1,349 @@
+# coding=utf-8
+"""Measure how regenerating `content applicability`_ scales.
+
+:mod:`pulp_smash.tests.test_content_applicability` checks that applicability
+can be regenerated. This module measures how long it takes, and how that time
+grows with the number of consumers, the number of repositories and the number
+of errata in each repository. Each dimension is swept in turn, while the other
+two are held at a base value:
+
+>>> from pulp_smash.api import get_client
+>>> from pulp_smash.benchmarks import content_applicability
+>>> report = content_applicability.sweep(
+...     get_client(),
+...     {'consumers': 100, 'repositories': 10, 'errata': 10},
+...     {'consumers': [100, 1000, 10000], 'errata': [10, 100, 1000]},
+... )
+>>> print(content_applicability.format_report(report))
+
+For each point in the sweep, the consumers, repositories, bindings, profiles
+and errata are created with :class:`pulp_smash.seed.Seeder`. Applicability is
+then regenerated for the new consumers and for the new repositories, and both
+are timed in two ways:
+
+``end_to_end``
+    The seconds from sending the request until every spawned task is seen to
+    be finished. Tasks are polled, so this slightly overstates the true time.
+``task_run``
+    The seconds from the earliest start time to the latest finish time among
+    the spawned tasks, as reported by the server. Pulp reports these times to
+    the second, so this is coarse for quick tasks.
+
+The resources are deleted before the next point is measured. Errata are left
+behind as orphaned content units.
+
+For each dimension and each kind of regeneration, a growth exponent is fitted
+with :func:`pulp_smash.stats.power_law_exponent`. An exponent near 1 means
+that time grows linearly with the dimension, and an exponent near 2 means it
+grows quadratically.
+
+This module backs the ``python -m pulp_smash benchmark`` command.
+
+.. _content applicability:
+    https://pulp.readthedocs.org/en/latest/dev-guide/integration/rest-api/consumer/applicability.html
+
+"""
+from __future__ import division, unicode_literals
+
+import re
+from os.path import join
+from xdg import BaseDirectory
+from pulp_smash import stats
+from pulp_smash.constants import (
+    CONSUMER_APPLICABILITY_PATH,
+    REPO_APPLICABILITY_PATH,
+)
+from pulp_smash.seed import Seeder
+from pulp_smash.tasks import (
+    parse_timestamp,
+    raise_for_tasks,
+    spawned_task_hrefs,
+    wait_for_tasks,
+)
+from pulp_smash.utils import monotonic
+
+
+DIMENSIONS = ('consumers', 'repositories', 'errata')
+"""The dimensions that :func:`sweep` can vary."""
+
+ACTIONS = {
+    'consumers': (
+        CONSUMER_APPLICABILITY_PATH,
+        'consumer_criteria',
+        'consumer',
+    ),
+    'repositories': (
+        REPO_APPLICABILITY_PATH,
+        'repo_criteria',
+        'repository',
+    ),
+}
+"""The kinds of regeneration that are timed.
+
+Each value is a tuple of the path to POST to, the name of the criteria in the
+request body, and the kind of resource that the criteria select.
+
+"""
+
+COLUMNS = (
+    'dimension',
+    'consumers',
+    'repositories',
+    'errata',
+    'action',
+    'end_to_end',
+    'task_run',
+    'tasks',
+)
+"""The keys of each row in a report, in the order :func:`format_csv` uses."""
+
+
+def make_spec(prefix, point, bindings=1, packages=100):
+    """Return a :mod:`pulp_smash.seed` spec for a point in a sweep.
+
+    :param prefix: A string. The prefix of every resource's ID.
+    :param point: A dict mapping each of :data:`DIMENSIONS` to an integer.
+    :param bindings: An integer. How many repositories each consumer is bound
+        to.
+    :param packages: An integer. How many packages each consumer's profile
+        lists.
+    :returns: A dict.
+
+    """
+    return {
+        'prefix': prefix,
+        'repositories': {'count': point['repositories']},
+        'consumers': {'count': point['consumers']},
+        'bindings': {'per_consumer': bindings},
+        'profiles': {'content_type': 'rpm', 'packages': packages},
+        'errata': {'per_repository': point['errata']},
+    }
+
+
+def regenerate(client, action, prefix, timeout=3600):
+    """Regenerate applicability for some resources, and time it.
+
+    :param client: A :class:`pulp_smash.api.Client` object.
+    :param action: A string. One of the keys in :data:`ACTIONS`.
+    :param prefix: A string. Only resources created by a
+        :class:`pulp_smash.seed.Seeder` with this prefix are selected.
+    :param timeout: A number. The maximum number of seconds to wait for the
+        spawned tasks.
+    :returns: A dict with "end_to_end", "task_run" and "tasks" keys. The last
+        is the number of tasks spawned.
+    :raises requests.exceptions.HTTPError: If the request fails.
+    :raises pulp_smash.tasks.TaskFailedError: If a spawned task fails.
+
+    """
+    path, criteria, kind = ACTIONS[action]
+    pattern = '^{0}-{1}-'.format(re.escape(prefix), kind)
+    start = monotonic()
+    response = client.post(
+        path,
+        json={criteria: {'filters': {'id': {'$regex': pattern}}}},
+    )
+    response.raise_for_status()
+    report = wait_for_tasks(
+        client,
+        spawned_task_hrefs(response.json()),
+        timeout=timeout,
+        max_interval=1,
+    )
+    end_to_end = monotonic() - start
+    raise_for_tasks(report)
+    return {
+        'end_to_end': end_to_end,
+        'task_run': task_run_time(report.tasks.values()),
+        'tasks': len(report.tasks),
+    }
+
+
+def task_run_time(tasks):
+    """Return the seconds from the first task's start to the last's finish.
+
+    :param tasks: An iterable of task bodies.
+    :returns: A number, or ``None`` if there are no tasks or if any task lacks
+        a start or finish time.
+
+    """
+    starts = []
+    finishes = []
+    for task in tasks:
+        if not task.get('start_time') or not task.get('finish_time'):
+            return None
+        starts.append(parse_timestamp(task['start_time']))
+        finishes.append(parse_timestamp(task['finish_time']))
+    if not starts:
+        return None
+    return max(finishes) - min(starts)
+
+
+def sweep(  # pylint:disable=too-many-arguments,too-many-locals
+        client,
+        base,
+        dimensions,
+        prefix='bench',
+        bindings=1,
+        packages=100,
+        concurrency=10,
+        timeout=3600,
+        progress=None,
+        journal_dir=None):
+    """Measure applicability regeneration across a range of data sizes.
+
+    Each point in the sweep is measured once, even if it appears in the sweep
+    of more than one dimension. The resources for a point are deleted even if
+    seeding them fails. Each point's seeding journal is kept until its
+    resources are deleted, so that an interrupted sweep resumes seeding where
+    it left off, and leftover resources can be deleted with ``python -m
+    pulp_smash seed --teardown``.
+
+    :param client: A :class:`pulp_smash.api.Client` object.
+    :param base: A dict mapping each of :data:`DIMENSIONS` to an integer. The
+        values that dimensions are held at while another is swept.
+    :param dimensions: A dict mapping some of :data:`DIMENSIONS` to lists of
+        integers. The values to sweep each dimension through.
+    :param prefix: A string. The prefix of the IDs of every resource created.
+    :param bindings: An integer. How many repositories each consumer is bound
+        to.
+    :param packages: An integer. How many packages each consumer's profile
+        lists.
+    :param concurrency: An integer. How many requests may be in flight at once
+        while creating and deleting resources.
+    :param timeout: A number. The maximum number of seconds to wait for each
+        regeneration.
+    :param progress: A function, which is passed to
+        :class:`pulp_smash.seed.Seeder`.
+    :param journal_dir: A string. The directory in which seeding journals are
+        kept. Defaults to the XDG cache directory, where ``python -m pulp_smash
+        seed`` looks for them.
+    :returns: A dict with "rows" and "exponents" keys. "rows" is a list of
+        dicts with the keys in :data:`COLUMNS`. "exponents" maps each swept
+        dimension to a dict, which maps each of :data:`ACTIONS` to a dict,
+        which maps "end_to_end" and "task_run" to a growth exponent or
+        ``None``.
+    :raises requests.exceptions.HTTPError: If a request fails.
+    :raises pulp_smash.tasks.TaskFailedError: If a spawned task fails.
+
+    """
+    if journal_dir is None:
+        journal_dir = BaseDirectory.save_cache_path('pulp_smash')
+    measured = {}
+    rows = []
+    for dimension in DIMENSIONS:
+        for value in dimensions.get(dimension, ()):
+            point = dict(base)
+            point[dimension] = value
+            key = tuple(point[name] for name in DIMENSIONS)
+            if key not in measured:
+                point_prefix = '{0}-{1}c-{2}r-{3}e'.format(prefix, *key)
+                seeder = Seeder(
+                    client,
+                    make_spec(point_prefix, point, bindings, packages),
+                    join(journal_dir, 'seed-{0}.journal'.format(point_prefix)),
+                    concurrency,
+                    progress,
+                )
+                try:
+                    seeder.seed()
+                    measured[key] = {
+                        action: regenerate(
+                            client,
+                            action,
+                            point_prefix,
+                            timeout,
+                        )
+                        for action in sorted(ACTIONS)
+                    }
+                finally:
+                    seeder.teardown()
+            for action, timing in sorted(measured[key].items()):
+                row = dict(timing, dimension=dimension, action=action)
+                row.update(point)
+                rows.append(row)
+    return {'rows': rows, 'exponents': fit_exponents(rows)}
+
+
+def fit_exponents(rows):
+    """Fit a growth exponent for each swept dimension and action.
+
+    :param rows: A list of dicts, as in the "rows" of a report from
+        :func:`sweep`.
+    :returns: A dict, as in the "exponents" of a report from :func:`sweep`.
+
+    """
+    exponents = {}
+    for dimension in DIMENSIONS:
+        for action in sorted(ACTIONS):
+            selected = [
+                row for row in rows
+                if row['dimension'] == dimension and row['action'] == action
+            ]
+            if not selected:
+                continue
+            exponents.setdefault(dimension, {})[action] = {
+                metric: stats.power_law_exponent(
+                    [row[dimension] for row in selected],
+                    [row[metric] for row in selected],
+                )
+                for metric in ('end_to_end', 'task_run')
+            }
+    return exponents
+
+
+def format_csv(report):
+    """Return the rows of a report as CSV, with a header line.
+
+    :param report: A dict, as returned by :func:`sweep`.
+    :returns: A string.
+
+    """
+    lines = [','.join(COLUMNS)]
+    for row in report['rows']:
+        lines.append(','.join(
+            '' if row[column] is None else type('')(row[column])
+            for column in COLUMNS
+        ))
+    return '\n'.join(lines) + '\n'
+
+
+def format_report(report):
+    """Return a human-readable table of a report, and its growth exponents.
+
+    :param report: A dict, as returned by :func:`sweep`.
+    :returns: A string.
+
+    """
+    lines = [
+        '{0:<12} {1:>9} {2:>12} {3:>6} {4:<12} {5:>11} {6:>9}'.format(
+            'dimension', 'consumers', 'repositories', 'errata', 'action',
+            'end-to-end', 'task run',
+        )
+    ]
+    for row in report['rows']:
+        lines.append(
+            '{0:<12} {1:>9} {2:>12} {3:>6} {4:<12} {5:>10.3f}s {6:>9}'.format(
+                row['dimension'], row['consumers'], row['repositories'],
+                row['errata'], row['action'], row['end_to_end'],
+                _format_number(row['task_run'], 's'),
+            )
+        )
+    lines.append('')
+    lines.append('Growth exponents (end-to-end, task run):')
+    for dimension in DIMENSIONS:
+        fits = report['exponents'].get(dimension, {})
+        for action in sorted(fits):
+            lines.append('  regenerating {0}, by {1}: {2}, {3}'.format(
+                action,
+                dimension,
+                _format_number(fits[action]['end_to_end']),
+                _format_number(fits[action]['task_run']),
+            ))
+    return '\n'.join(lines)
+
+
+def _format_number(number, suffix=''):
+    """Format a number to three decimal places, or "n/a" if it is ``None``."""
+    if number is None:
+        return 'n/a'
+    return '{0:.3f}{1}'.format(number, suffix)
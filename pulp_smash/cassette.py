@@ -0,0 +1,355 @@
+# coding=utf-8
+"""Tools for recording responses and replaying them later.
+
+Re-running a test suite re-sends every request to the server, even when
+nothing server-side has changed. A :class:`Cassette` can break that cycle. In
+"record" mode, each response that a :class:`pulp_smash.api.Client` receives is
+stored in the cassette. In "replay" mode, responses are served from the
+cassette, and no network traffic occurs at all. Cassette files are readable
+by their owner only, and the certificate and private key returned by
+:data:`pulp_smash.constants.LOGIN_PATH` are never stored.
+
+Responses are keyed on their request's method, URL and body, and on the name
+of the configuration file section that the client targets. A cassette holds a
+bounded number of responses, and it evicts the least recently used response
+when full. A cassette remembers which version of Pulp its responses came from,
+and it discards all of them if it is opened for recording against a different
+version.
+
+Cassettes are easiest to use by setting the ``PULP_SMASH_CASSETTE``
+environment variable to "record" or "replay". If this is done,
+:func:`pulp_smash.api.get_client` stores responses in Pulp Smash's XDG cache
+directory:
+
+.. code-block:: sh
+
+    PULP_SMASH_CASSETTE=record python -m unittest2 discover pulp_smash.tests
+    PULP_SMASH_CASSETTE=replay python -m unittest2 discover pulp_smash.tests
+
+"""
+from __future__ import unicode_literals
+
+import base64
+import gzip
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from os.path import basename, dirname
+try:
+    from urllib.parse import urlsplit
+except ImportError:  # pragma: no cover
+    from urlparse import urlsplit  # Python 2
+import six
+from requests.adapters import HTTPAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from pulp_smash.constants import LOGIN_PATH
+
+
+MODES = ('record', 'replay')
+"""The modes that a :class:`Cassette` may be opened in."""
+
+REDACTED = 'REDACTED'
+"""What each value in a response from :data:`LOGIN_PATH` is stored as."""
+
+
+class CassetteMissError(Exception):
+    """Indicates that a replaying cassette has no response for a request."""
+
+
+class Cassette(object):
+    """A bounded, on-disk store of HTTP responses.
+
+    The responses are stored in a gzip-compressed JSON file. The file is read
+    when the cassette is created, and it is written by :meth:`save`. This class
+    is thread safe.
+
+    :param path: A string. The file in which responses are stored. It need not
+        exist.
+    :param mode: A string. One of :data:`MODES`.
+    :param section: A string. The name of the configuration file section that
+        responses are recorded from or replayed to.
+    :param server_version: A string, such as "2.7.0". If given, and if the
+        responses on disk came from a different server version, they are
+        discarded.
+    :param max_entries: An integer. The maximum number of responses to hold.
+
+    """
+
+    def __init__(  # pylint:disable=too-many-arguments
+            self,
+            path,
+            mode,
+            section='default',
+            server_version=None,
+            max_entries=1000):
+        if mode not in MODES:
+            raise ValueError(
+                'Mode must be one of {0}, not {1}.'.format(MODES, mode)
+            )
+        self.path = path
+        self.mode = mode
+        self.section = section
+        self.server_version = server_version
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._dirty = False
+        try:
+            with gzip.open(path, 'rb') as handle:
+                data = json.loads(handle.read().decode('utf-8'))
+        except IOError:
+            return
+        if server_version is None:
+            self.server_version = data['server_version']
+        elif server_version != data['server_version']:
+            return
+        for key, entry in data['entries']:
+            self._entries[key] = entry
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def key(self, method, url, body):
+        """Return a key for a request.
+
+        :param method: A string, such as "GET".
+        :param url: A string. An absolute URL.
+        :param body: The request body: a byte string, a text string, an
+            object supporting the buffer protocol, such as a ``memoryview``,
+            or ``None``.
+        :returns: A string.
+
+        """
+        if body is None:
+            body = b''
+        elif isinstance(body, type('')):
+            body = body.encode('utf-8')
+        elif not isinstance(body, bytes):
+            body = memoryview(body).tobytes()
+        digest = hashlib.sha256()
+        for part in (self.section, method.upper(), url):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        digest.update(body)
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the response stored under ``key``.
+
+        :param key: A string, as returned by :meth:`key`.
+        :returns: A dict, as passed to :meth:`put`.
+        :raises: ``KeyError`` if no such response is stored.
+
+        """
+        with self._lock:
+            entry = self._entries.pop(key)
+            self._entries[key] = entry  # Mark the entry as recently used.
+            return entry
+
+    def put(self, key, entry):
+        """Store a response under ``key``.
+
+        If the cassette is full, the least recently used response is evicted.
+
+        :param key: A string, as returned by :meth:`key`.
+        :param entry: A JSON-serializable dict describing a response.
+        :returns: Nothing.
+
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            self._dirty = True
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def save(self):
+        """Write the cassette to disk, if it is recording.
+
+        Nothing is written unless a response has been stored since the last
+        save. The file is written atomically, by writing to a temporary file
+        and then renaming it. The file is readable and writable by its owner
+        only, and its directory is created, if needed, accessible by its owner
+        only.
+
+        """
+        if self.mode != 'record':
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            data = {
+                'server_version': self.server_version,
+                'entries': list(self._entries.items()),
+            }
+        if dirname(self.path) and not os.path.isdir(dirname(self.path)):
+            os.makedirs(dirname(self.path), 0o700)
+        handle, tmp_path = tempfile.mkstemp(  # Created with mode 0600.
+            dir=dirname(self.path) or '.',
+            prefix=basename(self.path) + '.',
+        )
+        try:
+            with os.fdopen(handle, 'wb') as raw_file:
+                with gzip.GzipFile(fileobj=raw_file, mode='wb') as gzip_file:
+                    gzip_file.write(json.dumps(data).encode('utf-8'))
+            os.rename(tmp_path, self.path)
+        except BaseException:
+            os.remove(tmp_path)
+            with self._lock:
+                self._dirty = True
+            raise
+
+
+class CassetteAdapter(HTTPAdapter):
+    """A transport adapter that records responses to or replays responses from
+    a :class:`Cassette`.
+
+    :param cassette: A :class:`Cassette`.
+    :param kwargs: Passed on to ``requests.adapters.HTTPAdapter``.
+
+    """
+
+    def __init__(self, cassette, **kwargs):
+        self.cassette = cassette
+        super(CassetteAdapter, self).__init__(**kwargs)
+
+    def send(self, request, **kwargs):  # pylint:disable=arguments-differ
+        """Record or replay a response to ``request``.
+
+        A recorded response is stored once its body has been read to the end,
+        as it is read. Thus, responses requested with ``stream=True`` are
+        still streamed, and a response whose body is not read to the end is
+        not stored.
+
+        :raises pulp_smash.cassette.CassetteMissError: If the cassette is
+            replaying, and it has no response for ``request``.
+
+        """
+        key = self.cassette.key(request.method, request.url, request.body)
+        if self.cassette.mode == 'replay':
+            try:
+                entry = self.cassette.get(key)
+            except KeyError as err:
+                six.raise_from(CassetteMissError(
+                    'No response to {0} {1} has been recorded.'
+                    .format(request.method, request.url)
+                ), err)
+            return self._build_response(request, entry)
+        response = super(CassetteAdapter, self).send(request, **kwargs)
+
+        def put(body):
+            """Store the response, with the body that was read from it."""
+            body = _redact(request.url, body)
+            self.cassette.put(key, {
+                'body': base64.b64encode(body).decode('ascii'),
+                'headers': dict(response.headers),
+                'reason': response.reason,
+                'status_code': response.status_code,
+            })
+
+        response.raw = _RecordingStream(response.raw, put)
+        return response
+
+    def close(self):
+        """Save the cassette, and close all connections."""
+        self.cassette.save()
+        super(CassetteAdapter, self).close()
+
+    @staticmethod
+    def _build_response(request, entry):
+        """Build a ``requests.Response`` from a cassette entry.
+
+        The body is both loaded and available as a raw stream, so the
+        response may be read as if it were requested with or without
+        ``stream=True``.
+
+        """
+        body = base64.b64decode(entry['body'])
+        response = Response()
+        response.status_code = entry['status_code']
+        response.reason = entry['reason']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = io.BytesIO(body)
+        # pylint:disable=protected-access
+        response._content = body
+        response._content_consumed = True
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(0)
+        return response
+
+
+class _RecordingStream(object):
+    """Wrap a response's raw stream, and pass on its body once it is read.
+
+    ``requests`` reads bodies with ``stream``, which yields decoded chunks. The
+    chunks are collected as they pass by, and once the last has been read,
+    they are joined and passed to ``put``. Every other attribute is that of
+    the wrapped stream.
+
+    """
+
+    def __init__(self, raw, put):
+        self._raw = raw
+        self._put = put
+        self._chunks = None
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def stream(self, *args, **kwargs):
+        """Yield the chunks of the wrapped stream, and then pass them on."""
+        self._chunks = self._record(self._raw.stream(*args, **kwargs))
+        return self._chunks
+
+    def _record(self, chunks):
+        """Yield ``chunks``, and then pass them on."""
+        body = []
+        for chunk in chunks:
+            body.append(chunk)
+            yield chunk
+        self._chunks = None
+        self._put(b''.join(body))
+
+    def close(self):
+        """Close the wrapped stream.
+
+        A reader may stop as soon as it has what it needs, such as the end of
+        a JSON document, without reaching the end of the stream. If every
+        byte has been received anyway, the chunks left are read and the body
+        is passed on.
+
+        """
+        if self._chunks is not None and self._raw.closed:
+            for _ in self._chunks:
+                pass
+        self._raw.close()
+
+
+def _redact(url, content):
+    """Return a response body, with any login credentials replaced.
+
+    Each value in a JSON object returned by :data:`LOGIN_PATH` is replaced by
+    :data:`REDACTED`, so that a cassette never holds a certificate or private
+    key. The keys are kept, so replayed responses have the expected shape.
+
+    """
+    if urlsplit(url).path != LOGIN_PATH:
+        return content
+    try:
+        body = json.loads(content.decode('utf-8'))
+    except ValueError:
+        return content
+    if isinstance(body, dict):
+        body = {key: REDACTED for key in body}
+    return json.dumps(body).encode('utf-8')
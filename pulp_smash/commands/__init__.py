@@ -0,0 +1,60 @@
+# coding=utf-8
+"""The subcommands of Pulp Smash's command line interface.
+
+Each module in this package adds one or more subcommands to the parser built
+by ``python -m pulp_smash``. It does so with an ``add_parsers`` function,
+which takes the object returned by ``ArgumentParser.add_subparsers``, and it
+sets each subcommand's ``func`` default to a function that carries the
+subcommand out. The functions in this package are shared by those modules.
+
+"""
+from __future__ import unicode_literals
+
+import argparse
+import math
+import sys
+
+
+def positive_int(value):
+    """Parse a command line argument that must be a positive integer."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            '{0} is not a positive integer'.format(value)
+        )
+    return number
+
+
+def positive_float(value):
+    """Parse a command line argument that must be a positive number."""
+    number = float(value)
+    if number <= 0 or math.isnan(number):
+        raise argparse.ArgumentTypeError(
+            '{0} is not a positive number'.format(value)
+        )
+    return number
+
+
+def fraction(value):
+    """Parse a command line argument that must be in the range (0, 1]."""
+    number = float(value)
+    if not 0 < number <= 1:
+        raise argparse.ArgumentTypeError(
+            '{0} is not a fraction greater than 0 and at most 1'.format(value)
+        )
+    return number
+
+
+def print_progress(stage, done, total):
+    """Print a progress line for ``stage``, overwriting the previous one.
+
+    To avoid flooding the terminal, progress is printed only every hundredth
+    of the way through a stage.
+
+    """
+    if done != total and done % max(total // 100, 1):
+        return
+    sys.stderr.write('\r{0}: {1}/{2}'.format(stage, done, total))
+    if done == total:
+        sys.stderr.write('\n')
+    sys.stderr.flush()
@@ -0,0 +1,160 @@
+# coding=utf-8
+"""The ``baseline`` and ``compare`` commands.
+
+See :mod:`pulp_smash.baseline`.
+
+"""
+from __future__ import print_function, unicode_literals
+
+import sys
+from pulp_smash import baseline, utils
+from pulp_smash.api import Client
+from pulp_smash.config import ServerConfig
+
+
+def add_parsers(subparsers):
+    """Add the ``baseline`` and ``compare`` commands to ``subparsers``."""
+    _add_baseline_parser(subparsers)
+    _add_compare_parser(subparsers)
+
+
+def _add_baseline_parser(subparsers):
+    """Add the ``baseline`` command to ``subparsers``."""
+    baseline_parser = subparsers.add_parser(
+        'baseline',
+        help='store the request metrics in a report as a baseline',
+        description=(
+            'Store the request latencies in a report as the baseline for a '
+            'configuration file section and the version of Pulp that its '
+            'server runs. Later reports can be compared against it with the '
+            '"compare" command.'
+        ),
+    )
+    baseline_parser.add_argument(
+        '--server-version',
+        help=(
+            'the version of Pulp to file the baseline under (default: ask '
+            'the server)'
+        ),
+    )
+    _add_report_arguments(baseline_parser)
+    baseline_parser.set_defaults(func=_baseline)
+
+
+def _baseline(args):
+    """Store the request metrics in a report as a baseline."""
+    version = args.server_version or _server_version(args.section)
+    store = baseline.BaselineStore(
+        args.store or baseline.BaselineStore.default_path()
+    )
+    store.put(
+        args.section,
+        version,
+        baseline.read_metrics(args.report, args.section),
+    )
+    store.save()
+    print('Saved a baseline for section "{0}" and Pulp {1}.'.format(
+        args.section,
+        version,
+    ))
+
+
+def _add_compare_parser(subparsers):
+    """Add the ``compare`` command to ``subparsers``."""
+    compare_parser = subparsers.add_parser(
+        'compare',
+        help='compare the request metrics in a report against a baseline',
+        description=(
+            'Test whether the latency of each endpoint in a report differs '
+            'significantly from a stored baseline, and print a table of the '
+            'differences. Exit with a non-zero status if any endpoint got '
+            'significantly slower.'
+        ),
+    )
+    compare_parser.add_argument(
+        '--against',
+        help=(
+            'the version of Pulp whose baseline to compare against (default: '
+            'the most recently stored baseline for the section)'
+        ),
+    )
+    compare_parser.add_argument(
+        '--alpha',
+        default=0.01,
+        help=(
+            'the chance of flagging any endpoint when nothing has changed '
+            '(default: %(default)s)'
+        ),
+        type=float,
+    )
+    compare_parser.add_argument(
+        '--threshold',
+        default=0.05,
+        help=(
+            'the fraction by which median latency must change for a '
+            'significant difference to count (default: %(default)s)'
+        ),
+        type=float,
+    )
+    compare_parser.add_argument(
+        '--changed-only',
+        action='store_true',
+        help='omit endpoints whose latency did not change',
+    )
+    _add_report_arguments(compare_parser)
+    compare_parser.set_defaults(func=_compare)
+
+
+def _compare(args):
+    """Compare the request metrics in a report against a baseline."""
+    store = baseline.BaselineStore(
+        args.store or baseline.BaselineStore.default_path()
+    )
+    against = args.against
+    if against is None:
+        versions = store.versions(args.section)
+        if not versions:
+            sys.exit('No baselines are stored for section "{0}".'.format(
+                args.section
+            ))
+        against = versions[-1]
+    baseline_metrics = store.get(args.section, against)
+    if baseline_metrics is None:
+        sys.exit(
+            'No baseline is stored for section "{0}" and Pulp {1}.'.format(
+                args.section,
+                against,
+            )
+        )
+    rows = baseline.compare(
+        baseline_metrics,
+        baseline.read_metrics(args.report, args.section),
+        args.alpha,
+        args.threshold,
+    )
+    print('Compared against the baseline for Pulp {0}.\n'.format(against))
+    print(baseline.format_comparison(rows, args.changed_only))
+    sys.exit(baseline.regressed(rows))
+
+
+def _add_report_arguments(subparser):
+    """Add the arguments that name a report and a baseline to ``subparser``."""
+    subparser.add_argument(
+        'report',
+        help='a report written by "run --report", or a metrics.json file',
+    )
+    subparser.add_argument(
+        '--section',
+        default='default',
+        help='the configuration file section (default: %(default)s)',
+    )
+    subparser.add_argument(
+        '--store',
+        help='the baseline store (default: a file in the XDG data directory)',
+    )
+
+
+def _server_version(section):
+    """Return the version of Pulp running on the server for ``section``."""
+    with Client(ServerConfig.read(section), recorder=None) as client:
+        return utils.get_server_version(client)
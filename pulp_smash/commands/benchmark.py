@@ -0,0 +1,133 @@
+# coding=utf-8
+"""The ``benchmark`` command.
+
+See :mod:`pulp_smash.benchmarks.content_applicability`.
+
+"""
+from __future__ import print_function, unicode_literals
+
+import json
+from pulp_smash.api import Client
+from pulp_smash.benchmarks import content_applicability
+from pulp_smash.commands import print_progress
+from pulp_smash.config import get_config
+
+
+def add_parsers(subparsers):
+    """Add the ``benchmark`` command to ``subparsers``."""
+    _add_benchmark_parser(subparsers)
+
+
+def _add_benchmark_parser(subparsers):
+    """Add the ``benchmark`` command to ``subparsers``."""
+    benchmark_parser = subparsers.add_parser(
+        'benchmark',
+        help='measure how regenerating content applicability scales',
+        description=(
+            'On the server in the configuration file section named by '
+            '$PULP_SMASH_SECTION (default: "default"), create consumers, '
+            'repositories and errata, regenerate applicability, and time '
+            'it. Each of --consumers, --repositories '
+            'and --errata is swept in turn, while the others are held at '
+            'their base values. Report every measurement, and how fast the '
+            'time grows with each swept dimension.'
+        ),
+    )
+    for dimension, label, base in (
+            ('consumers', 'consumers', 100),
+            ('repositories', 'repositories', 10),
+            ('errata', 'errata per repository', 10)):
+        benchmark_parser.add_argument(
+            '--' + dimension,
+            help='numbers of {0} to sweep through'.format(label),
+            metavar='N',
+            nargs='+',
+            type=int,
+        )
+        benchmark_parser.add_argument(
+            '--base-' + dimension,
+            default=base,
+            help=(
+                'the number of {0} while another dimension is swept '
+                '(default: %(default)s)'.format(label)
+            ),
+            metavar='N',
+            type=int,
+        )
+    benchmark_parser.add_argument(
+        '--bindings',
+        default=1,
+        help=(
+            'how many repositories each consumer is bound to (default: '
+            '%(default)s)'
+        ),
+        type=int,
+    )
+    benchmark_parser.add_argument(
+        '--packages',
+        default=100,
+        help=(
+            'how many packages each consumer\'s profile lists (default: '
+            '%(default)s)'
+        ),
+        type=int,
+    )
+    benchmark_parser.add_argument(
+        '--prefix',
+        default='bench',
+        help=(
+            'the prefix of the IDs of every resource created (default: '
+            '%(default)s)'
+        ),
+    )
+    benchmark_parser.add_argument(
+        '--concurrency',
+        default=10,
+        help=(
+            'how many requests may be in flight at once while creating '
+            'resources (default: %(default)s)'
+        ),
+        type=int,
+    )
+    benchmark_parser.add_argument(
+        '--csv',
+        help='a file to write the measurements to, as CSV',
+    )
+    benchmark_parser.add_argument(
+        '--json',
+        action='store_true',
+        help='print the report as JSON',
+    )
+    benchmark_parser.set_defaults(func=_benchmark)
+
+
+def _benchmark(args):
+    """Measure how regenerating applicability scales, and print a report."""
+    base = {
+        'consumers': args.base_consumers,
+        'repositories': args.base_repositories,
+        'errata': args.base_errata,
+    }
+    dimensions = {
+        dimension: getattr(args, dimension)
+        for dimension in content_applicability.DIMENSIONS
+        if getattr(args, dimension)
+    }
+    with Client(get_config(), pool_size=args.concurrency) as client:
+        report = content_applicability.sweep(
+            client,
+            base,
+            dimensions,
+            args.prefix,
+            args.bindings,
+            args.packages,
+            args.concurrency,
+            progress=print_progress,
+        )
+    if args.csv:
+        with open(args.csv, 'w') as handle:
+            handle.write(content_applicability.format_csv(report))
+    if args.json:
+        print(json.dumps(report, indent=2, sort_keys=True))
+    else:
+        print(content_applicability.format_report(report))
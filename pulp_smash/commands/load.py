@@ -0,0 +1,160 @@
+# coding=utf-8
+"""The ``load`` and ``probe`` commands. See :mod:`pulp_smash.load`."""
+from __future__ import division, print_function, unicode_literals
+
+import json
+from pulp_smash import load, stats
+from pulp_smash.api import Client
+from pulp_smash.commands import fraction, positive_float, positive_int
+from pulp_smash.config import get_config
+
+
+def add_parsers(subparsers):
+    """Add the ``load`` and ``probe`` commands to ``subparsers``."""
+    _add_load_parser(subparsers)
+    _add_probe_parser(subparsers)
+
+
+def _add_load_parser(subparsers):
+    """Add the ``load`` command to ``subparsers``."""
+    load_parser = subparsers.add_parser(
+        'load',
+        help='generate load against a server',
+        description=(
+            'Repeatedly call an endpoint on the server in the configuration '
+            'file section named by $PULP_SMASH_SECTION (default: "default"), '
+            'and report throughput, error rate and latency percentiles.'
+        ),
+    )
+    load_parser.add_argument(
+        'endpoint',
+        choices=sorted(load.ENDPOINTS),
+        help='the endpoint to call',
+    )
+    load_parser.add_argument(
+        '--duration',
+        default=10,
+        help='how many seconds to generate load for (default: %(default)s)',
+        type=positive_float,
+    )
+    load_parser.add_argument(
+        '--concurrency',
+        help=(
+            'how many requests may be in flight at once (default: 1, or 10 if '
+            '--rate is given)'
+        ),
+        type=positive_int,
+    )
+    load_parser.add_argument(
+        '--rate',
+        help='how many requests to send per second (default: unlimited)',
+        type=positive_float,
+    )
+    load_parser.add_argument(
+        '--json',
+        action='store_true',
+        help='print the report as JSON',
+    )
+    load_parser.set_defaults(func=_load)
+
+
+def _load(args):
+    """Generate load against a server, and print a report."""
+    concurrency = args.concurrency
+    if concurrency is None:
+        concurrency = 10 if args.rate is not None else 1
+    with Client(get_config(), pool_size=concurrency) as client:
+        report = load.generate_load(
+            client,
+            load.ENDPOINTS[args.endpoint],
+            args.duration,
+            concurrency,
+            args.rate,
+        )
+    summary = report.summary()
+    if args.json:
+        print(json.dumps(summary, indent=2, sort_keys=True))
+    else:
+        print(load.format_summary(summary))
+
+
+def _add_probe_parser(subparsers):
+    """Add the ``probe`` command to ``subparsers``."""
+    probe_parser = subparsers.add_parser(
+        'probe',
+        help='find the highest request rate that a server can sustain',
+        description=(
+            'Call an endpoint on the server in the configuration file '
+            'section named by $PULP_SMASH_SECTION (default: "default"), in '
+            'steps of increasing concurrency. '
+            'Concurrency is raised by one after each step that meets the '
+            'SLO, and halved after each step that does not. Report the '
+            'latency and throughput of each step, and the highest throughput '
+            'that met the SLO.'
+        ),
+    )
+    probe_parser.add_argument(
+        'endpoint',
+        choices=sorted(load.ENDPOINTS),
+        help='the endpoint to call',
+    )
+    probe_parser.add_argument(
+        '--percentile',
+        choices=stats.PERCENTILES,
+        default=95,
+        help=(
+            'the latency percentile that the SLO limits (default: '
+            '%(default)s)'
+        ),
+        type=int,
+    )
+    probe_parser.add_argument(
+        '--latency',
+        default=500,
+        help=(
+            'the number of milliseconds that the latency percentile may not '
+            'exceed (default: %(default)s)'
+        ),
+        type=positive_float,
+    )
+    probe_parser.add_argument(
+        '--error-rate',
+        default=0.01,
+        help='the fraction of requests that may fail (default: %(default)s)',
+        type=fraction,
+    )
+    probe_parser.add_argument(
+        '--step-duration',
+        default=5,
+        help='how many seconds each step lasts (default: %(default)s)',
+        type=positive_float,
+    )
+    probe_parser.add_argument(
+        '--max-concurrency',
+        default=64,
+        help='the highest concurrency to try (default: %(default)s)',
+        type=positive_int,
+    )
+    probe_parser.add_argument(
+        '--json',
+        action='store_true',
+        help='print the report as JSON',
+    )
+    probe_parser.set_defaults(func=_probe)
+
+
+def _probe(args):
+    """Find the highest request rate that a server sustains within an SLO."""
+    slo = load.SLO(args.percentile, args.latency / 1000, args.error_rate)
+    with Client(get_config(), pool_size=args.max_concurrency) as client:
+        report = load.probe(
+            client,
+            load.ENDPOINTS[args.endpoint],
+            slo,
+            args.step_duration,
+            args.max_concurrency,
+        )
+    if args.json:
+        print(json.dumps(report._asdict(), indent=2, sort_keys=True))
+    else:
+        print(load.format_probe_report(report))
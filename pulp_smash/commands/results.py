@@ -0,0 +1,43 @@
+# coding=utf-8
+"""The ``junit`` command. See :mod:`pulp_smash.results`."""
+from __future__ import unicode_literals
+
+import sys
+from pulp_smash import results
+
+
+def add_parsers(subparsers):
+    """Add the ``junit`` command to ``subparsers``."""
+    _add_junit_parser(subparsers)
+
+
+def _add_junit_parser(subparsers):
+    """Add the ``junit`` command to ``subparsers``."""
+    junit_parser = subparsers.add_parser(
+        'junit',
+        help='convert a results file to JUnit XML',
+        description=(
+            'Convert a results file, as written by the --results option of '
+            'the run command, to JUnit XML. The file may be from a run that '
+            'is still in progress, or that crashed.'
+        ),
+    )
+    junit_parser.add_argument('results', help='the path to a results file')
+    junit_parser.add_argument(
+        '--output',
+        help='a file to write the XML to (default: standard output)',
+        metavar='FILE',
+    )
+    junit_parser.set_defaults(func=_junit)
+
+
+def _junit(args):
+    """Convert a results file to JUnit XML."""
+    if args.output:
+        with open(args.output, 'wb') as handle:
+            results.write_junit(args.results, handle)
+    else:
+        results.write_junit(
+            args.results,
+            getattr(sys.stdout, 'buffer', sys.stdout),
+        )
@@ -0,0 +1,127 @@
+# coding=utf-8
+"""The ``run`` command. See :mod:`pulp_smash.runner`."""
+from __future__ import print_function, unicode_literals
+
+import json
+import sys
+from pulp_smash import incremental, runner, sharding
+from pulp_smash.commands import positive_int
+from pulp_smash.config import ServerConfig
+
+
+def add_parsers(subparsers):
+    """Add the ``run`` command to ``subparsers``."""
+    _add_run_parser(subparsers)
+
+
+def _add_run_parser(subparsers):
+    """Add the ``run`` command to ``subparsers``."""
+    run_parser = subparsers.add_parser(
+        'run',
+        help='run the test suite against several servers at once',
+        description=(
+            'Run the test suite against each of several configuration file '
+            'sections, with one or more worker processes per section, and '
+            'report the results from every section. The time taken by each '
+            'test class is recorded, so that later runs can split the tests '
+            'into shards of equal duration.'
+        ),
+    )
+    run_parser.add_argument(
+        'names',
+        help=(
+            'dotted names of test packages, modules or classes to run '
+            '(default: all of pulp_smash.tests)'
+        ),
+        nargs='*',
+    )
+    run_parser.add_argument(
+        '--section',
+        action='append',
+        help=(
+            'a configuration file section to test against; may be given '
+            'several times (default: every section)'
+        ),
+    )
+    run_parser.add_argument(
+        '--shards',
+        default=1,
+        help=(
+            'how many worker processes to split the tests for each section '
+            'across, balanced by the durations of earlier runs (default: '
+            '%(default)s)'
+        ),
+        type=positive_int,
+    )
+    run_parser.add_argument(
+        '--processes',
+        help=(
+            'how many worker processes to use at once (default: one per '
+            'section per shard)'
+        ),
+        type=positive_int,
+    )
+    run_parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help=(
+            'skip test classes that passed on an earlier run, if neither '
+            'their module, their configuration section nor the server has '
+            'changed since'
+        ),
+    )
+    run_parser.add_argument(
+        '--force',
+        action='store_true',
+        help=(
+            'with --incremental, run every test class anyway, and record the '
+            'results'
+        ),
+    )
+    run_parser.add_argument(
+        '--report',
+        help='a file to write a JSON report to',
+    )
+    run_parser.add_argument(
+        '--profile',
+        help=(
+            'profile each test class, write its profile files to this '
+            'directory, and summarize the slowest classes and functions'
+        ),
+        metavar='DIR',
+    )
+    run_parser.add_argument(
+        '--results',
+        help=(
+            'a file to append each test outcome to as a line of JSON, as soon '
+            'as the test finishes; see the junit command'
+        ),
+        metavar='FILE',
+    )
+    run_parser.set_defaults(func=_run)
+
+
+def _run(args):
+    """Run the test suite against several servers at once, and report."""
+    sections = args.section or ServerConfig.sections()
+    passes = None
+    if args.incremental:
+        passes = incremental.PassCache(incremental.PassCache.default_path())
+    report = runner.run(
+        sections,
+        args.names,
+        args.processes,
+        args.shards,
+        sharding.Timings(sharding.Timings.default_path()),
+        passes,
+        args.force,
+        args.profile,
+        args.results,
+    )
+    if args.report:
+        with open(args.report, 'w') as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+    print(runner.format_report(report))
+    sys.exit(not runner.was_successful(
+        runner.summarize(runner.iter_tests(report))
+    ))
@@ -0,0 +1,76 @@
+# coding=utf-8
+"""The ``seed`` command. See :mod:`pulp_smash.seed`."""
+from __future__ import unicode_literals
+
+from os.path import join
+from xdg import BaseDirectory
+from pulp_smash import seed
+from pulp_smash.api import Client
+from pulp_smash.commands import print_progress
+from pulp_smash.config import get_config
+
+
+def add_parsers(subparsers):
+    """Add the ``seed`` command to ``subparsers``."""
+    _add_seed_parser(subparsers)
+
+
+def _add_seed_parser(subparsers):
+    """Add the ``seed`` command to ``subparsers``."""
+    seed_parser = subparsers.add_parser(
+        'seed',
+        help='fill a server with data for scale tests',
+        description=(
+            'Create the repositories, consumers, bindings and profiles '
+            'described by a JSON spec on the server in the configuration '
+            'file section named by $PULP_SMASH_SECTION (default: "default"). '
+            'An interrupted run resumes where it '
+            'left off. See pulp_smash.seed for the spec format.'
+        ),
+    )
+    seed_parser.add_argument('spec', help='the path to a JSON spec')
+    seed_parser.add_argument(
+        '--concurrency',
+        default=10,
+        help=(
+            'how many requests may be in flight at once (default: '
+            '%(default)s)'
+        ),
+        type=int,
+    )
+    seed_parser.add_argument(
+        '--journal',
+        help=(
+            'the file in which to record progress (default: a file in the '
+            'XDG cache directory, named after the spec\'s prefix)'
+        ),
+    )
+    seed_parser.add_argument(
+        '--teardown',
+        action='store_true',
+        help='delete the resources described by the spec, instead',
+    )
+    seed_parser.set_defaults(func=_seed)
+
+
+def _seed(args):
+    """Create or delete the resources described by a seeding spec."""
+    spec = seed.load_spec(args.spec)
+    journal = args.journal
+    if journal is None:
+        journal = join(
+            BaseDirectory.save_cache_path('pulp_smash'),
+            'seed-{}.journal'.format(spec['prefix']),
+        )
+    with Client(get_config(), pool_size=args.concurrency) as client:
+        seeder = seed.Seeder(
+            client,
+            spec,
+            journal,
+            args.concurrency,
+            print_progress,
+        )
+        if args.teardown:
+            seeder.teardown()
+        else:
+            seeder.seed()
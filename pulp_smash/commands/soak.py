@@ -0,0 +1,156 @@
+# coding=utf-8
+"""The ``soak`` command. See :mod:`pulp_smash.soak`."""
+from __future__ import print_function, unicode_literals
+
+import json
+import sys
+from pulp_smash import load, metrics, soak
+from pulp_smash.api import Client
+from pulp_smash.commands import positive_float, positive_int
+from pulp_smash.config import get_config
+
+
+def add_parsers(subparsers):
+    """Add the ``soak`` command to ``subparsers``."""
+    _add_soak_parser(subparsers)
+
+
+def _add_soak_parser(subparsers):
+    """Add the ``soak`` command to ``subparsers``."""
+    soak_parser = subparsers.add_parser(
+        'soak',
+        help='run a workload for a long time, and watch for drift',
+        description=(
+            'Repeatedly send a mix of requests, or run test classes, against '
+            'the server in the configuration file section named by '
+            '$PULP_SMASH_SECTION (default: "default"). '
+            'Report latency percentiles, and optionally the memory used by a '
+            'server process on this host, for each window of time. Flag any '
+            'series that grows across windows, according to a Mann-Kendall '
+            'trend test, and exit with a non-zero status if one does.'
+        ),
+    )
+    soak_parser.add_argument(
+        '--endpoint',
+        action='append',
+        choices=sorted(load.ENDPOINTS),
+        help=(
+            'an endpoint to include in the request mix; may be given several '
+            'times (default: every endpoint)'
+        ),
+    )
+    soak_parser.add_argument(
+        '--tests',
+        help=(
+            'dotted names of test packages, modules or classes to run in a '
+            'loop, instead of sending a mix of requests'
+        ),
+        metavar='NAME',
+        nargs='+',
+    )
+    soak_parser.add_argument(
+        '--duration',
+        default=3600,
+        help='how many seconds to run for (default: %(default)s)',
+        type=positive_float,
+    )
+    soak_parser.add_argument(
+        '--window',
+        default=60,
+        help='how many seconds each window lasts (default: %(default)s)',
+        type=positive_float,
+    )
+    soak_parser.add_argument(
+        '--concurrency',
+        default=1,
+        help=(
+            'how many requests may be in flight at once; test classes are '
+            'always run one at a time (default: %(default)s)'
+        ),
+        type=positive_int,
+    )
+    soak_parser.add_argument(
+        '--process',
+        help=(
+            'the name of a server process on this host, such as httpd, whose '
+            'memory to sample at the end of each window'
+        ),
+        metavar='NAME',
+    )
+    soak_parser.add_argument(
+        '--alpha',
+        default=soak.ALPHA,
+        help=(
+            'the p-value below which a rising series is flagged (default: '
+            '%(default)s)'
+        ),
+        type=float,
+    )
+    soak_parser.add_argument(
+        '--csv',
+        help='a file to write each window to, as it ends',
+        metavar='FILE',
+    )
+    soak_parser.add_argument(
+        '--json',
+        action='store_true',
+        help='print the report as JSON',
+    )
+    soak_parser.set_defaults(func=_soak)
+
+
+def _soak(args):
+    """Run a workload for a long time, and report any drift."""
+    if args.tests:
+        recorder = metrics.RECORDER
+        step = soak.class_loop(args.tests)
+        client = None
+    else:
+        recorder = metrics.Recorder()
+        client = Client(
+            get_config(),
+            pool_size=args.concurrency,
+            recorder=recorder,
+        )
+        step = soak.request_mix(
+            client,
+            (load.ENDPOINTS[name] for name in args.endpoint or load.ENDPOINTS),
+        )
+    handle = writer = None
+    if args.csv:
+        handle = open(args.csv, 'w')
+        writer = soak.csv_writer(handle)
+
+    def on_window(row):
+        """Print and write out a window as soon as it ends."""
+        if not args.json:
+            print(soak.format_window(row))
+            sys.stdout.flush()
+        if writer is not None:
+            writer.writerow(row)
+            handle.flush()
+
+    if not args.json:
+        print(soak.WINDOW_HEADER)
+    try:
+        report = soak.soak(
+            recorder,
+            step,
+            args.duration,
+            args.window,
+            1 if args.tests else args.concurrency,
+            args.process,
+            args.alpha,
+            on_window,
+        )
+    finally:
+        if handle is not None:
+            handle.close()
+        if client is not None:
+            client.close()
+    if args.json:
+        print(json.dumps(report, indent=2, sort_keys=True))
+    else:
+        print('')
+        print(soak.format_trends(report))
+    sys.exit(bool(report['drifting']))
@@ -0,0 +1,85 @@
+# coding=utf-8
+"""The ``stub`` command. See :mod:`pulp_smash.stub`."""
+from __future__ import print_function, unicode_literals
+
+import json
+import sys
+import time
+from os.path import dirname, join
+import unittest2
+from pulp_smash import api, config, stub
+
+
+def add_parsers(subparsers):
+    """Add the ``stub`` command to ``subparsers``."""
+    _add_stub_parser(subparsers)
+
+
+def _add_stub_parser(subparsers):
+    """Add the ``stub`` command to ``subparsers``."""
+    stub_parser = subparsers.add_parser(
+        'stub',
+        help='start a stub Pulp server',
+        description=(
+            'Start a stub Pulp server, which implements the endpoints that '
+            'the test suite uses. By default, print a configuration file that '
+            'targets the stub server, and serve requests until interrupted.'
+        ),
+    )
+    stub_parser.add_argument(
+        '--host',
+        default='127.0.0.1',
+        help='the address to listen on (default: %(default)s)',
+    )
+    stub_parser.add_argument(
+        '--port',
+        default=0,
+        help='the port to listen on (default: any free port)',
+        type=int,
+    )
+    stub_parser.add_argument(
+        '--latency',
+        default=0,
+        help='how many seconds to delay each response (default: %(default)s)',
+        type=float,
+    )
+    stub_parser.add_argument(
+        '--auth',
+        default='admin:admin',
+        help='the credentials to accept (default: %(default)s)',
+    )
+    stub_parser.add_argument(
+        '--test',
+        action='store_true',
+        help='run the test suite against the stub server, and then exit',
+    )
+    stub_parser.set_defaults(func=_stub)
+
+
+def _stub(args):
+    """Start a stub Pulp server, and maybe run the test suite against it."""
+    server = stub.StubServer(
+        auth=args.auth.split(':', 1),
+        latency=args.latency,
+        host=args.host,
+        port=args.port,
+    )
+    with server:
+        if args.test:
+            # Point `get_config` and `get_client` at the stub server.
+            config.reset(server.server_config())
+            api.reset_client()
+            tests_dir = join(dirname(dirname(__file__)), 'tests')
+            suite = unittest2.defaultTestLoader.discover(
+                tests_dir,
+                top_level_dir=dirname(dirname(tests_dir)),
+            )
+            result = unittest2.TextTestRunner().run(suite)
+            sys.exit(not result.wasSuccessful())
+        print(json.dumps({'default': server.server_config()}, indent=4))
+        sys.stdout.flush()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,88 @@
+# coding=utf-8
+"""The ``upload`` command. See :mod:`pulp_smash.upload`."""
+from __future__ import division, print_function, unicode_literals
+
+import json
+import sys
+from pulp_smash import upload
+from pulp_smash.api import Client
+from pulp_smash.commands import positive_int
+from pulp_smash.config import get_config
+
+
+def add_parsers(subparsers):
+    """Add the ``upload`` command to ``subparsers``."""
+    _add_upload_parser(subparsers)
+
+
+def _add_upload_parser(subparsers):
+    """Add the ``upload`` command to ``subparsers``."""
+    upload_parser = subparsers.add_parser(
+        'upload',
+        help='upload files into a repository, and time it',
+        description=(
+            'Upload files, one after another, to the server in the '
+            'configuration file section named by $PULP_SMASH_SECTION '
+            '(default: "default"), and import them into a '
+            'repository. Each file is sent in chunks, several at once. Print '
+            'the throughput for each file, and overall.'
+        ),
+    )
+    upload_parser.add_argument('repo_id', help='the repository to import into')
+    upload_parser.add_argument('files', help='the files to upload', nargs='+')
+    upload_parser.add_argument(
+        '--type',
+        default='iso',
+        help='the type of unit to import (default: %(default)s)',
+    )
+    upload_parser.add_argument(
+        '--chunk-size',
+        default=upload.CHUNK_SIZE // (1024 * 1024),
+        help='the size of each chunk, in MiB (default: %(default)s)',
+        type=positive_int,
+    )
+    upload_parser.add_argument(
+        '--concurrency',
+        default=4,
+        help=(
+            'how many chunks may be in flight at once (default: '
+            '%(default)s)'
+        ),
+        type=positive_int,
+    )
+    upload_parser.add_argument(
+        '--json',
+        action='store_true',
+        help='print the report as JSON',
+    )
+    upload_parser.set_defaults(func=_upload)
+
+
+def _upload(args):
+    """Upload files into a repository, and print how fast it went."""
+    with Client(get_config(), pool_size=args.concurrency) as client:
+        report = upload.upload_files(
+            client,
+            args.repo_id,
+            args.files,
+            args.type,
+            args.chunk_size * 1024 * 1024,
+            args.concurrency,
+            progress=_print_upload_progress,
+        )
+    if args.json:
+        print(json.dumps(report, indent=2, sort_keys=True))
+    else:
+        print(upload.format_report(report))
+
+
+def _print_upload_progress(path, sent, size):
+    """Print how much of a file has been sent, overwriting the last line."""
+    sys.stderr.write('\r{0}: {1:.1f}/{2:.1f}MB'.format(
+        path,
+        sent / 10 ** 6,
+        size / 10 ** 6,
+    ))
+    if sent == size:
+        sys.stderr.write('\n')
+    sys.stderr.flush()
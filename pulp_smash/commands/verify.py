@@ -0,0 +1,91 @@
+# coding=utf-8
+"""The ``verify`` command. See :mod:`pulp_smash.verify`."""
+from __future__ import print_function, unicode_literals
+
+import sys
+from os.path import join
+from pulp_smash import verify
+from pulp_smash.api import Client
+from pulp_smash.commands import positive_int
+from pulp_smash.config import get_config
+
+
+def add_parsers(subparsers):
+    """Add the ``verify`` command to ``subparsers``."""
+    _add_verify_parser(subparsers)
+
+
+def _add_verify_parser(subparsers):
+    """Add the ``verify`` command to ``subparsers``."""
+    verify_parser = subparsers.add_parser(
+        'verify',
+        help='check published files against their expected checksums',
+        description=(
+            'Hash each file in a published tree, several files at once, and '
+            'print each file that is missing or does not match its expected '
+            'size or checksum. Expected checksums are read from a '
+            'PULP_MANIFEST file, or from the units in a repository on the '
+            'server in the configuration file section named by '
+            '$PULP_SMASH_SECTION (default: "default"). Exit '
+            'with a non-zero status if any file does not match.'
+        ),
+    )
+    verify_parser.add_argument(
+        'root',
+        help='the directory that expected paths are relative to',
+    )
+    source = verify_parser.add_mutually_exclusive_group()
+    source.add_argument(
+        '--manifest',
+        help='a PULP_MANIFEST file (default: ROOT/PULP_MANIFEST)',
+    )
+    source.add_argument(
+        '--repo-id',
+        help='a repository whose units to read checksums from',
+    )
+    verify_parser.add_argument(
+        '--type',
+        default=['iso'],
+        help=(
+            'the types of unit to read checksums from, with --repo-id '
+            '(default: iso)'
+        ),
+        nargs='+',
+    )
+    verify_parser.add_argument(
+        '--processes',
+        help='how many files may be hashed at once (default: one per CPU)',
+        type=positive_int,
+    )
+    verify_parser.set_defaults(func=_verify)
+
+
+def _verify(args):
+    """Check published files against their expected checksums."""
+    if args.repo_id:
+        with Client(get_config()) as client:
+            mismatches = _print_mismatches(
+                args.root,
+                verify.fetch_expected(client, args.repo_id, args.type),
+                args.processes,
+            )
+    else:
+        mismatches = _print_mismatches(
+            args.root,
+            verify.read_manifest(
+                args.manifest or join(args.root, 'PULP_MANIFEST')
+            ),
+            args.processes,
+        )
+    print('{0} mismatches found.'.format(mismatches))
+    sys.exit(mismatches > 0)
+
+
+def _print_mismatches(root, expected, processes):
+    """Print each mismatch in a tree as it is found, and count them."""
+    mismatches = 0
+    for mismatch in verify.verify(root, expected, processes):
+        print(verify.format_mismatch(mismatch))
+        sys.stdout.flush()
+        mismatches += 1
+    return mismatches
@@ -10,6 +10,7 @@ information.
 """
 from __future__ import unicode_literals
 
+import os
 from pulp_smash.config.base import ConfigSection
 from pulp_smash.config.mixins import AuthMixin
 
@@ -20,12 +21,25 @@ from pulp_smash.config.mixins import AuthMixin
 _CONFIG = None
 
 
+def get_section():
+    """Return the name of the configuration file section to test against.
+
+    This is the value of the ``PULP_SMASH_SECTION`` environment variable, or
+    "default" if that variable is unset or empty.
+
+    :returns: A string.
+
+    """
+    return os.environ.get('PULP_SMASH_SECTION') or 'default'
+
+
 def get_config():
     """Return a copy of the global ``ServerConfig`` object.
 
     This method makes use of a cache. If the cache is empty, the configuration
-    file is parsed and the cache is populated. Otherwise, a copy of the cached
-    configuration object is returned.
+    file is parsed, the section named by :func:`get_section` is read, and the
+    cache is populated. Otherwise, a copy of the cached configuration object is
+    returned.
 
     :returns: A copy of the global ``ServerConfig`` object.
     :rtype: pulp_smash.config.ServerConfig
@@ -33,8 +47,24 @@ def get_config():
     """
     global _CONFIG  # pylint:disable=global-statement
     if _CONFIG is None:
-        _CONFIG = ServerConfig.read()
-    return ServerConfig(**_CONFIG.copy())
+        _CONFIG = ServerConfig.read(get_section())
+    return ServerConfig(**_CONFIG)
+
+
+def reset(server_config=None):
+    """Empty or replace the cache used by :func:`get_config`.
+
+    Call this after changing the ``PULP_SMASH_SECTION`` environment variable,
+    so that the next call to :func:`get_config` reads the new section.
+
+    :param server_config: A :class:`pulp_smash.config.ServerConfig`. If given,
+        :func:`get_config` returns copies of it instead of reading the
+        configuration file.
+    :returns: Nothing.
+
+    """
+    global _CONFIG  # pylint:disable=global-statement
+    _CONFIG = server_config
 
 
 class ServerConfig(AuthMixin, ConfigSection):
@@ -23,10 +23,27 @@ start by reading up on :class:`ConfigSection`.
 """
 from __future__ import unicode_literals
 
+import copy
 import json
+import os
+from contextlib import contextmanager
 from os.path import isfile, join
 from threading import Lock
 from xdg import BaseDirectory
+from pulp_smash.utils import locked_file, write_atomically
+
+
+# `_get_config_file_path` uses this as a cache. It maps (xdg_config_dir,
+# xdg_config_file) tuples to paths.
+_CONFIG_FILE_PATHS = {}
+
+# `_read_config_file` uses this as a cache. It maps paths to (fingerprint,
+# config) tuples, where `fingerprint` is returned by `_fingerprint` and
+# `config` is the parsed file.
+_CONFIG_FILES = {}
+
+# Used to lock access to the caches above.
+_CACHE_LOCK = Lock()
 
 
 class ConfigFileNotFoundError(Exception):
@@ -41,6 +58,12 @@ def _get_config_file_path(xdg_config_dir, xdg_config_file):
     that by the time client code attempts to open the file, it may be gone or
     otherwise inaccessible.
 
+    This function makes use of a cache. If a path has already been found, and
+    if a file still exists at that path, the path is returned without
+    searching. As a result, a configuration file created in a higher-priority
+    directory after the first search is not noticed until the cached file goes
+    away.
+
     :param xdg_config_dir: A string. The name of the directory that is suffixed
         to the end of each of the ``XDG_CONFIG_DIRS`` paths.
     :param xdg_config_file: A string. The name of the configuration file that
@@ -50,9 +73,14 @@ def _get_config_file_path(xdg_config_dir, xdg_config_file):
         configuration file cannot be found.
 
     """
+    key = (xdg_config_dir, xdg_config_file)
+    path = _CONFIG_FILE_PATHS.get(key)
+    if path is not None and isfile(path):
+        return path
     for config_dir in BaseDirectory.load_config_paths(xdg_config_dir):
         path = join(config_dir, xdg_config_file)
         if isfile(path):
+            _CONFIG_FILE_PATHS[key] = path
             return path
     raise ConfigFileNotFoundError(
         'No configuration files could be located after searching for a file '
@@ -61,6 +89,50 @@ def _get_config_file_path(xdg_config_dir, xdg_config_file):
     )
 
 
+def _fingerprint(path):
+    """Return a value that changes whenever the file at ``path`` changes.
+
+    The file's device, inode, size and modification time are used. Replacing
+    the file (e.g. by renaming another file over it) changes its inode, and
+    modifying it in place changes its modification time and usually its size.
+
+    :raises: ``OSError`` if the file cannot be stat'd.
+
+    """
+    stat = os.stat(path)
+    mtime = getattr(stat, 'st_mtime_ns', stat.st_mtime)  # Python 2
+    return (stat.st_dev, stat.st_ino, stat.st_size, mtime)
+
+
+def _read_config_file(path):
+    """Read and parse a configuration file, and return its contents.
+
+    This function makes use of a cache. A file is parsed only if it has not
+    been parsed before or if it has changed since it was last parsed, as judged
+    by :func:`_fingerprint`. Callers must not modify the returned object.
+
+    :param path: A string. The configuration file to read.
+    :returns: A dict mapping section names to sections.
+
+    """
+    fingerprint = _fingerprint(path)
+    with _CACHE_LOCK:
+        cached = _CONFIG_FILES.get(path)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+    with open(path) as config_file:
+        config = json.load(config_file)
+    with _CACHE_LOCK:
+        _CONFIG_FILES[path] = (fingerprint, config)
+    return config
+
+
+def _forget_config_file(path):
+    """Drop ``path`` from the cache used by :func:`_read_config_file`."""
+    with _CACHE_LOCK:
+        _CONFIG_FILES.pop(path, None)
+
+
 class ConfigSection(dict):
     """A dict-like object with methods for manipulating configuration files.
 
@@ -121,7 +193,7 @@ class ConfigSection(dict):
     def save(self, section='default', path=None, data=None):
         """Save ``self`` as a top-level section of a configuration file.
 
-        This method is thread safe, but not process safe.
+        This method is thread safe and process safe. See :meth:`save_sections`.
 
         Beware that this method serializes the contents of the current object
         to JSON. If any data cannot be serialized to JSON, an exception is
@@ -138,34 +210,54 @@ class ConfigSection(dict):
         :returns: Nothing.
 
         """
-        # What will we write out? What file is receiving this data?
         if data is None:
             data = self.copy()
+        self.save_sections({section: data}, path=path)
+
+    @classmethod
+    def save_sections(cls, sections=None, deleted=(), path=None):
+        """Replace and delete several top-level sections of a configuration
+        file in a single rewrite.
+
+        This method is thread safe and process safe. The configuration file is
+        locked with ``flock(2)`` (where available) while it is read, modified
+        and written out, and the new contents are written to a temporary file
+        that is then renamed over the configuration file. Thus, concurrent
+        writers do not clobber each other's changes, and readers never see a
+        partially written file.
+
+        :param sections: A dict mapping section names to sections. Each
+            section is saved, replacing any existing section of the same name.
+        :param deleted: An iterable of section names. Each section is deleted.
+        :param path: A string. The configuration file to be manipulated. If the
+            destination file does not exist, it is created. If no path is
+            provided, an XDG-compliant path is generated.
+        :returns: Nothing.
+        :raises: ``KeyError`` if a section to be deleted does not exist. If so,
+            the configuration file is not changed.
+
+        """
         if path is None:
             path = join(
-                BaseDirectory.save_config_path(self._xdg_config_dir),
-                self._xdg_config_file
+                BaseDirectory.save_config_path(cls._xdg_config_dir),
+                cls._xdg_config_file
             )
-
-        # Lock, write out `data` and unlock.
-        self._file_lock.acquire()
-        try:
+        with cls._locked(path):
             try:
                 with open(path) as config_file:
                     config = json.load(config_file)
             except IOError:
                 config = {}
-            config[section] = data
-            with open(path, 'w') as config_file:
-                json.dump(config, config_file)
-        finally:
-            self._file_lock.release()
+            for section in deleted:
+                del config[section]
+            config.update(sections or {})
+            write_atomically(path, json.dumps(config))
 
     @classmethod
     def delete(cls, section='default', path=None):
         """Delete a top-level section from a configuration file.
 
-        This method is thread safe.
+        This method is thread safe and process safe. See :meth:`save_sections`.
 
         :param section: A string. The section to be deleted.
         :param path: A string. The configuration file to be manipulated.
@@ -179,20 +271,30 @@ class ConfigSection(dict):
                 cls._xdg_config_dir,
                 cls._xdg_config_file
             )
-        cls._file_lock.acquire()
-        try:
-            with open(path) as config_file:
-                config = json.load(config_file)
-            del config[section]
-            with open(path, 'w') as config_file:
-                json.dump(config, config_file)
-        finally:
-            cls._file_lock.release()
+        cls.save_sections(deleted=(section,), path=path)
+
+    @classmethod
+    @contextmanager
+    def _locked(cls, path):
+        """Lock the configuration file at ``path`` against other threads and
+        processes.
+
+        A separate lock file is used, because the configuration file itself is
+        replaced each time it is written.
+
+        """
+        with locked_file(path, cls._file_lock):
+            try:
+                yield
+            finally:
+                _forget_config_file(path)
 
     @classmethod
     def sections(cls, path=None):
         """Read a configuration file and return its top-level sections.
 
+        The file is parsed only if it has changed since it was last parsed.
+
         :param path: A string. The configuration file to be manipulated.
             Defaults to what is returned by
             :func:`pulp_smash.config.base._get_config_file_path`.
@@ -205,14 +307,15 @@ class ConfigSection(dict):
                 cls._xdg_config_dir,
                 cls._xdg_config_file
             )
-        with open(path) as config_file:
-            # keys() returns a list in Python 2 and a view in Python 3.
-            return tuple(json.load(config_file).keys())
+        # keys() returns a list in Python 2 and a view in Python 3.
+        return tuple(_read_config_file(path).keys())
 
     @classmethod
     def read(cls, section='default', path=None):
         """Read a section from a configuration file.
 
+        The file is parsed only if it has changed since it was last parsed.
+
         :param section: A string. The name of the section to read.
         :param path: A string. The configuration file to be manipulated.
             Defaults to what is returned by
@@ -227,5 +330,4 @@ class ConfigSection(dict):
                 cls._xdg_config_dir,
                 cls._xdg_config_file
             )
-        with open(path) as config_file:
-            return cls(**json.load(config_file)[section])
+        return cls(**copy.deepcopy(_read_config_file(path)[section]))
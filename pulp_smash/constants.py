@@ -0,0 +1,38 @@
+# coding=utf-8
+"""Values that are used throughout Pulp Smash, such as API paths."""
+from __future__ import unicode_literals
+
+
+CALL_REPORT_KEYS = frozenset(('error', 'result', 'spawned_tasks'))
+"""The keys that a call report should have."""
+
+CONSUMER_APPLICABILITY_PATH = (
+    '/pulp/api/v2/consumers/actions/content/regenerate_applicability/'
+)
+"""The path at which applicability for consumers may be regenerated."""
+
+CONSUMER_PATH = '/pulp/api/v2/consumers/'
+"""The path at which consumers may be created and listed."""
+
+CONTENT_UPLOAD_PATH = '/pulp/api/v2/content/uploads/'
+"""The path at which upload requests may be created."""
+
+LOGIN_KEYS = frozenset(('certificate', 'key'))
+"""The keys that a response from :data:`LOGIN_PATH` should have."""
+
+LOGIN_PATH = '/pulp/api/v2/actions/login/'
+"""The path at which a user may log in."""
+
+REPO_APPLICABILITY_PATH = (
+    '/pulp/api/v2/repositories/actions/content/regenerate_applicability/'
+)
+"""The path at which applicability for repositories may be regenerated."""
+
+REPOSITORY_PATH = '/pulp/api/v2/repositories/'
+"""The path at which repositories may be created and listed."""
+
+STATUS_PATH = '/pulp/api/v2/status/'
+"""The path at which the server's status may be read."""
+
+TASK_SEARCH_PATH = '/pulp/api/v2/tasks/search/'
+"""The path at which tasks may be searched for."""
@@ -0,0 +1,225 @@
+# coding=utf-8
+"""Tools for sharing server-side resources between test classes.
+
+Many tests need repositories or consumers to exist before they can do
+anything interesting, and creating and deleting those resources in each
+class's ``setUpClass`` is slow. A :class:`FixturePool` creates resources on
+behalf of test classes, and it deletes them all at once when it is closed.
+
+A resource that a test class only reads may be shared with every other class
+that asks for a resource of the same name. A class that modifies a resource
+should ask for a fresh one instead, which no other class sees:
+
+>>> from pulp_smash.fixtures import get_pool
+>>> class MyTestCase(TestCase):
+...     @classmethod
+...     def setUpClass(cls):
+...         cls.repo = get_pool().shared('repository', 'empty-repo')
+...         cls.consumer = get_pool().fresh('consumer')
+
+The global pool returned by :func:`get_pool` is closed when
+:func:`close_pool` is called. :func:`pulp_smash.runner.run_classes` does so
+once its test classes have run. :mod:`pulp_smash.tests` calls
+:func:`close_pool_at_exit`, so that the pool is also closed when the tests are
+run by another test runner.
+
+"""
+from __future__ import unicode_literals
+
+import atexit
+import copy
+import sys
+import threading
+import uuid
+from collections import namedtuple
+from pulp_smash import api
+from pulp_smash.constants import CONSUMER_PATH, REPOSITORY_PATH
+from pulp_smash.tasks import spawned_task_hrefs, wait_for_tasks
+
+
+Factory = namedtuple('Factory', ('path', 'unwrap'))
+"""Describes how to create a kind of resource.
+
+``path``
+    The path to which a new resource's attributes are POSTed.
+``unwrap``
+    A function that takes the decoded body of a creation response, and that
+    returns the new resource as a dict with an "_href" key.
+
+"""
+
+FACTORIES = {
+    'consumer': Factory(
+        CONSUMER_PATH,
+        lambda body: dict(
+            body['consumer'],
+            _href='{0}{1}/'.format(CONSUMER_PATH, body['consumer']['id']),
+        ),
+    ),
+    'repository': Factory(REPOSITORY_PATH, lambda body: body),
+}
+"""The kinds of resource that a :class:`FixturePool` can create."""
+
+# `get_pool` uses this as a cache, in the same spirit as `api._CLIENT`.
+_POOL = None
+
+
+def get_pool():
+    """Return the global :class:`FixturePool` object.
+
+    This method makes use of a cache. If the cache is empty, a new pool is
+    created, which uses :func:`pulp_smash.api.get_client`.
+
+    :rtype: pulp_smash.fixtures.FixturePool
+
+    """
+    global _POOL  # pylint:disable=global-statement
+    if _POOL is None:
+        _POOL = FixturePool(api.get_client())
+    return _POOL
+
+
+def close_pool():
+    """Close the global :class:`FixturePool`, if one exists, and forget it."""
+    global _POOL  # pylint:disable=global-statement
+    pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.close()
+
+
+def close_pool_at_exit():
+    """Close the global :class:`FixturePool` when the Python interpreter exits.
+
+    If the pool cannot be closed, a warning is printed to standard error.
+
+    :returns: Nothing.
+
+    """
+    atexit.register(_close_pool_quietly)
+
+
+def _close_pool_quietly():
+    """Close the global pool, and print a warning if that fails."""
+    try:
+        close_pool()
+    except Exception as err:  # pylint:disable=broad-except
+        sys.stderr.write(
+            'Could not delete the resources in the fixture pool: {0}\n'
+            .format(err)
+        )
+
+
+class FixturePool(object):
+    """Create resources for test classes, and delete them in one batch.
+
+    Each resource is created with a unique ID, which starts with a random
+    prefix chosen when the pool is created. This class is thread safe.
+
+    :param client: A :class:`pulp_smash.api.Client` object.
+    :param factories: A dict mapping kinds of resource to :data:`Factory`
+        tuples. Defaults to :data:`FACTORIES`.
+
+    """
+
+    def __init__(self, client, factories=None):
+        self.client = client
+        self.factories = FACTORIES if factories is None else factories
+        self.prefix = 'pulp-smash-{}'.format(uuid.uuid4().hex[:8])
+        self._lock = threading.Lock()
+        self._shared = {}  # Maps (kind, name) to [lock, attrs, resource].
+        self._created = []  # Resources to delete, in order of creation.
+        self._count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def shared(self, kind, name, **attrs):
+        """Return a resource that may be shared with other test classes.
+
+        The resource is created by the first call with a given ``kind`` and
+        ``name``, and later calls return the same resource. Callers must not
+        modify it.
+
+        :param kind: A string. One of the keys in ``factories``.
+        :param name: A string. The name by which test classes refer to the
+            resource.
+        :param attrs: Attributes to create the resource with, such as
+            ``notes``. All callers must pass the same attributes.
+        :returns: A dict. A copy of the resource, as returned by the server.
+        :raises ValueError: If a resource of this name was created with
+            different attributes.
+        :raises requests.exceptions.HTTPError: If the resource cannot be
+            created.
+
+        """
+        with self._lock:
+            entry = self._shared.setdefault(
+                (kind, name),
+                [threading.Lock(), attrs, None],
+            )
+        if entry[1] != attrs:
+            raise ValueError(
+                'The shared {0} "{1}" was created with attributes {2}, not '
+                '{3}.'.format(kind, name, entry[1], attrs)
+            )
+        with entry[0]:  # Let other shared resources be created meanwhile.
+            if entry[2] is None:
+                suffix = '{0}-{1}'.format(kind, name)
+                entry[2] = self._create(kind, suffix, attrs)
+            return copy.deepcopy(entry[2])
+
+    def fresh(self, kind, **attrs):
+        """Return a new resource, for the caller's use alone.
+
+        :param kind: A string. One of the keys in ``factories``.
+        :param attrs: Attributes to create the resource with, such as
+            ``notes``.
+        :returns: A dict. The resource, as returned by the server.
+        :raises requests.exceptions.HTTPError: If the resource cannot be
+            created.
+
+        """
+        with self._lock:
+            self._count += 1
+            suffix = '{0}-{1}'.format(kind, self._count)
+        return self._create(kind, suffix, attrs)
+
+    def _create(self, kind, suffix, attrs):
+        """Create a resource with an ID ending in ``suffix``, and track it."""
+        factory = self.factories[kind]
+        payload = dict(attrs, id='{0}-{1}'.format(self.prefix, suffix))
+        response = self.client.post(factory.path, json=payload)
+        response.raise_for_status()
+        resource = factory.unwrap(response.json())
+        with self._lock:
+            self._created.append(resource)
+        return resource
+
+    def close(self):
+        """Delete every resource that this pool created.
+
+        All deletions are sent at once, and any tasks they spawn are waited
+        for. Resources that are already gone are ignored.
+
+        :returns: Nothing.
+        :raises requests.exceptions.HTTPError: If a resource cannot be
+            deleted.
+
+        """
+        with self._lock:
+            created, self._created = self._created, []
+            self._shared.clear()
+        responses = self.client.request_many(
+            ('DELETE', resource['_href'], None) for resource in created
+        )
+        hrefs = []
+        for response in responses:
+            if response.status_code == 404:
+                continue
+            response.raise_for_status()
+            if response.status_code == 202:
+                hrefs.extend(spawned_task_hrefs(response.json()))
+        wait_for_tasks(self.client, hrefs)
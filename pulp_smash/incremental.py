@@ -0,0 +1,135 @@
+# coding=utf-8
+"""Tools for skipping tests whose outcome cannot have changed.
+
+Re-running the whole test suite against the same server, after editing just a
+few test modules, re-exercises much that is already known to pass. In
+incremental mode, :func:`pulp_smash.runner.run` skips each test class that
+passed on an earlier run with the same *fingerprint*. A class's fingerprint
+covers:
+
+* the source code of the module that defines the class,
+* the configuration file section that the class is run against, and
+* the server's status, which includes the versions of Pulp's components.
+
+Classes that failed, and classes whose fingerprint has changed, are run
+again. Fingerprints of passing classes are stored in a :class:`PassCache`:
+
+>>> from pulp_smash.incremental import PassCache
+>>> from pulp_smash.runner import run
+>>> report = run(['default'], passes=PassCache(PassCache.default_path()))
+
+Changes to the rest of Pulp Smash, such as :mod:`pulp_smash.api`, are not
+covered by fingerprints. Pass ``force=True`` to :func:`pulp_smash.runner.run`
+to run every test regardless.
+
+"""
+from __future__ import unicode_literals
+
+import hashlib
+import importlib
+import inspect
+import json
+from os.path import join
+from xdg import BaseDirectory
+from pulp_smash import utils
+from pulp_smash.api import Client
+from pulp_smash.config import ServerConfig
+from pulp_smash.jsonstore import JsonStore
+
+
+class PassCache(JsonStore):
+    """A record of which test classes passed, and with which fingerprints.
+
+    The cache is a :class:`pulp_smash.jsonstore.JsonStore`, so several runs
+    may save it at once.
+
+    :param path: A string. The file in which fingerprints are stored. It need
+        not exist.
+
+    """
+
+    @staticmethod
+    def default_path():
+        """Return the path to a cache in Pulp Smash's XDG cache directory."""
+        cache_dir = BaseDirectory.save_cache_path('pulp_smash')
+        return join(cache_dir, 'passes.json')
+
+    def passed(self, section, class_id, fingerprint):
+        """Tell whether a class passed with the given fingerprint.
+
+        :param section: A string. The name of a configuration file section.
+        :param class_id: A string. A dotted test class name.
+        :param fingerprint: A string, as returned by :func:`class_fingerprint`,
+            or ``None`` if no fingerprint could be computed.
+        :returns: A boolean.
+
+        """
+        if fingerprint is None:
+            return False
+        return self._sections.get(section, {}).get(class_id) == fingerprint
+
+    def update(self, section, class_id, fingerprint):
+        """Record that a class passed or failed.
+
+        :param section: A string. The name of a configuration file section.
+        :param class_id: A string. A dotted test class name.
+        :param fingerprint: A string, as returned by :func:`class_fingerprint`,
+            if the class passed, or ``None`` if it failed.
+        :returns: Nothing.
+
+        """
+        if fingerprint is None:
+            self._delete(section, class_id)
+        else:
+            self._set(section, class_id, fingerprint)
+
+
+def server_fingerprint(section):
+    """Return a fingerprint of a configuration file section and its server.
+
+    The server's status is fetched, and fields that change from moment to
+    moment, such as worker heartbeats, are ignored.
+
+    :param section: A string. The name of a configuration file section.
+    :returns: A string.
+    :raises requests.exceptions.RequestException: If the server's status
+        cannot be fetched.
+
+    """
+    server_config = ServerConfig.read(section)
+    with Client(server_config, recorder=None) as client:
+        status = utils.get_server_status(client)
+    status['known_workers'] = sorted(
+        worker.get('_id') for worker in status.get('known_workers', ())
+    )
+    return _digest(section, server_config, status)
+
+
+def class_fingerprint(class_id, server_fingerprint_):
+    """Return a fingerprint for running a test class against a server.
+
+    :param class_id: A string. A dotted test class name.
+    :param server_fingerprint_: A string, as returned by
+        :func:`server_fingerprint`.
+    :returns: A string.
+
+    """
+    module = importlib.import_module(class_id.rsplit('.', 1)[0])
+    with open(inspect.getsourcefile(module), 'rb') as handle:
+        source = handle.read()
+    return _digest(class_id, server_fingerprint_, source)
+
+
+def _digest(*parts):
+    """Return a SHA-256 hex digest of ``parts``.
+
+    Byte strings are hashed as-is, and other values are serialized to JSON.
+
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = json.dumps(part, sort_keys=True).encode('utf-8')
+        digest.update(part)
+        digest.update(b'\0')
+    return digest.hexdigest()
@@ -0,0 +1,91 @@
+# coding=utf-8
+"""A base class for small JSON databases that several processes update.
+
+:class:`pulp_smash.sharding.Timings`, :class:`pulp_smash.incremental.PassCache`
+and :class:`pulp_smash.baseline.BaselineStore` each keep a JSON file that maps
+configuration file section names to dicts. Several test runs may share such a
+file, and may save it at the same moment. :class:`JsonStore` remembers which
+keys were changed since the file was read, and :meth:`JsonStore.save` applies
+just those changes to the file's current contents, under a lock:
+
+>>> from pulp_smash.sharding import Timings
+>>> timings = Timings(Timings.default_path())
+>>> timings.update('default', {'pulp_smash.tests.test_login.LoginTestCase': 1})
+>>> timings.save()
+
+Thus, concurrent runs do not clobber each other's changes, unless they change
+the same key, in which case the last to save wins.
+
+"""
+from __future__ import unicode_literals
+
+import json
+from threading import Lock
+from pulp_smash.utils import locked_file, write_atomically
+
+
+# Used to lock files against other threads, with `locked_file`.
+_FILE_LOCK = Lock()
+
+# Marks a key that was deleted.
+_DELETED = object()
+
+
+class JsonStore(object):
+    """A JSON file that maps section names to dicts.
+
+    The file is read when this object is created, and is updated atomically
+    by :meth:`save`. Subclasses read ``self._sections``, and change it with
+    :meth:`_set` and :meth:`_delete`, so that the changes can be saved.
+
+    :param path: A string. The file in which the data is stored. It need not
+        exist.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._sections = _read(path)
+        self._changes = {}
+
+    def _set(self, section, key, value):
+        """Set a key in a section, and remember to save it."""
+        self._sections.setdefault(section, {})[key] = value
+        self._changes[(section, key)] = value
+
+    def _delete(self, section, key):
+        """Delete a key from a section, if present, and remember to save it."""
+        self._sections.get(section, {}).pop(key, None)
+        self._changes[(section, key)] = _DELETED
+
+    def save(self):
+        """Apply the changes made since the file was read, atomically.
+
+        The file is locked with ``flock(2)`` (where available) while it is
+        read, changed and written out, and its new contents are written to a
+        temporary file that is then renamed over it. Afterwards, this object
+        holds the file's new contents, including changes saved by others.
+
+        """
+        with locked_file(self.path, _FILE_LOCK):
+            sections = _read(self.path)
+            for (section, key), value in self._changes.items():
+                if value is _DELETED:
+                    sections.get(section, {}).pop(key, None)
+                else:
+                    sections.setdefault(section, {})[key] = value
+            write_atomically(
+                self.path,
+                json.dumps(sections, indent=2, sort_keys=True),
+            )
+        self._sections = sections
+        self._changes = {}
+
+
+def _read(path):
+    """Read a JSON file, or return an empty dict if it is missing or bad."""
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except (IOError, ValueError):
+        return {}
@@ -0,0 +1,262 @@
+# coding=utf-8
+"""Tools for decoding large JSON documents without holding them in memory.
+
+``response.json()`` reads a whole response body, and then builds the whole
+document. Some of Pulp's responses, such as applicability reports and listings
+of consumers or repositories on a large server, run to hundreds of megabytes.
+The functions in this module read such a document a chunk at a time, and yield
+the members of one array or object in it as each arrives:
+
+>>> from pulp_smash.api import get_client
+>>> from pulp_smash.constants import REPOSITORY_PATH
+>>> from pulp_smash.jsonstream import iter_items, iter_members
+>>> response = get_client().get(REPOSITORY_PATH, stream=True)
+>>> repo_ids = [repo['id'] for repo in iter_items(response)]
+>>> response = get_client().post(path, json=payload, stream=True)
+>>> keys = {key for key, _ in iter_members(response)}
+
+Memory use is bounded by the size of the largest single member, not by the
+size of the document. A ``path`` of object keys selects a container nested
+within the document. Members of objects along the path that are not selected
+are skipped over without being decoded.
+
+"""
+from __future__ import unicode_literals
+
+import codecs
+import json
+import re
+from numbers import Number
+
+
+CHUNK_SIZE = 64 * 1024
+"""The number of bytes read from a response at a time."""
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# Characters that matter while skipping, inside and outside of strings.
+_IN_STRING = re.compile(r'["\\]')
+_OUTSIDE_STRING = re.compile(r'["{}\[\]]')
+# Characters that may continue a number, such as "1." or "1e".
+_NUMBER_CHARS = frozenset('0123456789+-.eE')
+
+
+def iter_items(source, path=()):
+    """Yield the items of an array in a JSON document, one at a time.
+
+    :param source: A ``requests.Response``, which should have been requested
+        with ``stream=True``, or an iterable of byte or text strings. A
+        response is closed once this generator is exhausted or closed.
+    :param path: A sequence of strings. The keys of the objects leading to the
+        array. By default, the document itself must be an array.
+    :returns: A generator of decoded values.
+    :raises KeyError: If a key in ``path`` is missing.
+    :raises ValueError: If the document is not valid JSON, or if the value at
+        ``path`` is not an array.
+
+    """
+    return _iter(source, path, '[', ']', _item)
+
+
+def iter_members(source, path=()):
+    """Yield the members of an object in a JSON document, one at a time.
+
+    :param source: See :func:`iter_items`.
+    :param path: A sequence of strings. The keys of the objects leading to the
+        object. By default, the document itself must be an object.
+    :returns: A generator of ``(key, value)`` tuples.
+    :raises KeyError: If a key in ``path`` is missing.
+    :raises ValueError: If the document is not valid JSON, or if the value at
+        ``path`` is not an object.
+
+    """
+    return _iter(source, path, '{', '}', _member)
+
+
+def _item(reader):
+    """Read an array item."""
+    return reader.value()
+
+
+def _member(reader):
+    """Read an object member, as a ``(key, value)`` tuple."""
+    key = reader.key()
+    return key, reader.value()
+
+
+def _iter(source, path, opener, closer, read):
+    """Yield the members of the container at ``path``, using ``read``."""
+    if hasattr(source, 'iter_content'):
+        chunks = source.iter_content(CHUNK_SIZE)
+        close = source.close
+    else:
+        chunks = source
+        close = None
+    try:
+        reader = _Reader(chunks)
+        for key in path:
+            reader.find(key)
+        reader.expect(opener)
+        if reader.peek() == closer:
+            return
+        while True:
+            yield read(reader)
+            char = reader.peek()
+            reader.advance()
+            if char == closer:
+                return
+            if char != ',':
+                raise reader.error('Expected "," or "{0}"'.format(closer))
+    finally:
+        if close is not None:
+            close()
+
+
+def _is_number(value):
+    """Tell whether ``value`` was decoded from a JSON number."""
+    return isinstance(value, Number) and not isinstance(value, bool)
+
+
+class _Reader(object):
+    """Read JSON values from an iterable of byte or text strings.
+
+    Text is kept in a buffer, from which consumed text is dropped whenever
+    more is read. Values are decoded with ``json.JSONDecoder.raw_decode``. If
+    a value is incomplete, the buffer is at least doubled before trying again,
+    so that decoding a large value takes linear time.
+
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def error(self, message):
+        """Return a ``ValueError`` describing a problem at the current spot."""
+        return ValueError('{0}, near: {1!r}'.format(
+            message,
+            self._buffer[self._pos:self._pos + 40],
+        ))
+
+    def _fill(self, size):
+        """Read at least ``size`` more characters, unless the input runs out.
+
+        :returns: Whether any more text was read.
+
+        """
+        self._buffer = self._buffer[self._pos:]
+        self._pos = 0
+        start = len(self._buffer)
+        while len(self._buffer) < start + size:
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                self._buffer += self._utf8.decode(b'', True)
+                self._eof = True
+                return len(self._buffer) > start
+            if isinstance(chunk, bytes):
+                chunk = self._utf8.decode(chunk)
+            self._buffer += chunk
+        return True
+
+    def peek(self):
+        """Skip whitespace, and return the next character, or "" at the end."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill(1):
+                return ''
+
+    def advance(self):
+        """Consume the character returned by :meth:`peek`."""
+        self._pos += 1
+
+    def expect(self, char):
+        """Consume ``char``, which must be the next character."""
+        if self.peek() != char:
+            raise self.error('Expected "{0}"'.format(char))
+        self.advance()
+
+    def key(self):
+        """Read an object key and the colon that follows it."""
+        if self.peek() != '"':
+            raise self.error('Expected an object key')
+        key = self.value()
+        self.expect(':')
+        return key
+
+    def value(self):
+        """Read and decode a value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except ValueError:
+                if self._eof:
+                    raise
+            else:
+                # A number followed by nothing, or by a part of a number such
+                # as "." or "e", may continue in text not yet read.
+                if self._eof or not _is_number(value) or (
+                        end < len(self._buffer) and
+                        self._buffer[end] not in _NUMBER_CHARS):
+                    self._pos = end
+                    return value
+            self._fill(max(len(self._buffer) - self._pos, CHUNK_SIZE))
+
+    def skip(self):
+        """Read past a value without decoding it."""
+        if self.peek() not in ('{', '['):
+            self.value()
+            return
+        depth = 0
+        in_string = False
+        while True:
+            regex = _IN_STRING if in_string else _OUTSIDE_STRING
+            match = regex.search(self._buffer, self._pos)
+            if match is None or (
+                    match.group() == '\\' and
+                    match.end() >= len(self._buffer)):
+                # Keep an escape together with the character it escapes.
+                self._pos = len(self._buffer) if match is None else (
+                    match.start()
+                )
+                if not self._fill(CHUNK_SIZE):
+                    raise self.error('Unexpected end of document')
+                continue
+            char = match.group()
+            self._pos = match.end()
+            if char == '\\':
+                self._pos += 1
+            elif char == '"':
+                in_string = not in_string
+            elif char in '{[':
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def find(self, key):
+        """Read into an object, up to the value of the member named ``key``.
+
+        Members before it are skipped.
+
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            raise KeyError(key)
+        while True:
+            if self.key() == key:
+                return
+            self.skip()
+            char = self.peek()
+            self.advance()
+            if char == '}':
+                raise KeyError(key)
+            if char != ',':
+                raise self.error('Expected "," or "}"')
@@ -0,0 +1,309 @@
+# coding=utf-8
+"""Tools for generating load against a Pulp server.
+
+:func:`generate_load` repeatedly sends a single request to a server for a fixed
+duration, and it returns a :class:`LoadReport` describing how the server fared.
+:func:`probe` calls :func:`generate_load` repeatedly, adjusting concurrency as
+it goes, to find the highest request rate that a server can sustain within a
+:data:`SLO`. This module backs the ``python -m pulp_smash load`` and ``python
+-m pulp_smash probe`` commands.
+
+"""
+from __future__ import division, unicode_literals
+
+import threading
+import time
+from collections import namedtuple
+from requests.exceptions import RequestException
+from pulp_smash import stats
+from pulp_smash.constants import (
+    CONSUMER_APPLICABILITY_PATH,
+    LOGIN_PATH,
+    REPO_APPLICABILITY_PATH,
+)
+from pulp_smash.utils import monotonic
+
+
+ENDPOINTS = {
+    'consumer': (
+        'POST',
+        CONSUMER_APPLICABILITY_PATH,
+        {'consumer_criteria': {}},
+    ),
+    'login': ('POST', LOGIN_PATH, None),
+    'repo': ('POST', REPO_APPLICABILITY_PATH, {'repo_criteria': {}}),
+}
+"""Named ``(method, path, payload)`` calls that load may be generated with."""
+
+
+class LoadReport(namedtuple(
+        'LoadReport',
+        ('requests', 'errors', 'elapsed', 'latencies'))):
+    """The outcome of a call to :func:`generate_load`.
+
+    ``requests``
+        The number of requests sent.
+    ``errors``
+        The number of requests that raised an exception or received a response
+        with a 4XX or 5XX status code.
+    ``elapsed``
+        The number of seconds for which load was generated.
+    ``latencies``
+        A list of request latencies, in seconds.
+
+    """
+    __slots__ = ()
+
+    @property
+    def throughput(self):
+        """Return the number of requests sent per second."""
+        return self.requests / self.elapsed if self.elapsed else 0
+
+    @property
+    def error_rate(self):
+        """Return the fraction of requests that failed."""
+        return self.errors / self.requests if self.requests else 0
+
+    def summary(self):
+        """Return a JSON-serializable dict summarizing this report."""
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'elapsed': self.elapsed,
+            'throughput': self.throughput,
+            'error_rate': self.error_rate,
+            'latency': stats.summarize(self.latencies),
+        }
+
+
+def generate_load(client, call, duration, concurrency=1, rate=None):
+    """Repeatedly send a request to a server for ``duration`` seconds.
+
+    Requests are sent by ``concurrency`` threads. If ``rate`` is ``None``, each
+    thread sends a new request as soon as it receives a response to its last
+    request. Otherwise, requests are scheduled to be sent at a fixed rate, and
+    ``concurrency`` is the maximum number of requests that may be in flight at
+    once. In the latter case, latency is measured from the moment at which each
+    request was scheduled to be sent, so a server that cannot keep up is not
+    flattered by the client falling behind schedule.
+
+    :param client: A :class:`pulp_smash.api.Client` object. Its ``pool_size``
+        should be at least ``concurrency``.
+    :param call: A ``(method, path, payload)`` triple, as accepted by
+        :meth:`pulp_smash.api.Client.request_many`.
+    :param duration: A number. How many seconds to generate load for.
+    :param concurrency: An integer. How many requests may be in flight at once.
+    :param rate: A number. How many requests to send per second.
+    :returns: A :class:`LoadReport`.
+    :raises ValueError: If ``concurrency`` is less than one, or if ``rate`` is
+        given and is not positive.
+
+    """
+    if concurrency < 1:
+        raise ValueError(
+            'At least one thread is needed, but {0} were asked for.'
+            .format(concurrency)
+        )
+    if rate is not None and rate <= 0:
+        raise ValueError('The rate must be positive, but is {0}.'.format(rate))
+    method, path, payload = call
+    kwargs = {} if payload is None else {'json': payload}
+    lock = threading.Lock()
+    latencies = []
+    counters = {'errors': 0, 'slot': 0}
+    start = monotonic()
+    deadline = start + duration
+
+    def send():
+        """Send requests until the deadline passes."""
+        while True:
+            if rate is None:
+                sent_at = monotonic()
+                if sent_at >= deadline:
+                    return
+            else:
+                with lock:
+                    sent_at = start + counters['slot'] / rate
+                    counters['slot'] += 1
+                if sent_at >= deadline:
+                    return
+                time.sleep(max(sent_at - monotonic(), 0))
+            try:
+                response = client.request(method, path, **kwargs)
+                error = response.status_code >= 400
+            except RequestException:
+                error = True
+            latency = monotonic() - sent_at
+            with lock:
+                latencies.append(latency)
+                counters['errors'] += error
+
+    threads = tuple(threading.Thread(target=send) for _ in range(concurrency))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return LoadReport(
+        len(latencies),
+        counters['errors'],
+        monotonic() - start,
+        latencies,
+    )
+
+
+SLO = namedtuple('SLO', ('percentile', 'latency', 'error_rate'))
+"""A service level objective, which :func:`probe` tries to stay within.
+
+``percentile``
+    An integer from :data:`pulp_smash.stats.PERCENTILES`, such as 95.
+``latency``
+    The number of seconds that the given latency percentile may not exceed.
+``error_rate``
+    The fraction of requests that may fail, such as 0.01.
+
+"""
+
+ProbeReport = namedtuple('ProbeReport', ('max_throughput', 'curve'))
+"""The outcome of a call to :func:`probe`.
+
+``max_throughput``
+    The highest number of requests per second that was sustained within the
+    SLO, or ``None`` if the SLO was never met.
+``curve``
+    A list of dicts, one per step, in the order in which the steps were
+    taken. Each dict has a "concurrency" key, an "ok" key telling whether the
+    step met the SLO, and the keys of a :meth:`LoadReport.summary`.
+
+"""
+
+
+def probe(  # pylint:disable=too-many-arguments
+        client,
+        call,
+        slo,
+        step_duration=5,
+        max_concurrency=64,
+        increase=1,
+        decrease=0.5,
+        max_steps=30,
+        max_backoffs=3):
+    """Find the highest request rate that a server sustains within an SLO.
+
+    Load is generated in steps of ``step_duration`` seconds, with a fixed
+    concurrency in each step. Concurrency starts at one. After each step that
+    meets ``slo``, concurrency is increased by ``increase``. After each step
+    that does not, concurrency is multiplied by ``decrease``. This is the
+    additive-increase, multiplicative-decrease rule that TCP uses to find the
+    capacity of a network path, and it settles close to the point at which the
+    server starts to struggle without lingering past it.
+
+    Probing stops after ``max_steps`` steps or ``max_backoffs`` decreases,
+    whichever comes first.
+
+    :param client: A :class:`pulp_smash.api.Client` object. Its ``pool_size``
+        should be at least ``max_concurrency``.
+    :param call: A ``(method, path, payload)`` triple, as accepted by
+        :func:`generate_load`.
+    :param slo: An :data:`SLO`.
+    :param step_duration: A number. How many seconds each step lasts.
+    :param max_concurrency: An integer. The highest concurrency to try.
+    :param increase: An integer. How much to increase concurrency by.
+    :param decrease: A number between zero and one. How much to multiply
+        concurrency by.
+    :param max_steps: An integer. The maximum number of steps to take.
+    :param max_backoffs: An integer. The number of decreases after which to
+        stop.
+    :returns: A :data:`ProbeReport`.
+
+    """
+    concurrency = 1
+    backoffs = 0
+    max_throughput = 0
+    curve = []
+    for _ in range(max_steps):
+        summary = generate_load(
+            client,
+            call,
+            step_duration,
+            concurrency,
+        ).summary()
+        latency = summary['latency']['p{}'.format(slo.percentile)]
+        ok = (
+            summary['requests'] > 0 and
+            summary['error_rate'] <= slo.error_rate and
+            latency <= slo.latency
+        )
+        curve.append(dict(summary, concurrency=concurrency, ok=ok))
+        if ok:
+            max_throughput = max(max_throughput, summary['throughput'])
+            if concurrency >= max_concurrency:
+                break
+            concurrency = min(concurrency + increase, max_concurrency)
+        else:
+            backoffs += 1
+            if backoffs >= max_backoffs:
+                break
+            concurrency = max(int(concurrency * decrease), 1)
+    return ProbeReport(max_throughput or None, curve)
+
+
+def format_probe_report(report):
+    """Return a human-readable version of a :data:`ProbeReport`.
+
+    :param report: A :data:`ProbeReport`.
+    :returns: A string.
+
+    """
+    lines = ['concurrency  throughput      p50      p95      p99   errors  ok']
+    for point in report.curve:
+        latency = point['latency']
+        lines.append(
+            '{0:>11}  {1:>10.2f}  {2}  {3}  {4}  {5:>7.2%}  {6}'.format(
+                point['concurrency'],
+                point['throughput'],
+                _format_ms(latency['p50']),
+                _format_ms(latency['p95']),
+                _format_ms(latency['p99']),
+                point['error_rate'],
+                'yes' if point['ok'] else 'no',
+            )
+        )
+    if report.max_throughput is None:
+        lines.append('The SLO was never met.')
+    else:
+        lines.append('max sustainable throughput: {0:.2f} req/s'.format(
+            report.max_throughput
+        ))
+    return '\n'.join(lines)
+
+
+def _format_ms(seconds):
+    """Format a latency as milliseconds, right-aligned in seven columns."""
+    if seconds is None:
+        return '{0:>7}'.format('-')
+    return '{0:>5.0f}ms'.format(seconds * 1000)
+
+
+def format_summary(summary):
+    """Return a human-readable version of :meth:`LoadReport.summary`.
+
+    :param summary: A dict, as returned by :meth:`LoadReport.summary`.
+    :returns: A string.
+
+    """
+    lines = [
+        'requests:   {requests}',
+        'errors:     {errors} ({error_rate:.2%})',
+        'elapsed:    {elapsed:.2f}s',
+        'throughput: {throughput:.2f} req/s',
+    ]
+    lines = [line.format(**summary) for line in lines]
+    latency = summary['latency']
+    for key in ('p50', 'p95', 'p99', 'max'):
+        if latency[key] is None:
+            lines.append('{0}:{1}-'.format(key, ' ' * (11 - len(key))))
+        else:
+            lines.append('{0}:{1}{2:.2f}ms'.format(
+                key, ' ' * (11 - len(key)), latency[key] * 1000
+            ))
+    return '\n'.join(lines)
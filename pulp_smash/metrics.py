@@ -0,0 +1,419 @@
+# coding=utf-8
+"""Tools for measuring the requests that Pulp Smash sends.
+
+Every :class:`pulp_smash.api.Client` reports each request it sends to a
+:class:`Recorder`. By default, all clients share the global :data:`RECORDER`.
+For each endpoint, a recorder counts requests, failures, status codes and
+response bytes, and it maintains a :class:`Histogram` of latencies. Recording
+a request costs a lock acquisition, a few dict lookups, a binary search and a
+random draw, so recording is always on.
+
+Reports are only written when asked for. :func:`write_report_at_exit` makes
+the contents of :data:`RECORDER` be written out as ``metrics.json`` and
+``metrics.csv`` when the Python interpreter exits, by default in Pulp Smash's
+XDG cache directory, such as ``~/.cache/pulp_smash/``. If the
+``PULP_SMASH_METRICS`` environment variable is set, :mod:`pulp_smash.tests`
+does this when it is imported, so that a report is produced at the end of a
+``python -m unittest2 discover pulp_smash.tests`` run. That report also has a
+"task_timings" breakdown of the tasks spawned by the tests, as fetched by
+:func:`pulp_smash.runner.harvest_timings`:
+
+.. code-block:: sh
+
+    PULP_SMASH_METRICS=1 python -m unittest2 discover pulp_smash.tests
+
+"""
+from __future__ import division, unicode_literals
+
+import atexit
+import bisect
+import csv
+import json
+import random
+import re
+import threading
+from os.path import join
+from xdg import BaseDirectory
+try:
+    from urllib.parse import urlsplit
+except ImportError:  # pragma: no cover
+    from urlparse import urlsplit  # Python 2
+
+
+BUCKETS = tuple(0.001 * 2 ** i for i in range(18))
+"""The upper bounds of the buckets in a :class:`Histogram`, in seconds.
+
+The buckets grow exponentially, from 1ms to about 131s. Latencies greater than
+the last bound fall into a final, unbounded bucket.
+
+"""
+
+MAX_TASKS = 100000
+"""The most spawned tasks that a :class:`Recorder` keeps track of."""
+
+SAMPLE_SIZE = 1000
+"""The number of latencies that a :class:`Histogram` keeps as a sample."""
+
+# Path segments that follow one of these segments are resource IDs, unless
+# they are one of the `_VERBS`.
+_COLLECTIONS = frozenset((
+    'bindings',
+    'consumer_groups',
+    'consumers',
+    'distributors',
+    'importers',
+    'profiles',
+    'repo_groups',
+    'repositories',
+    'roles',
+    'schedules',
+    'tasks',
+    'uploads',
+    'users',
+))
+_VERBS = frozenset(('actions', 'search'))
+# Path segments matching this regex are resource IDs wherever they occur.
+_ID = re.compile(
+    r'^([0-9]+|[0-9a-f]{24,}|[0-9a-f]{8}(-[0-9a-f]{4}){3}-[0-9a-f]{12})$'
+)
+
+# `path_template` uses this as a cache. Paths repeat often, so it is cheaper
+# to look a template up than to generate it.
+_TEMPLATES = {}
+
+
+def path_template(url):
+    """Return ``url`` with resource IDs replaced by ``{id}``.
+
+    This lets requests to similar URLs be grouped together. For example:
+
+    >>> from pulp_smash.metrics import path_template
+    >>> path_template('https://example.com/pulp/api/v2/repositories/foo/')
+    '/pulp/api/v2/repositories/{id}/'
+    >>> path_template('/pulp/api/v2/repositories/search/')
+    '/pulp/api/v2/repositories/search/'
+
+    :param url: A string. A path or an absolute URL.
+    :returns: A string. A path with no query string.
+
+    """
+    try:
+        return _TEMPLATES[url]
+    except KeyError:
+        pass
+    segments = urlsplit(url).path.split('/')
+    for i, segment in enumerate(segments):
+        if not segment or segment in _VERBS:
+            continue
+        if _ID.match(segment) or (i > 0 and segments[i - 1] in _COLLECTIONS):
+            segments[i] = '{id}'
+    template = '/'.join(segments)
+    if len(_TEMPLATES) < 10000:
+        _TEMPLATES[url] = template
+    return template
+
+
+class Histogram(object):
+    """A histogram of latencies, with buckets bounded by :data:`BUCKETS`.
+
+    A histogram uses a constant amount of memory, no matter how many values
+    are added to it. Percentiles are estimated by returning the upper bound of
+    the bucket that the requested percentile falls into, so they are never
+    underestimated by more than one bucket.
+
+    Buckets are too coarse to tell whether one set of latencies is slower than
+    another, so a histogram also keeps a uniform random sample of up to
+    :data:`SAMPLE_SIZE` of its values, in ``samples``. This is reservoir
+    sampling: once the sample is full, the ``n``-th value replaces a random
+    member of it with probability ``SAMPLE_SIZE / n``.
+
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0
+        self.max = None
+        self.samples = []
+
+    def add(self, value):
+        """Add a value, in seconds, to this histogram."""
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        if self.max is None or value > self.max:
+            self.max = value
+        if len(self.samples) < SAMPLE_SIZE:
+            self.samples.append(value)
+        else:
+            i = random.randrange(self.count)
+            if i < SAMPLE_SIZE:
+                self.samples[i] = value
+
+    def percentile(self, pct):
+        """Estimate the ``pct`` percentile of the values in this histogram.
+
+        :param pct: A number between 0 and 100, inclusive.
+        :returns: A number, or ``None`` if this histogram is empty.
+
+        """
+        if not self.count:
+            return None
+        rank = pct / 100 * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank and i < len(BUCKETS):
+                return min(BUCKETS[i], self.max)
+        return self.max
+
+    def merge(self, data):
+        """Add the values described by a :meth:`to_dict` dict.
+
+        The merged sample draws from each histogram's sample in proportion to
+        the number of values that each histogram holds.
+
+        """
+        for i, count in enumerate(data['counts']):
+            self.counts[i] += count
+        samples = data.get('samples', ())
+        if len(self.samples) + len(samples) <= SAMPLE_SIZE:
+            self.samples.extend(samples)
+        else:
+            theirs = int(round(
+                SAMPLE_SIZE * data['count'] / (self.count + data['count'])
+            ))
+            theirs = min(theirs, len(samples))
+            mine = min(SAMPLE_SIZE - theirs, len(self.samples))
+            self.samples = (
+                random.sample(self.samples, mine) +
+                random.sample(samples, theirs)
+            )
+        if data['count']:
+            self.count += data['count']
+            self.total += data['mean'] * data['count']
+            if self.max is None or data['max'] > self.max:
+                self.max = data['max']
+
+    def to_dict(self):
+        """Return a JSON-serializable dict describing this histogram."""
+        return {
+            'buckets': list(BUCKETS),
+            'counts': list(self.counts),
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'samples': list(self.samples),
+        }
+
+
+class Recorder(object):
+    """Record facts about requests, and aggregate them by endpoint.
+
+    An endpoint is an HTTP method and a :func:`path_template`. A recorder
+    also keeps track of the tasks that requests spawned, so that their
+    timings can be fetched later with
+    :func:`pulp_smash.tasks.harvest_timings`. This class is thread safe.
+
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._tasks = {}
+
+    def __len__(self):
+        """Return the number of requests recorded."""
+        with self._lock:
+            return sum(
+                endpoint['latency'].count
+                for endpoint in self._endpoints.values()
+            )
+
+    def _endpoint(self, key):
+        """Return the statistics for an endpoint, creating them if needed.
+
+        The caller must hold this recorder's lock.
+
+        """
+        try:
+            return self._endpoints[key]
+        except KeyError:
+            endpoint = self._endpoints[key] = {
+                'latency': Histogram(),
+                'statuses': {},
+                'errors': 0,
+                'bytes': 0,
+            }
+            return endpoint
+
+    def record(self, method, url, status, nbytes, elapsed):
+        """Record a single request.
+
+        :param method: A string, such as "GET".
+        :param url: A string. The path or URL to which the request was sent.
+        :param status: An integer, or ``None`` if no response was received.
+            Requests with no response or a 5XX status code count as errors.
+        :param nbytes: An integer. The size of the response body.
+        :param elapsed: A number. How many seconds the request took.
+        :returns: Nothing.
+
+        """
+        key = (method.upper(), path_template(url))
+        with self._lock:
+            endpoint = self._endpoint(key)
+            endpoint['latency'].add(elapsed)
+            endpoint['statuses'][status] = (
+                endpoint['statuses'].get(status, 0) + 1
+            )
+            if status is None or status >= 500:
+                endpoint['errors'] += 1
+            endpoint['bytes'] += nbytes
+
+    def record_tasks(self, task_ids, received):
+        """Record that a call report spawning some tasks was received.
+
+        Once :data:`MAX_TASKS` tasks are tracked, further tasks are ignored.
+
+        :param task_ids: An iterable of task IDs.
+        :param received: A number. The time at which the call report was
+            received, in seconds since the epoch.
+        :returns: Nothing.
+
+        """
+        with self._lock:
+            for task_id in task_ids:
+                if len(self._tasks) >= MAX_TASKS:
+                    break
+                self._tasks[task_id] = received
+
+    def merge(self, report):
+        """Add the requests described by a :meth:`report` to this recorder.
+
+        This lets reports from several processes be combined.
+
+        :param report: A dict, as returned by :meth:`report`.
+        :returns: Nothing.
+
+        """
+        with self._lock:
+            for data in report['endpoints']:
+                endpoint = self._endpoint((data['method'], data['path']))
+                endpoint['latency'].merge(data['latency'])
+                for status, count in data['statuses'].items():
+                    status = None if status == 'None' else int(status)
+                    endpoint['statuses'][status] = (
+                        endpoint['statuses'].get(status, 0) + count
+                    )
+                endpoint['errors'] += data['errors']
+                endpoint['bytes'] += data['bytes']
+            for task_id, received in report.get('tasks', {}).items():
+                if len(self._tasks) >= MAX_TASKS:
+                    break
+                self._tasks[task_id] = received
+
+    def reset(self):
+        """Forget all recorded requests."""
+        with self._lock:
+            self._endpoints.clear()
+            self._tasks.clear()
+
+    def report(self, reset=False):
+        """Return a JSON-serializable report on all recorded requests.
+
+        :param reset: A boolean. If true, forget the requests reported, in
+            the same step, so that no request is missed or reported twice by
+            a caller that reports at intervals.
+
+        :returns: A dict with "endpoints" and "tasks" keys. The first is a
+            list of dicts, one per endpoint, sorted by path and method. The
+            second maps the ID of each task spawned to the time at which the
+            call report that spawned it was received, in seconds since the
+            epoch.
+
+        """
+        with self._lock:
+            items = sorted(
+                self._endpoints.items(),
+                key=lambda item: (item[0][1], item[0][0]),
+            )
+            endpoints = [{
+                'method': method,
+                'path': path,
+                'count': endpoint['latency'].count,
+                'errors': endpoint['errors'],
+                'bytes': endpoint['bytes'],
+                'statuses': {
+                    type('')(status): count
+                    for status, count in endpoint['statuses'].items()
+                },
+                'latency': endpoint['latency'].to_dict(),
+            } for (method, path), endpoint in items]
+            tasks = dict(self._tasks)
+            if reset:
+                self._endpoints.clear()
+                self._tasks.clear()
+            return {'endpoints': endpoints, 'tasks': tasks}
+
+    def write_report(self, directory, harvest=None):
+        """Write :meth:`report` to ``metrics.json`` and ``metrics.csv``.
+
+        The CSV file has one row per endpoint, and latencies are in seconds.
+
+        :param directory: A string. The directory in which to create the
+            files. Existing files are replaced.
+        :param harvest: A function or ``None``. If given, it is passed the
+            "tasks" of the report, and what it returns is added to
+            ``metrics.json`` as "task_timings".
+        :returns: Nothing.
+
+        """
+        report = self.report()
+        if harvest is not None:
+            report['task_timings'] = harvest(report['tasks'])
+        with open(join(directory, 'metrics.json'), 'w') as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+        fields = (
+            'method', 'path', 'count', 'errors', 'bytes', 'mean', 'p50',
+            'p95', 'p99', 'max', 'statuses'
+        )
+        with open(join(directory, 'metrics.csv'), 'w') as handle:
+            writer = csv.writer(handle)
+            writer.writerow(fields)
+            for endpoint in report['endpoints']:
+                row = dict(endpoint, **endpoint['latency'])
+                row['statuses'] = ' '.join(
+                    '{0}:{1}'.format(status, count)
+                    for status, count in sorted(row['statuses'].items())
+                )
+                writer.writerow(tuple(row[field] for field in fields))
+
+
+RECORDER = Recorder()
+"""The :class:`Recorder` used by :class:`pulp_smash.api.Client` by default."""
+
+
+def write_report_at_exit(directory=None, harvest=None):
+    """Write out :data:`RECORDER` when the Python interpreter exits.
+
+    Nothing is written if no requests were recorded.
+
+    :param directory: A string. The directory to write the report to. Defaults
+        to Pulp Smash's XDG cache directory.
+    :param harvest: A function or ``None``. Passed on to
+        :meth:`Recorder.write_report`.
+    :returns: Nothing.
+
+    """
+    atexit.register(_write_report, directory, harvest)
+
+
+def _write_report(directory, harvest=None):
+    """Write out :data:`RECORDER`, if it has recorded any requests."""
+    if len(RECORDER):
+        if directory is None:
+            directory = BaseDirectory.save_cache_path('pulp_smash')
+        RECORDER.write_report(directory, harvest)
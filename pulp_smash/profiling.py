@@ -0,0 +1,258 @@
+# coding=utf-8
+"""Tools for finding out where a slow test class spends its time.
+
+When a test class is slow, the time may be spent by the client, such as in
+decoding JSON, copying configuration or building requests, or it may be spent
+waiting for the server. :func:`profile_class` runs a test class under
+``cProfile`` and, where available, ``tracemalloc``, and it splits the class's
+wall-clock time into:
+
+``cpu``
+    CPU time used by the whole process, including any threads.
+``socket``
+    Time spent in socket calls, such as connecting, sending and receiving.
+``lock``
+    Time spent waiting to acquire a lock. Typically, this is the test thread
+    waiting for requests sent from other threads by
+    :meth:`pulp_smash.api.Client.request_many`.
+``sleep``
+    Time spent sleeping, such as between polls of a task.
+
+Only the test thread is profiled, so time spent by other threads counts as
+``lock`` time. For each class, a ``.prof`` file that ``pstats`` and tools
+such as SnakeViz can read is written, alongside a ``.json`` summary. At the
+end of a run, the summaries are collected with :func:`load_profiles`:
+
+>>> from pulp_smash import profiling, runner
+>>> report = runner.run(['default'], profile_dir='profiles')
+>>> print(profiling.format_profiles(report['profiles']))
+
+This module backs the ``--profile`` option of ``python -m pulp_smash run``.
+
+"""
+from __future__ import division, unicode_literals
+
+import cProfile
+import json
+import os
+import pstats
+import re
+from os.path import join
+from pulp_smash.utils import monotonic
+try:
+    import tracemalloc
+except ImportError:  # pragma: no cover
+    tracemalloc = None  # Python 2
+
+
+TOP = 20
+"""How many functions and allocation sites each summary lists."""
+
+BLOCKING = (
+    ('socket', re.compile(
+        r"of '_socket\.socket' objects|of '_ssl\._SSLSocket' objects|"
+        r"_socket\.getaddrinfo|\bselect\.(select|poll)\b"
+    )),
+    ('lock', re.compile(r"'acquire' of '_?thread\.(lock|RLock)' objects")),
+    ('sleep', re.compile(r'\btime\.sleep\b')),
+)
+"""Kinds of blocking, and regexes matching built-in functions that block."""
+
+
+def profile_path(profile_dir, section, class_id):
+    """Return the path, without an extension, of a class's profile files.
+
+    :param profile_dir: A string. The directory holding profile files.
+    :param section: A string. The configuration file section tested.
+    :param class_id: A string. The dotted name of a test class.
+    :returns: A string.
+
+    """
+    return join(profile_dir, '{0}.{1}'.format(section, class_id))
+
+
+def profile_class(section, class_id, func, profile_dir, top=TOP):
+    """Call a function that runs a test class, and profile it.
+
+    ``func`` is called with no arguments. Its profile is written to a
+    ``.prof`` file, and a summary is written to a ``.json`` file, both at the
+    path returned by :func:`profile_path`.
+
+    :param section: A string. The configuration file section tested.
+    :param class_id: A string. The dotted name of the test class.
+    :param func: A function, which runs the test class.
+    :param profile_dir: A string. The directory to write profile files to.
+    :param top: An integer. How many functions and allocation sites to list.
+    :returns: A dict, as returned by :func:`summarize_profile`, with these
+        keys added: "section", "class", "wall" and "cpu" (in seconds),
+        "peak_memory" (in bytes, or ``None`` if memory was not traced) and
+        "allocations" (the ``top`` lines holding the most memory at the end,
+        as dicts with the keys "where", "size" and "count").
+
+    """
+    tracing = tracemalloc is not None and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    profiler = cProfile.Profile()
+    start_wall = monotonic()
+    start_cpu = _cpu_time()
+    profiler.enable()
+    try:
+        func()
+    finally:
+        profiler.disable()
+        wall = monotonic() - start_wall
+        cpu = _cpu_time() - start_cpu
+        snapshot = None
+        peak = None
+        if tracing:
+            peak = tracemalloc.get_traced_memory()[1]
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+    path = profile_path(profile_dir, section, class_id)
+    profiler.dump_stats(path + '.prof')
+    summary = summarize_profile(pstats.Stats(profiler), top)
+    summary.update({
+        'section': section,
+        'class': class_id,
+        'wall': wall,
+        'cpu': cpu,
+        'peak_memory': peak,
+        'allocations': _allocations(snapshot, top),
+    })
+    with open(path + '.json', 'w') as handle:
+        json.dump(summary, handle, indent=2, sort_keys=True)
+    return summary
+
+
+def summarize_profile(stats, top=TOP):
+    """Summarize the functions in a profile.
+
+    :param stats: A ``pstats.Stats`` object.
+    :param top: An integer. How many functions to list.
+    :returns: A dict with "functions" and "blocked" keys. "functions" lists
+        the ``top`` functions with the most time spent in them, excluding
+        time spent in functions they call, as dicts with the keys "function",
+        "calls", "tottime" and "cumtime". "blocked" maps each kind of
+        blocking in :data:`BLOCKING` to a number of seconds.
+
+    """
+    blocked = dict.fromkeys((kind for kind, _ in BLOCKING), 0)
+    for func, row in stats.stats.items():
+        if func[0] != '~':  # Only built-in functions block.
+            continue
+        for kind, regex in BLOCKING:
+            if regex.search(func[2]):
+                blocked[kind] += row[2]
+                break
+    return {'functions': _top_functions(stats, top), 'blocked': blocked}
+
+
+def _top_functions(stats, top):
+    """Return the ``top`` functions with the highest "tottime"."""
+    rows = sorted(
+        stats.stats.items(),
+        key=lambda item: item[1][2],
+        reverse=True,
+    )[:top]
+    return [
+        {
+            'function': pstats.func_std_string(func),
+            'calls': calls,
+            'tottime': tottime,
+            'cumtime': cumtime,
+        }
+        for func, (_, calls, tottime, cumtime, _) in rows
+    ]
+
+
+def _allocations(snapshot, top):
+    """Return the ``top`` lines that hold the most memory in a snapshot."""
+    if snapshot is None:
+        return []
+    return [
+        {
+            'where': '{0}:{1}'.format(
+                statistic.traceback[0].filename,
+                statistic.traceback[0].lineno,
+            ),
+            'size': statistic.size,
+            'count': statistic.count,
+        }
+        for statistic in snapshot.statistics('lineno')[:top]
+    ]
+
+
+def _cpu_time():
+    """Return the CPU time used by this process, in seconds."""
+    times = os.times()
+    return times[0] + times[1]
+
+
+def load_profiles(paths, top=TOP):
+    """Collect the profiles of several test classes.
+
+    :param paths: An iterable of paths, as returned by :func:`profile_path`.
+        Paths with no profile files are skipped.
+    :param top: An integer. How many functions to list.
+    :returns: A dict with "classes" and "functions" keys. "classes" is a list
+        of summaries, as returned by :func:`profile_class`, sorted from the
+        slowest class to the fastest. "functions" is as described by
+        :func:`summarize_profile`, for all classes combined.
+
+    """
+    classes = []
+    stats = None
+    for path in paths:
+        try:
+            with open(path + '.json') as handle:
+                classes.append(json.load(handle))
+        except IOError:
+            continue
+        if stats is None:
+            stats = pstats.Stats(path + '.prof')
+        else:
+            stats.add(path + '.prof')
+    classes.sort(key=lambda summary: summary['wall'], reverse=True)
+    return {
+        'classes': classes,
+        'functions': [] if stats is None else _top_functions(stats, top),
+    }
+
+
+def format_profiles(profiles, top=10):
+    """Return a human-readable summary of the profiles from a run.
+
+    :param profiles: A dict, as returned by :func:`load_profiles`.
+    :param top: An integer. How many classes and functions to list.
+    :returns: A string.
+
+    """
+    template = '{0:>9} {1:>9} {2:>9} {3:>9} {4:>9} {5:>9}  {6}'
+    lines = ['Slowest test classes:', template.format(
+        'wall', 'cpu', 'socket', 'lock', 'sleep', 'peak mem', 'class'
+    )]
+    for summary in profiles['classes'][:top]:
+        lines.append(template.format(
+            '{0:.3f}s'.format(summary['wall']),
+            '{0:.3f}s'.format(summary['cpu']),
+            '{0:.3f}s'.format(summary['blocked']['socket']),
+            '{0:.3f}s'.format(summary['blocked']['lock']),
+            '{0:.3f}s'.format(summary['blocked']['sleep']),
+            '-' if summary['peak_memory'] is None else '{0:.1f}MB'.format(
+                summary['peak_memory'] / 10 ** 6
+            ),
+            '{0} [{1}]'.format(summary['class'], summary['section']),
+        ))
+    lines.append('')
+    lines.append('Functions with the most time spent in them:')
+    template = '{0:>9} {1:>9} {2:>9}  {3}'
+    lines.append(template.format('calls', 'tottime', 'cumtime', 'function'))
+    for row in profiles['functions'][:top]:
+        lines.append(template.format(
+            row['calls'],
+            '{0:.3f}s'.format(row['tottime']),
+            '{0:.3f}s'.format(row['cumtime']),
+            row['function'],
+        ))
+    return '\n'.join(lines)
@@ -0,0 +1,208 @@
+# coding=utf-8
+"""Tools for streaming test outcomes to a file as a run goes on.
+
+By default, :func:`pulp_smash.runner.run` collects every test outcome in
+memory and returns them all once the run ends, so a run that crashes reports
+nothing. Given a results file, each worker process instead appends each
+outcome to the file as a line of JSON as soon as the test finishes. The file
+holds one :func:`pulp_smash.runner.run_classes` record per line:
+
+.. code-block:: json
+
+    {"class": "pulp_smash.tests.test_login.LoginSuccessTestCase",
+     "duration": 0.012, "message": null, "outcome": "success",
+     "section": "default",
+     "test": "pulp_smash.tests.test_login.LoginSuccessTestCase.test_body"}
+
+Lines are complete once written, so whatever has been written survives a
+crash, and a results file can be watched while a run is in progress. It can
+be converted to JUnit XML afterwards, for tools such as Jenkins:
+
+>>> from pulp_smash import results, runner
+>>> report = runner.run(['default'], results_path='results.jsonl')
+>>> with open('results.xml', 'wb') as handle:
+...     results.write_junit('results.jsonl', handle)
+
+Neither writing nor converting a results file holds more than one outcome in
+memory at a time. This module backs the ``--results`` option of ``python -m
+pulp_smash run``, and the ``python -m pulp_smash junit`` command.
+
+"""
+from __future__ import unicode_literals
+
+import json
+import re
+import threading
+from xml.sax.saxutils import XMLGenerator
+from pulp_smash.utils import locked_file
+
+
+# Maps outcomes to the JUnit element that describes them. Successes have no
+# element. JUnit has no notion of expected failures, so they count as skips.
+_JUNIT_ELEMENTS = {
+    'error': 'error',
+    'expected_failure': 'skipped',
+    'failure': 'failure',
+    'skip': 'skipped',
+    'unexpected_success': 'failure',
+}
+
+# Characters that may not appear in an XML 1.0 document.
+_INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+class ResultWriter(object):
+    """Append test outcomes to a results file, one line of JSON each.
+
+    Several processes may append to the same file at once. Each line is
+    written while holding :func:`pulp_smash.utils.locked_file`, so that lines
+    are never interleaved, and it is flushed at once, so that it survives a
+    crash of this process.
+
+    :param path: A string. The path to the results file, which is created if
+        it does not exist.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._handle = open(path, 'ab')
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, record):
+        """Append a test outcome to the results file.
+
+        :param record: A JSON-serializable dict.
+        :returns: Nothing.
+
+        """
+        line = (json.dumps(record, sort_keys=True) + '\n').encode('utf-8')
+        with locked_file(self.path, self._lock):
+            self._handle.write(line)
+            self._handle.flush()
+
+    def close(self):
+        """Close the results file."""
+        self._handle.close()
+
+
+def read_results(path):
+    """Read the test outcomes in a results file, one at a time.
+
+    A line that is not valid JSON, such as a line cut short by a crash, is
+    skipped.
+
+    :param path: A string. The path to the results file.
+    :returns: A generator of dicts, in the order in which they were written.
+
+    """
+    with open(path, 'rb') as handle:
+        for line in handle:
+            try:
+                yield json.loads(line.decode('utf-8'))
+            except ValueError:
+                continue
+
+
+def count_results(path):
+    """Count the outcomes in a results file, per section.
+
+    :param path: A string. The path to the results file.
+    :returns: A dict mapping each section name to a dict with the keys
+        "tests", "failures", "errors", "skipped" and "time", as in the
+        attributes of a JUnit ``testsuite`` element.
+
+    """
+    counts = {}
+    for record in read_results(path):
+        section = counts.setdefault(record['section'], {
+            'tests': 0,
+            'failures': 0,
+            'errors': 0,
+            'skipped': 0,
+            'time': 0,
+        })
+        section['tests'] += 1
+        section['time'] += record['duration'] or 0
+        element = _JUNIT_ELEMENTS.get(record['outcome'])
+        if element == 'error':
+            section['errors'] += 1
+        elif element == 'failure':
+            section['failures'] += 1
+        elif element == 'skipped':
+            section['skipped'] += 1
+    return counts
+
+
+def write_junit(path, handle):
+    """Convert a results file to JUnit XML.
+
+    Each configuration file section becomes a ``testsuite``, and each test
+    outcome becomes a ``testcase``. A ``testsuite`` must state its counts
+    before its test cases, so the results file is read once to count the
+    outcomes, and then once per section to write them.
+
+    :param path: A string. The path to the results file.
+    :param handle: A file object, opened for writing bytes.
+    :returns: Nothing.
+
+    """
+    counts = count_results(path)
+    totals = {
+        key: sum(section[key] for section in counts.values())
+        for key in ('tests', 'failures', 'errors', 'skipped', 'time')
+    }
+    xml = XMLGenerator(handle, 'utf-8')
+    xml.startDocument()
+    xml.startElement('testsuites', _attributes(totals))
+    for section in sorted(counts):
+        attributes = _attributes(counts[section])
+        attributes['name'] = section
+        xml.startElement('testsuite', attributes)
+        for record in read_results(path):
+            if record['section'] == section:
+                _write_testcase(xml, record)
+        xml.endElement('testsuite')
+    xml.endElement('testsuites')
+    xml.endDocument()
+
+
+def _attributes(counts):
+    """Return the attributes of a JUnit ``testsuite`` element."""
+    attributes = {key: type('')(value) for key, value in counts.items()}
+    attributes['time'] = '{0:.3f}'.format(counts['time'])
+    return attributes
+
+
+def _write_testcase(xml, record):
+    """Write a JUnit ``testcase`` element describing a test outcome."""
+    name = record['test']
+    if name.startswith(record['class'] + '.'):
+        name = name[len(record['class']) + 1:]
+    xml.startElement('testcase', {
+        'classname': record['class'],
+        'name': name,
+        'time': '{0:.3f}'.format(record['duration'] or 0),
+    })
+    element = _JUNIT_ELEMENTS.get(record['outcome'])
+    if element is not None:
+        message = _INVALID_XML.sub('', record['message'] or '')
+        if record['outcome'] == 'unexpected_success':
+            message = 'unexpected success'
+        elif record['outcome'] == 'expected_failure':
+            message = 'expected failure'
+        summary = message.strip().splitlines()[-1:] or ['']
+        xml.startElement(element, {
+            'message': summary[0],
+            'type': record['outcome'],
+        })
+        if element != 'skipped':
+            xml.characters(message)
+        xml.endElement(element)
+    xml.endElement('testcase')
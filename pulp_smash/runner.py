@@ -0,0 +1,556 @@
+# coding=utf-8
+"""Tools for running :mod:`pulp_smash.tests` against several servers at once.
+
+A configuration file may describe several servers, one per section. The
+:func:`run` function runs the test suite against each of several sections,
+with each section handled by one or more worker processes, and it returns the
+results from all sections tagged by section name:
+
+>>> from pulp_smash.runner import format_report, run
+>>> records = run(['default', 'alternate'])
+>>> print(format_report(records))
+
+Tests are run one :class:`unittest2.TestCase` class at a time, because
+``setUpClass`` lets the tests in a class share state. For the same reason,
+when the tests for a section are split across several processes, each class
+is kept whole. See :mod:`pulp_smash.sharding`. Test outcomes may also be
+written to a file as each test finishes, rather than collected in memory. See
+:mod:`pulp_smash.results`. This module backs the ``python -m pulp_smash run``
+command.
+
+"""
+from __future__ import unicode_literals
+
+import functools
+import importlib
+import multiprocessing
+import os
+from os.path import dirname
+import requests
+import unittest2
+from pulp_smash import (
+    api,
+    config,
+    fixtures,
+    incremental,
+    metrics,
+    profiling,
+    results,
+    sharding,
+    tasks,
+)
+from pulp_smash.utils import monotonic
+
+
+OUTCOMES = (
+    'success',
+    'failure',
+    'error',
+    'skip',
+    'expected_failure',
+    'unexpected_success',
+)
+"""The outcomes that a test may have."""
+
+FAILING_OUTCOMES = frozenset(('failure', 'error', 'unexpected_success'))
+"""The outcomes that make a test run unsuccessful."""
+
+TEST_PACKAGE = 'pulp_smash.tests'
+"""The package in which tests are discovered by default."""
+
+
+class _RecordingResult(unittest2.TestResult):
+    """A test result that records the outcome of each test as a dict.
+
+    Each dict has the keys "section", "class", "test", "outcome", "duration"
+    and "message". Errors raised by ``setUpClass`` and similar fixtures are
+    recorded under a test named after the fixture. If a
+    :class:`pulp_smash.results.ResultWriter` is given as the ``writer``
+    keyword argument, each dict is written to it instead of being kept in
+    ``records``.
+
+    """
+
+    def __init__(self, section, *args, **kwargs):
+        self.writer = kwargs.pop('writer', None)
+        super(_RecordingResult, self).__init__(*args, **kwargs)
+        self.section = section
+        self.records = []
+        self._started = {}
+
+    def startTest(self, test):  # pylint:disable=invalid-name
+        self._started[test.id()] = monotonic()
+        super(_RecordingResult, self).startTest(test)
+
+    def _record(self, test, outcome, message=None):
+        """Record the outcome of ``test``."""
+        test_id = test.id()
+        started = self._started.get(test_id.split(' ', 1)[0])
+        record = {
+            'section': self.section,
+            'class': _class_id(test),
+            'test': test_id,
+            'outcome': outcome,
+            'duration': None if started is None else monotonic() - started,
+            'message': message,
+        }
+        if self.writer is None:
+            self.records.append(record)
+        else:
+            self.writer.write(record)
+
+    def addSuccess(self, test):  # pylint:disable=invalid-name
+        super(_RecordingResult, self).addSuccess(test)
+        self._record(test, 'success')
+
+    def addFailure(self, test, err):  # pylint:disable=invalid-name
+        super(_RecordingResult, self).addFailure(test, err)
+        self._record(test, 'failure', self.failures[-1][1])
+
+    def addError(self, test, err):  # pylint:disable=invalid-name
+        super(_RecordingResult, self).addError(test, err)
+        self._record(test, 'error', self.errors[-1][1])
+
+    def addSkip(self, test, reason):  # pylint:disable=invalid-name
+        super(_RecordingResult, self).addSkip(test, reason)
+        self._record(test, 'skip', reason)
+
+    def addExpectedFailure(self, test, err):  # pylint:disable=invalid-name
+        super(_RecordingResult, self).addExpectedFailure(test, err)
+        self._record(test, 'expected_failure', self.expectedFailures[-1][1])
+
+    def addUnexpectedSuccess(self, test):  # pylint:disable=invalid-name
+        super(_RecordingResult, self).addUnexpectedSuccess(test)
+        self._record(test, 'unexpected_success')
+
+    def addSubTest(self, test, subtest, err):  # pylint:disable=invalid-name
+        super(_RecordingResult, self).addSubTest(test, subtest, err)
+        if err is not None:
+            outcome = 'failure'
+            if not issubclass(err[0], test.failureException):
+                outcome = 'error'
+            self._record(subtest, outcome, self._exc_info_to_string(err, test))
+
+
+def _class_id(test):
+    """Return the dotted name of the class that ``test`` belongs to.
+
+    ``test`` may also be a placeholder for a fixture error, whose ID looks like
+    "setUpClass (pulp_smash.tests.test_login.LoginSuccessTestCase)".
+
+    """
+    if hasattr(test, 'test_case'):  # A subtest.
+        test = test.test_case
+    test_id = test.id()
+    if test_id.endswith(')') and ' (' in test_id:
+        return test_id.rsplit(' (', 1)[1][:-1]
+    return '{0}.{1}'.format(type(test).__module__, type(test).__name__)
+
+
+def discover(names=None):
+    """Return the dotted names of the test classes to run.
+
+    :param names: An iterable of dotted names of test modules, classes or
+        packages. If omitted, every test in :data:`TEST_PACKAGE` is found.
+    :returns: A list of strings, such as
+        ``['pulp_smash.tests.test_login.LoginSuccessTestCase']``, in the order
+        in which the classes were found.
+
+    """
+    loader = unittest2.TestLoader()
+    if names:
+        suite = unittest2.TestSuite()
+        for name in names:
+            try:
+                module = importlib.import_module(name)
+            except ImportError:  # Perhaps a class or method name.
+                module = None
+            if hasattr(module, '__path__'):  # A package.
+                suite.addTest(_discover_package(loader, module))
+            else:
+                suite.addTest(loader.loadTestsFromName(name))
+    else:
+        package = importlib.import_module(TEST_PACKAGE)
+        suite = _discover_package(loader, package)
+    class_ids = []
+    for test in _flatten_suite(suite):
+        class_id = _class_id(test)
+        if class_id not in class_ids:
+            class_ids.append(class_id)
+    return class_ids
+
+
+def _discover_package(loader, package):
+    """Discover the tests in ``package``."""
+    start_dir = dirname(package.__file__)
+    top_level_dir = start_dir
+    for _ in package.__name__.split('.'):
+        top_level_dir = dirname(top_level_dir)
+    return loader.discover(start_dir, top_level_dir=top_level_dir)
+
+
+def _flatten_suite(suite):
+    """Return a list of the tests in ``suite`` and in its nested suites."""
+    tests = []
+    for test in suite:
+        if isinstance(test, unittest2.TestSuite):
+            tests.extend(_flatten_suite(test))
+        else:
+            tests.append(test)
+    return tests
+
+
+def _select_section(section):
+    """Make :mod:`pulp_smash.config`, :mod:`pulp_smash.api` and
+    :mod:`pulp_smash.fixtures` target ``section``, discarding any cached
+    configuration, client or fixture pool.
+
+    """
+    fixtures.close_pool()
+    os.environ['PULP_SMASH_SECTION'] = section
+    config.reset()
+    api.reset_client()
+
+
+def run_classes(section, class_ids, profile_dir=None, results_path=None):
+    """Run the given test classes against ``section``, in this process.
+
+    Each class is loaded and run in a suite of its own, and the time taken to
+    run each class, including ``setUpClass`` and ``tearDownClass``, is
+    measured.
+
+    :param section: A string. The name of a configuration file section.
+    :param class_ids: An iterable of dotted test class names.
+    :param profile_dir: A string. If given, each class is profiled with
+        :func:`pulp_smash.profiling.profile_class`, and its profile files are
+        written to this directory.
+    :param results_path: A string. If given, each test outcome is appended to
+        this results file as soon as the test finishes, with a
+        :class:`pulp_smash.results.ResultWriter`, instead of being returned.
+    :returns: A ``(records, durations, metrics)`` tuple. ``records`` is a list
+        of dicts, one per test outcome, which is empty if ``results_path`` is
+        given. ``durations`` is a dict mapping each
+        class name to the number of seconds taken to run it. ``metrics`` is a
+        report on the requests sent, as returned by
+        :meth:`pulp_smash.metrics.Recorder.report`.
+
+    """
+    _select_section(section)
+    metrics.RECORDER.reset()
+    loader = unittest2.TestLoader()
+    writer = None
+    if results_path is not None:
+        writer = results.ResultWriter(results_path)
+    result = _RecordingResult(section, writer=writer)
+    durations = {}
+    try:
+        for class_id in class_ids:
+            start = monotonic()
+            suite = loader.loadTestsFromName(class_id)
+            if profile_dir is None:
+                suite.run(result)
+            else:
+                profiling.profile_class(
+                    section,
+                    class_id,
+                    functools.partial(suite.run, result),
+                    profile_dir,
+                )
+            durations[class_id] = monotonic() - start
+    finally:
+        # Worker processes do not run atexit handlers, so clean up here.
+        fixtures.close_pool()
+        api.reset_client()
+        if writer is not None:
+            writer.close()
+    return result.records, durations, metrics.RECORDER.report()
+
+
+def _run_classes_star(args):
+    """Call :func:`run_classes` with an argument tuple."""
+    return args[0], run_classes(*args)
+
+
+def run(  # pylint:disable=too-many-arguments,too-many-locals
+        sections,
+        names=None,
+        processes=None,
+        shards=1,
+        timings=None,
+        passes=None,
+        force=False,
+        profile_dir=None,
+        results_path=None):
+    """Run tests against several configuration file sections at once.
+
+    The test classes to run against each section are split into ``shards``
+    groups, using :func:`pulp_smash.sharding.shard`, and each group is run by
+    a separate worker process.
+
+    :param sections: An iterable of configuration file section names.
+    :param names: Passed on to :func:`discover`.
+    :param processes: An integer. The maximum number of worker processes.
+        Defaults to the number of sections times ``shards``.
+    :param shards: An integer. How many worker processes to split the tests
+        for each section across.
+    :param timings: A :class:`pulp_smash.sharding.Timings` database. If given,
+        it is used to build shards of equal duration, and it is updated and
+        saved with the durations measured by this run.
+    :param passes: A :class:`pulp_smash.incremental.PassCache`. If given, test
+        classes that already passed with the same fingerprint are skipped, and
+        the cache is updated and saved with the outcomes of this run.
+    :param force: A boolean. If true, classes are not skipped, even if
+        ``passes`` is given. The cache is still updated.
+    :param profile_dir: A string. If given, each class is profiled, and its
+        profile files are written to this directory, which is created if
+        needed. See :mod:`pulp_smash.profiling`.
+    :param results_path: A string. If given, this results file is emptied,
+        and the workers append each test outcome to it as soon as the test
+        finishes, instead of returning the outcomes. See
+        :mod:`pulp_smash.results`.
+    :returns: A dict with "tests", "results", "durations", "metrics",
+        "cached", "task_timings" and "profiles" keys. "tests" is a list of
+        test outcomes, as described by :func:`run_classes`, or an empty list
+        if ``results_path`` is given. "results" is ``results_path``. Use
+        :func:`iter_tests` to read the outcomes either way. "durations" and
+        "metrics" map each section name to the values returned for that
+        section by :func:`run_classes`, combined across shards. "cached"
+        maps each section name to a list of the classes that were skipped
+        because they already passed. "task_timings" maps each section name
+        to a breakdown of the time spent queued and running by the tasks that
+        the tests spawned, as returned by
+        :func:`pulp_smash.tasks.harvest_timings`, or to ``None`` if the tasks
+        could not be fetched. "profiles" is as returned by
+        :func:`pulp_smash.profiling.load_profiles`, or ``None`` if
+        ``profile_dir`` is not given.
+
+    """
+    sections = tuple(sections)
+    class_ids = discover(names)
+    report = {
+        'tests': [],
+        'results': results_path,
+        'durations': {section: {} for section in sections},
+        'metrics': {},
+        'cached': {section: [] for section in sections},
+        'task_timings': {},
+        'profiles': None,
+    }
+    fingerprints = {}
+    jobs = []
+    for section in sections:
+        section_ids = class_ids
+        if passes is not None:
+            fingerprints[section] = _fingerprints(section, class_ids)
+            if not force:
+                section_ids = []
+                for class_id in class_ids:
+                    if passes.passed(
+                            section,
+                            class_id,
+                            fingerprints[section].get(class_id)):
+                        report['cached'][section].append(class_id)
+                    else:
+                        section_ids.append(class_id)
+        durations = {} if timings is None else timings.get(section)
+        for shard_ in sharding.shard(section_ids, durations, shards):
+            jobs.append((section, shard_, profile_dir, results_path))
+    recorders = {section: metrics.Recorder() for section in sections}
+    if profile_dir is not None and not os.path.isdir(profile_dir):
+        os.makedirs(profile_dir)
+    if results_path is not None:
+        with open(results_path, 'w'):
+            pass
+    if jobs:
+        pool = multiprocessing.Pool(
+            processes or len(jobs),
+            maxtasksperchild=1,
+        )
+        try:
+            for section, (records, durations, metrics_) in pool.imap(
+                    _run_classes_star,
+                    jobs):
+                report['tests'].extend(records)
+                report['durations'][section].update(durations)
+                recorders[section].merge(metrics_)
+        finally:
+            pool.close()
+            pool.join()
+    if profile_dir is not None:
+        report['profiles'] = profiling.load_profiles(
+            profiling.profile_path(profile_dir, section, class_id)
+            for section, shard_, _, _ in jobs
+            for class_id in shard_
+        )
+    for section in sections:
+        report['metrics'][section] = recorders[section].report()
+        report['task_timings'][section] = harvest_timings(
+            section,
+            report['metrics'][section]['tasks'],
+        )
+        if timings is not None:
+            timings.update(section, report['durations'][section])
+        if passes is not None:
+            _update_passes(passes, section, report, fingerprints[section])
+    if timings is not None:
+        timings.save()
+    if passes is not None:
+        passes.save()
+    return report
+
+
+def _fingerprints(section, class_ids):
+    """Return a dict mapping each class to its fingerprint for ``section``.
+
+    If the server cannot be reached, return an empty dict, so that every
+    class is run.
+
+    """
+    try:
+        server_fingerprint = incremental.server_fingerprint(section)
+    except requests.exceptions.RequestException:
+        return {}
+    return {
+        class_id: incremental.class_fingerprint(class_id, server_fingerprint)
+        for class_id in class_ids
+    }
+
+
+def harvest_timings(section, received):
+    """Fetch the tasks spawned while testing ``section``, and time them.
+
+    :param section: A string. The configuration file section naming the
+        server that the tasks were spawned on.
+    :param received: A dict mapping task IDs to the times at which the
+        responses that spawned them were received, as in the "tasks" of a
+        :meth:`pulp_smash.metrics.Recorder.report`.
+    :returns: The breakdown returned by
+        :func:`pulp_smash.tasks.harvest_timings`, or ``None`` if the server
+        cannot be reached.
+
+    """
+    if not received:
+        return []
+    server_config = config.ServerConfig.read(section)
+    try:
+        with api.Client(server_config, recorder=None) as client:
+            return tasks.harvest_timings(client, received)
+    except requests.exceptions.RequestException:
+        return None
+
+
+def _update_passes(passes, section, report, fingerprints):
+    """Record which of the classes run against ``section`` passed.
+
+    A failing record may name a module rather than a class, if
+    ``setUpModule`` failed, in which case every class in it has failed.
+
+    """
+    failed = {
+        record['class'] for record in iter_tests(report)
+        if record['section'] == section and
+        record['outcome'] in FAILING_OUTCOMES
+    }
+    for class_id in report['durations'][section]:
+        if any(class_id == name or class_id.startswith(name + '.')
+               for name in failed):
+            passes.update(section, class_id, None)
+        else:
+            passes.update(section, class_id, fingerprints.get(class_id))
+
+
+def iter_tests(report):
+    """Return the test outcomes in a :func:`run` report.
+
+    :param report: A dict, as returned by :func:`run`.
+    :returns: An iterable of test outcomes, as described by
+        :func:`run_classes`. If the outcomes were written to a results file,
+        they are read from it one at a time.
+
+    """
+    if report.get('results') is None:
+        return report['tests']
+    return results.read_results(report['results'])
+
+
+def summarize(records):
+    """Count the outcomes of tests, per section.
+
+    :param records: An iterable of test outcomes, as described by
+        :func:`run_classes`.
+    :returns: A dict mapping section names to dicts, which map each of
+        :data:`OUTCOMES` to a count.
+
+    """
+    summary = {}
+    for record in records:
+        counts = summary.setdefault(
+            record['section'],
+            dict.fromkeys(OUTCOMES, 0),
+        )
+        counts[record['outcome']] += 1
+    return summary
+
+
+def was_successful(summary):
+    """Tell whether a :func:`summarize` summary lists no failures or errors."""
+    return not any(
+        counts[outcome]
+        for counts in summary.values()
+        for outcome in FAILING_OUTCOMES
+    )
+
+
+def format_summary(summary):
+    """Return a human-readable table describing a :func:`summarize` summary.
+
+    :returns: A string.
+
+    """
+    width = max([len('section')] + [len(section) for section in summary])
+    lines = ['  '.join(
+        ['section'.ljust(width)] + list(OUTCOMES)
+    )]
+    for section in sorted(summary):
+        lines.append('  '.join(
+            [section.ljust(width)] + [
+                type('')(summary[section][outcome]).rjust(len(outcome))
+                for outcome in OUTCOMES
+            ]
+        ))
+    return '\n'.join(lines)
+
+
+def format_report(report):
+    """Return a human-readable description of a :func:`run` report.
+
+    Each failure and error is described, followed by a breakdown of task
+    timings for each section that spawned tasks, a summary of any profiles,
+    and a :func:`format_summary` table.
+
+    :returns: A string.
+
+    """
+    lines = []
+    for record in iter_tests(report):
+        if record['outcome'] in ('failure', 'error'):
+            lines.append('=' * 70)
+            lines.append('{0}: {1} [{2}]'.format(
+                record['outcome'].upper(), record['test'], record['section']
+            ))
+            lines.append('-' * 70)
+            lines.append(record['message'])
+    cached = sum(len(ids) for ids in report.get('cached', {}).values())
+    if cached:
+        lines.append(
+            '{0} test classes were skipped, because they passed on an '
+            'earlier run and nothing has changed since.'.format(cached)
+        )
+    for section, breakdown in sorted(report.get('task_timings', {}).items()):
+        if breakdown:
+            lines.append('Task timings [{0}]:'.format(section))
+            lines.append(tasks.format_timings(breakdown))
+    if report.get('profiles'):
+        lines.append(profiling.format_profiles(report['profiles']))
+    lines.append(format_summary(summarize(iter_tests(report))))
+    return '\n'.join(lines)
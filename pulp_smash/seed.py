@@ -0,0 +1,478 @@
+# coding=utf-8
+"""Tools for filling a Pulp server with data for scale tests.
+
+Testing how an operation such as regenerating applicability scales needs
+thousands of consumers and repositories, bound together, and creating them
+one at a time takes hours. A :class:`Seeder` creates them from a declarative
+spec, through a bounded pool of concurrent requests. A spec looks like this::
+
+    {
+        "prefix": "scale",
+        "repositories": {"count": 1000, "attrs": {"notes": {"a": "b"}}},
+        "consumers": {"count": 20000},
+        "bindings": {"per_consumer": 3, "distributor_id": "yum_distributor"},
+        "profiles": {"content_type": "rpm", "packages": 200},
+        "errata": {"per_repository": 50}
+    }
+
+Every key except "prefix" is optional. The ID of each repository and
+consumer is derived from the prefix and its index, such as
+``scale-consumer-00042``. Bindings are dealt out to the repositories in
+turn, so that each repository has about as many bindings as any other, and no
+consumer is bound to the same repository twice. Each consumer is given a
+profile listing the same generated packages. The same errata are imported into
+every repository, and each erratum updates one of the profiled packages, so
+that it applies to every consumer bound to the repository.
+
+Resources are created in stages: repositories, errata, consumers, bindings and
+then profiles. Each completed step is appended to a journal file, so that an
+interrupted seeding may be resumed without repeating work. A step that spawns
+tasks, such as an erratum import, is complete once its tasks finish. Those
+tasks are waited for in batches, once as many steps have spawned tasks as
+requests may be in flight, and at the end of each stage. Payloads are
+generated only as they are needed, so apart from the keys read from the
+journal, memory use does not grow with the counts in the spec:
+
+>>> from pulp_smash.api import get_client
+>>> from pulp_smash.seed import Seeder, load_spec
+>>> seeder = Seeder(get_client(), load_spec('spec.json'), 'seed.journal')
+>>> seeder.seed()
+>>> seeder.teardown()
+
+This module backs the ``python -m pulp_smash seed`` command.
+
+"""
+from __future__ import unicode_literals
+
+import json
+import os
+import threading
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+from pulp_smash.constants import (
+    CONSUMER_PATH,
+    CONTENT_UPLOAD_PATH,
+    REPOSITORY_PATH,
+)
+from pulp_smash.tasks import (
+    raise_for_tasks,
+    spawned_task_hrefs,
+    task_id,
+    wait_for_tasks,
+)
+
+
+Step = namedtuple('Step', ('key', 'method', 'path', 'payload'))
+"""A single request made while seeding or tearing down.
+
+``key``
+    A string that identifies the step in the journal.
+``method``
+    A string, such as "POST".
+``path``
+    A string. The path to send the request to.
+``payload``
+    A JSON-serializable value to send, or ``None`` to send no body.
+
+"""
+
+
+def load_spec(path):
+    """Read a spec from a JSON file.
+
+    :param path: A string. The path to the file.
+    :returns: A dict.
+    :raises ValueError: If the spec has no "prefix".
+
+    """
+    with open(path) as handle:
+        spec = json.load(handle)
+    if not spec.get('prefix'):
+        raise ValueError('The spec in {0} has no "prefix".'.format(path))
+    return spec
+
+
+class Seeder(object):
+    """Create the resources described by a spec, and delete them later.
+
+    :param client: A :class:`pulp_smash.api.Client` object.
+    :param spec: A dict, as returned by :func:`load_spec`.
+    :param journal: A string. The path to a journal file, in which completed
+        steps are recorded. It need not exist.
+    :param concurrency: An integer. The maximum number of requests that may be
+        in flight at once.
+    :param progress: A function, which is called with a stage name, the
+        number of steps in that stage completed so far, and the total number
+        of steps in the stage, after each step. It is called from several
+        threads, but never from two at once.
+
+    """
+
+    def __init__(  # pylint:disable=too-many-arguments
+            self,
+            client,
+            spec,
+            journal,
+            concurrency=10,
+            progress=None):
+        self.client = client
+        self.spec = spec
+        self.journal = journal
+        self.concurrency = concurrency
+        self.progress = progress
+        self._lock = threading.Lock()
+
+    def repo_id(self, i):
+        """Return the ID of the ``i``-th repository."""
+        return '{0}-repository-{1:05d}'.format(self.spec['prefix'], i)
+
+    def consumer_id(self, i):
+        """Return the ID of the ``i``-th consumer."""
+        return '{0}-consumer-{1:05d}'.format(self.spec['prefix'], i)
+
+    def erratum_id(self, i):
+        """Return the ID of the ``i``-th erratum."""
+        return '{0}-erratum-{1:05d}'.format(self.spec['prefix'], i)
+
+    def stages(self, upload_id=None):
+        """Return the stages needed to create the resources in the spec.
+
+        :param upload_id: A string. The ID of an upload request from which
+            errata are imported. Pulp ignores the request's contents.
+        :returns: A list of ``(name, total, steps)`` tuples, where ``steps``
+            is an iterator that lazily yields ``total`` :data:`Step` tuples.
+
+        """
+        repos = self.spec.get('repositories', {}).get('count', 0)
+        errata = self.spec.get('errata', {}).get('per_repository', 0)
+        consumers = self.spec.get('consumers', {}).get('count', 0)
+        bindings = self.spec.get('bindings', {}).get('per_consumer', 0)
+        if repos:
+            bindings = min(bindings, repos)
+        else:
+            bindings = 0
+        stages = [
+            ('repositories', repos, self._repository_steps(repos)),
+        ]
+        if 'errata' in self.spec:
+            stages.append((
+                'errata',
+                repos * errata,
+                self._erratum_steps(repos, errata, upload_id),
+            ))
+        stages += [
+            ('consumers', consumers, self._consumer_steps(consumers)),
+            (
+                'bindings',
+                consumers * bindings,
+                self._binding_steps(consumers, repos, bindings),
+            ),
+        ]
+        if 'profiles' in self.spec:
+            stages.append((
+                'profiles',
+                consumers,
+                self._profile_steps(consumers),
+            ))
+        return stages
+
+    def _repository_steps(self, count):
+        """Yield steps that create repositories."""
+        attrs = self.spec.get('repositories', {}).get('attrs', {})
+        for i in range(count):
+            repo_id = self.repo_id(i)
+            yield Step(
+                'repository:' + repo_id,
+                'POST',
+                REPOSITORY_PATH,
+                dict(attrs, id=repo_id),
+            )
+
+    def _erratum_steps(self, repos, per_repo, upload_id):
+        """Yield steps that import errata into repositories."""
+        packages = self.spec.get('profiles', {}).get('packages', 0) or 1
+        for i in range(repos):
+            repo_id = self.repo_id(i)
+            for j in range(per_repo):
+                erratum_id = self.erratum_id(j)
+                package = {
+                    'arch': 'noarch',
+                    'epoch': '0',
+                    'filename': 'package-{0}-2.0-1.noarch.rpm'.format(
+                        j % packages
+                    ),
+                    'name': 'package-{0}'.format(j % packages),
+                    'release': '1',
+                    'src': 'package-{0}-2.0-1.src.rpm'.format(j % packages),
+                    'version': '2.0',
+                }
+                yield Step(
+                    'erratum:{0}:{1}'.format(repo_id, erratum_id),
+                    'POST',
+                    '{0}{1}/actions/import_upload/'.format(
+                        REPOSITORY_PATH,
+                        repo_id,
+                    ),
+                    {
+                        'unit_key': {'id': erratum_id},
+                        'unit_metadata': {
+                            'description': 'Generated by pulp_smash.seed.',
+                            'issued': '2015-01-01 00:00:00',
+                            'pkglist': [{
+                                'name': 'collection',
+                                'packages': [package],
+                                'short': '',
+                            }],
+                            'severity': 'Moderate',
+                            'status': 'final',
+                            'title': erratum_id,
+                            'type': 'bugfix',
+                            'version': '1',
+                        },
+                        'unit_type_id': 'erratum',
+                        'upload_id': upload_id,
+                    },
+                )
+
+    def _consumer_steps(self, count):
+        """Yield steps that register consumers."""
+        attrs = self.spec.get('consumers', {}).get('attrs', {})
+        for i in range(count):
+            consumer_id = self.consumer_id(i)
+            yield Step(
+                'consumer:' + consumer_id,
+                'POST',
+                CONSUMER_PATH,
+                dict(attrs, id=consumer_id),
+            )
+
+    def _binding_steps(self, consumers, repos, per_consumer):
+        """Yield steps that bind consumers to repositories."""
+        distributor_id = self.spec.get('bindings', {}).get(
+            'distributor_id',
+            'yum_distributor',
+        )
+        for i in range(consumers):
+            consumer_id = self.consumer_id(i)
+            for j in range(per_consumer):
+                repo_id = self.repo_id((i * per_consumer + j) % repos)
+                yield Step(
+                    'binding:{0}:{1}'.format(consumer_id, repo_id),
+                    'POST',
+                    '{0}{1}/bindings/'.format(CONSUMER_PATH, consumer_id),
+                    {
+                        'distributor_id': distributor_id,
+                        'notify_agent': False,
+                        'repo_id': repo_id,
+                    },
+                )
+
+    def _profile_steps(self, count):
+        """Yield steps that upload a profile for each consumer."""
+        content_type = self.spec['profiles'].get('content_type', 'rpm')
+        packages = [{
+            'arch': 'noarch',
+            'epoch': 0,
+            'name': 'package-{0}'.format(i),
+            'release': '1',
+            'vendor': '',
+            'version': '1.{0}'.format(i % 10),
+        } for i in range(self.spec['profiles'].get('packages', 0))]
+        for i in range(count):
+            consumer_id = self.consumer_id(i)
+            yield Step(
+                'profile:' + consumer_id,
+                'POST',
+                '{0}{1}/profiles/'.format(CONSUMER_PATH, consumer_id),
+                {'content_type': content_type, 'profile': packages},
+            )
+
+    def seed(self):
+        """Create every resource in the spec that has not yet been created.
+
+        Steps listed in the journal are skipped. A step that fails because
+        its resource already exists counts as complete. If any other step
+        fails, no more steps are started, and the first error is raised once
+        the steps in flight have finished. Tasks spawned by the steps, such as
+        erratum imports, are waited for whenever ``concurrency`` steps have
+        spawned tasks, and at the end of each stage. A step is journaled only
+        once its tasks have finished, and if a task fails, no more steps are
+        started.
+
+        :returns: A dict mapping each stage name to the number of steps that
+            were performed, rather than skipped.
+        :raises requests.exceptions.HTTPError: If a step fails.
+        :raises pulp_smash.tasks.TaskFailedError: If a spawned task fails.
+
+        """
+        done = set()
+        if os.path.exists(self.journal):
+            with open(self.journal) as handle:
+                done.update(line.rstrip('\n') for line in handle)
+        performed = {}
+        pending = []  # (key, hrefs) pairs for steps with unfinished tasks.
+        upload_id = None
+        if self.spec.get('errata', {}).get('per_repository'):
+            response = self.client.post(CONTENT_UPLOAD_PATH)
+            response.raise_for_status()
+            upload_id = response.json()['upload_id']
+        try:
+            with open(self.journal, 'a') as journal:
+                def record(step, response):
+                    """Record a successful step in the journal."""
+                    if response.status_code != 409:
+                        response.raise_for_status()
+                    if response.status_code == 202:
+                        pending.append(
+                            (step.key, spawned_task_hrefs(response.json()))
+                        )
+                        if len(pending) >= self.concurrency:
+                            self._finish_tasks(pending, journal)
+                    else:
+                        journal.write(step.key + '\n')
+                        journal.flush()
+
+                try:
+                    for name, total, steps in self.stages(upload_id):
+                        performed[name] = self._run_stage(
+                            name,
+                            total,
+                            steps,
+                            done,
+                            record,
+                        )
+                        self._finish_tasks(pending, journal)
+                except BaseException:
+                    # Tasks that are still queued may need the upload request,
+                    # so let them finish before it is deleted below.
+                    try:
+                        self._finish_tasks(pending, journal)
+                    except Exception:  # pylint:disable=broad-except
+                        pass
+                    raise
+        finally:
+            if upload_id is not None:
+                self.client.delete(
+                    '{0}{1}/'.format(CONTENT_UPLOAD_PATH, upload_id)
+                )
+        return performed
+
+    def _finish_tasks(self, pending, journal):
+        """Wait for the tasks spawned by steps, and journal those steps.
+
+        A step is journaled only if all of its tasks finished. ``pending`` is
+        emptied.
+
+        :raises pulp_smash.tasks.TaskFailedError: If a task fails.
+
+        """
+        if not pending:
+            return
+        report = wait_for_tasks(
+            self.client,
+            [href for _, hrefs in pending for href in hrefs],
+        )
+        for key, hrefs in pending:
+            if all(
+                    report.tasks[task_id(href)]['state'] == 'finished'
+                    for href in hrefs):
+                journal.write(key + '\n')
+        journal.flush()
+        del pending[:]
+        raise_for_tasks(report)
+
+    def teardown(self):
+        """Delete every resource in the spec, and then the journal.
+
+        Deleting a consumer also deletes its bindings and profiles. Resources
+        that do not exist are ignored. Tasks spawned by the deletions are
+        waited for.
+
+        :returns: Nothing.
+        :raises requests.exceptions.HTTPError: If a deletion fails.
+
+        """
+        hrefs = []
+
+        def record(step, response):  # pylint:disable=unused-argument
+            """Check a deletion, and collect the tasks it spawned."""
+            if response.status_code == 404:
+                return
+            response.raise_for_status()
+            if response.status_code == 202:
+                hrefs.extend(spawned_task_hrefs(response.json()))
+
+        consumers = self.spec.get('consumers', {}).get('count', 0)
+        repos = self.spec.get('repositories', {}).get('count', 0)
+        for name, total, path, id_func in (
+                ('consumers', consumers, CONSUMER_PATH, self.consumer_id),
+                ('repositories', repos, REPOSITORY_PATH, self.repo_id)):
+            steps = (
+                Step(None, 'DELETE', '{0}{1}/'.format(path, id_func(i)), None)
+                for i in range(total)
+            )
+            self._run_stage(name, total, steps, set(), record)
+        wait_for_tasks(self.client, hrefs)
+        if os.path.exists(self.journal):
+            os.remove(self.journal)
+
+    def _run_stage(  # pylint:disable=too-many-arguments
+            self,
+            name,
+            total,
+            steps,
+            done,
+            record):
+        """Perform ``steps`` concurrently, and return how many were sent.
+
+        Steps whose keys are in ``done`` are skipped. No more than
+        ``concurrency`` steps are generated ahead of the steps in flight.
+        ``record`` is called with each step and its response, while holding
+        this seeder's lock.
+
+        """
+        slots = threading.BoundedSemaphore(self.concurrency)
+        pool = ThreadPool(self.concurrency)
+        counts = {'completed': 0, 'sent': 0}
+        errors = []
+
+        def perform(step):
+            """Send a single step, and record its outcome."""
+            try:
+                response = self.client.request(
+                    step.method,
+                    step.path,
+                    json=step.payload,
+                )
+                with self._lock:
+                    record(step, response)
+                    counts['sent'] += 1
+                    self._advance(name, counts, total)
+            except Exception as err:  # pylint:disable=broad-except
+                errors.append(err)
+            finally:
+                slots.release()
+
+        try:
+            for step in steps:
+                if errors:
+                    break
+                if step.key is not None and step.key in done:
+                    with self._lock:
+                        self._advance(name, counts, total)
+                    continue
+                slots.acquire()
+                pool.apply_async(perform, (step,))
+            pool.close()
+            pool.join()
+        finally:
+            pool.terminate()
+        if errors:
+            raise errors[0]
+        return counts['sent']
+
+    def _advance(self, name, counts, total):
+        """Count a completed step, and report progress."""
+        counts['completed'] += 1
+        if self.progress is not None:
+            self.progress(name, counts['completed'], total)
@@ -0,0 +1,124 @@
+# coding=utf-8
+"""Tools for splitting the test suite into shards of equal duration.
+
+:func:`pulp_smash.runner.run` can split the test classes it runs against a
+configuration file section across several worker processes. Splitting them
+evenly by count is not much use, because a single class may take longer than
+dozens of others put together. Instead, the time taken to run each class is
+recorded in a :class:`Timings` database, and on later runs, :func:`shard`
+uses those times to build shards that should finish at about the same time:
+
+>>> from pulp_smash.sharding import Timings, shard
+>>> timings = Timings(Timings.default_path())
+>>> shards = shard(['a.A', 'a.B', 'b.C'], timings.get('default'), 2)
+
+Test classes are never split across shards, because ``setUpClass`` lets the
+tests in a class share state.
+
+"""
+from __future__ import division, unicode_literals
+
+import heapq
+from os.path import join
+from xdg import BaseDirectory
+from pulp_smash.jsonstore import JsonStore
+
+
+SMOOTHING = 0.5
+"""The weight given to a new measurement when :class:`Timings` is updated.
+
+Each stored duration is an exponentially weighted moving average, so that a
+single slow run does not upset the schedule for long.
+
+"""
+
+
+class Timings(JsonStore):
+    """A database of how long each test class takes to run.
+
+    Durations are stored per configuration file section, because different
+    servers may be very different in speed. The database is a
+    :class:`pulp_smash.jsonstore.JsonStore`, so several runs may save it at
+    once.
+
+    :param path: A string. The file in which durations are stored. It need
+        not exist.
+
+    """
+
+    @staticmethod
+    def default_path():
+        """Return the path to a database in Pulp Smash's XDG cache dir."""
+        cache_dir = BaseDirectory.save_cache_path('pulp_smash')
+        return join(cache_dir, 'timings.json')
+
+    def get(self, section):
+        """Return the durations recorded for ``section``.
+
+        :param section: A string. The name of a configuration file section.
+        :returns: A dict mapping dotted test class names to numbers of
+            seconds.
+
+        """
+        return dict(self._sections.get(section, {}))
+
+    def update(self, section, durations):
+        """Fold new measurements for ``section`` into the database.
+
+        :param section: A string. The name of a configuration file section.
+        :param durations: A dict mapping dotted test class names to numbers of
+            seconds.
+        :returns: Nothing.
+
+        """
+        stored = self._sections.get(section, {})
+        for class_id, duration in durations.items():
+            if class_id in stored:
+                duration = (
+                    SMOOTHING * duration + (1 - SMOOTHING) * stored[class_id]
+                )
+            self._set(section, class_id, duration)
+
+
+def shard(class_ids, durations, count):
+    """Split test classes into ``count`` shards of about equal duration.
+
+    Classes are handed out longest first, each to the shard with the least
+    work so far. This is the "longest processing time" rule, and its schedule
+    is never more than a third longer than the best possible schedule.
+    Classes with no recorded duration are assumed to take as long as the
+    average class that does, or one second if no durations are known.
+
+    :param class_ids: A sequence of dotted test class names.
+    :param durations: A dict mapping dotted test class names to numbers of
+        seconds, as returned by :meth:`Timings.get`.
+    :param count: An integer. The number of shards to make.
+    :returns: A list of at most ``count`` non-empty lists of class names.
+        Within each shard, classes are in the same order as in ``class_ids``.
+    :raises ValueError: If ``count`` is less than one.
+
+    """
+    if count < 1:
+        raise ValueError(
+            'At least one shard is needed, but {0} were asked for.'
+            .format(count)
+        )
+    known = [durations[class_id] for class_id in class_ids
+             if class_id in durations]
+    default = sum(known) / len(known) if known else 1
+    order = {class_id: i for i, class_id in enumerate(class_ids)}
+
+    def cost(class_id):
+        """Return the expected duration of a class."""
+        return durations.get(class_id, default)
+
+    heap = [(0, i, []) for i in range(count)]
+    for class_id in sorted(class_ids, key=lambda x: (-cost(x), order[x])):
+        total, i, shard_ = heapq.heappop(heap)
+        shard_.append(class_id)
+        heapq.heappush(heap, (total + cost(class_id), i, shard_))
+    return [
+        sorted(shard_, key=order.get)
+        for _, _, shard_ in sorted(heap, key=lambda item: item[1])
+        if shard_
+    ]
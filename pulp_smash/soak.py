@@ -0,0 +1,416 @@
+# coding=utf-8
+"""Tools for running a workload for a long time, and watching for drift.
+
+A server that is fast for a minute may slow down over hours, as caches grow,
+connections leak or memory fragments. :func:`soak` calls a workload over and
+over for a fixed duration, splits that duration into fixed windows, and
+records the latency percentiles of the requests sent in each window. Given
+the name of a server process that runs on this host, it also records the
+memory that the process uses at the end of each window. Once the run ends,
+each series is checked with the Mann-Kendall trend test, and a series that
+grows from window to window is flagged as drifting:
+
+>>> from pulp_smash import load, soak
+>>> from pulp_smash.api import Client
+>>> from pulp_smash.config import get_config
+>>> from pulp_smash.metrics import Recorder
+>>> recorder = Recorder()
+>>> client = Client(get_config(), recorder=recorder)
+>>> step = soak.request_mix(client, load.ENDPOINTS.values())
+>>> report = soak.soak(recorder, step, 3600, window=60, process_name='httpd')
+>>> print(soak.format_report(report))
+
+A workload is a function that takes no arguments and returns a number of
+failures. :func:`request_mix` and :func:`class_loop` make workloads. About
+six windows are needed before a steady rise is significant at the default
+:data:`ALPHA`, and more windows catch slower drift.
+
+This module backs the ``python -m pulp_smash soak`` command.
+
+"""
+from __future__ import division, unicode_literals
+
+import csv
+import itertools
+import os
+import threading
+from os.path import join
+import unittest2
+from requests.exceptions import RequestException
+from pulp_smash import metrics, runner, stats
+from pulp_smash.utils import monotonic
+
+
+ALPHA = 0.01
+"""The p-value below which a rising series is flagged as drifting."""
+
+COLUMNS = (
+    'window', 'start', 'requests', 'errors', 'failures', 'p50', 'p95', 'p99',
+    'rss'
+)
+"""The keys of each window, in the order in which they are written to CSV."""
+
+PROC_DIR = '/proc'
+"""Where :func:`process_rss` looks for processes."""
+
+SERIES = ('p50', 'p95', 'p99', 'rss')
+"""The keys of each window that are checked for drift."""
+
+_TEMPLATE = '{0:>6} {1:>8} {2:>8} {3:>6} {4:>8} {5:>7} {6:>7} {7:>7} {8:>9}'
+
+WINDOW_HEADER = _TEMPLATE.format(*COLUMNS)
+"""A header for the lines returned by :func:`format_window`."""
+
+
+def request_mix(client, calls):
+    """Return a workload that sends each of several requests in turn.
+
+    The workload may be called from several threads at once.
+
+    :param client: A :class:`pulp_smash.api.Client` object.
+    :param calls: An iterable of ``(method, path, payload)`` triples, such as
+        the values of :data:`pulp_smash.load.ENDPOINTS`.
+    :returns: A function that sends the next request, and returns 1 if it
+        raised an exception or received a 4XX or 5XX response, or 0
+        otherwise.
+
+    """
+    calls = itertools.cycle(tuple(calls))
+    lock = threading.Lock()
+
+    def step():
+        """Send the next request."""
+        with lock:
+            method, path, payload = next(calls)
+        kwargs = {} if payload is None else {'json': payload}
+        try:
+            response = client.request(method, path, **kwargs)
+        except RequestException:
+            return 1
+        return int(response.status_code >= 400)
+
+    return step
+
+
+def class_loop(names=None):
+    """Return a workload that runs test classes.
+
+    The test classes send requests with :func:`pulp_smash.api.get_client`,
+    so their latencies are recorded by :data:`pulp_smash.metrics.RECORDER`.
+    The workload must not be called from more than one thread at once.
+
+    :param names: An iterable of dotted names of test packages, modules or
+        classes, as accepted by :func:`pulp_smash.runner.discover`.
+    :returns: A function that runs each test class once, and returns the
+        number of tests that failed or raised an error.
+
+    """
+    class_ids = runner.discover(names)
+    loader = unittest2.TestLoader()
+
+    def step():
+        """Run each test class once."""
+        result = unittest2.TestResult()
+        for class_id in class_ids:
+            loader.loadTestsFromName(class_id).run(result)
+        return len(result.failures) + len(result.errors)
+
+    return step
+
+
+def process_rss(name, proc_dir=PROC_DIR):
+    """Return the resident memory used by the processes with a given name.
+
+    A process matches if its name, as shown in ``/proc/<pid>/comm``, is
+    ``name``, or if ``name`` appears in its command line. This process never
+    matches. Only processes on this host can be seen, so this is only useful
+    when the server runs on the same host as Pulp Smash.
+
+    :param name: A string, such as "httpd" or "celery".
+    :param proc_dir: A string. Where the ``proc`` filesystem is mounted.
+    :returns: The total resident memory of the matching processes in bytes,
+        or ``None`` if no process matches.
+
+    """
+    name = name.encode('utf-8')
+    total = None
+    for pid in os.listdir(proc_dir):
+        if not pid.isdigit() or int(pid) == os.getpid():
+            continue
+        directory = join(proc_dir, pid)
+        try:
+            with open(join(directory, 'comm'), 'rb') as handle:
+                comm = handle.read().strip()
+            with open(join(directory, 'cmdline'), 'rb') as handle:
+                cmdline = handle.read().replace(b'\0', b' ')
+            if comm != name and name not in cmdline:
+                continue
+            rss = _vm_rss(join(directory, 'status'))
+        except (IOError, OSError):  # The process has exited.
+            continue
+        if rss is not None:  # Kernel threads have no resident memory.
+            total = (total or 0) + rss
+    return total
+
+
+def _vm_rss(path):
+    """Read the resident memory, in bytes, from a ``/proc/<pid>/status``."""
+    with open(path, 'rb') as handle:
+        for line in handle:
+            if line.startswith(b'VmRSS:'):
+                return int(line.split()[1]) * 1024
+    return None
+
+
+def soak(  # pylint:disable=too-many-arguments,too-many-locals
+        recorder,
+        step,
+        duration,
+        window=60,
+        concurrency=1,
+        process_name=None,
+        alpha=ALPHA,
+        on_window=None):
+    """Call a workload repeatedly for ``duration`` seconds, in windows.
+
+    :param recorder: A :class:`pulp_smash.metrics.Recorder`, which records
+        the requests that the workload sends. It is reset when the run starts
+        and at the end of each window.
+    :param step: A workload, such as one returned by :func:`request_mix`.
+    :param duration: A number. How many seconds to run for.
+    :param window: A number. How many seconds each window lasts. The last
+        window may be shorter.
+    :param concurrency: An integer. How many threads call the workload.
+    :param process_name: A string. If given, the memory used by the processes
+        with this name is sampled at the end of each window with
+        :func:`process_rss`.
+    :param alpha: A number. See :func:`find_drift`.
+    :param on_window: A function, or ``None``. If given, it is called with
+        each window as soon as the window ends.
+    :returns: A dict with the keys "windows" (a list of dicts, one per window,
+        each with the keys in :data:`COLUMNS`), "trends" and "drifting", as
+        returned by :func:`find_drift`.
+    :raises ValueError: If ``duration`` or ``window`` is not positive, or if
+        ``concurrency`` is less than one.
+    :raises: Whatever exception the workload raises. The run stops as soon as
+        the workload raises an exception.
+
+    """
+    if duration <= 0 or window <= 0:
+        raise ValueError(
+            'The duration and window must be positive, but are {0} and {1}.'
+            .format(duration, window)
+        )
+    if concurrency < 1:
+        raise ValueError(
+            'At least one thread is needed, but {0} were asked for.'
+            .format(concurrency)
+        )
+    lock = threading.Lock()
+    failures = [0]
+    errors = []
+    stopped = threading.Event()
+    recorder.reset()
+    start = monotonic()
+    deadline = start + duration
+
+    def work():
+        """Call the workload until the deadline passes, or another fails."""
+        while monotonic() < deadline and not stopped.is_set():
+            try:
+                failed = step()
+            except Exception as err:  # pylint:disable=broad-except
+                with lock:
+                    errors.append(err)
+                stopped.set()
+                return
+            if failed:
+                with lock:
+                    failures[0] += failed
+
+    threads = tuple(threading.Thread(target=work) for _ in range(concurrency))
+    for thread in threads:
+        thread.start()
+    windows = []
+    try:
+        while True:
+            # Compare offsets, not times, as adding them to a large clock
+            # reading may round the last window's end short of the deadline.
+            offset = len(windows) * window
+            last = offset + window >= duration
+            window_start = start + offset
+            if not last:
+                stopped.wait(max(window_start + window - monotonic(), 0))
+            else:
+                # Include the requests that are in flight at the deadline.
+                for thread in threads:
+                    thread.join()
+            if errors:
+                break
+            with lock:
+                failed, failures[0] = failures[0], 0
+            row = summarize_window(recorder.report(reset=True))
+            row.update({
+                'window': len(windows),
+                'start': window_start - start,
+                'failures': failed,
+                'rss': None,
+            })
+            if process_name is not None:
+                row['rss'] = process_rss(process_name)
+            windows.append(row)
+            if on_window is not None:
+                on_window(row)
+            if last:
+                break
+    finally:
+        stopped.set()
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
+    report = {'windows': windows}
+    report.update(find_drift(windows, alpha))
+    return report
+
+
+def summarize_window(report):
+    """Summarize the requests recorded during a window.
+
+    :param report: A dict, as returned by
+        :meth:`pulp_smash.metrics.Recorder.report`.
+    :returns: A dict with the keys "requests", "errors", "p50", "p95" and
+        "p99". Latencies are in seconds, or ``None`` if no request was sent.
+        They are computed from the endpoints' samples, which are exact unless
+        more than :data:`pulp_smash.metrics.SAMPLE_SIZE` requests were sent.
+
+    """
+    histogram = metrics.Histogram()
+    errors = 0
+    for endpoint in report['endpoints']:
+        histogram.merge(endpoint['latency'])
+        errors += endpoint['errors']
+    summary = {'requests': histogram.count, 'errors': errors}
+    for pct in stats.PERCENTILES:
+        summary['p{0}'.format(pct)] = stats.percentile(
+            sorted(histogram.samples),
+            pct,
+        )
+    return summary
+
+
+def find_drift(windows, alpha=ALPHA):
+    """Check each series in :data:`SERIES` for an upward trend.
+
+    :param windows: A list of dicts, as in the report returned by
+        :func:`soak`.
+    :param alpha: A number. The p-value below which a rising series is
+        flagged as drifting.
+    :returns: A dict with the keys "trends" and "drifting". "trends" maps each
+        series to a dict with the keys "s" and "p", as returned by
+        :func:`pulp_smash.stats.mann_kendall`, and "drifting", or to ``None``
+        if the series has fewer than two values. "drifting" is a sorted list
+        of the series that are drifting.
+
+    """
+    trends = {}
+    for key in SERIES:
+        values = [row[key] for row in windows if row[key] is not None]
+        if len(values) < 2:
+            trends[key] = None
+            continue
+        s_value, p_value = stats.mann_kendall(values)
+        trends[key] = {
+            's': s_value,
+            'p': p_value,
+            'drifting': s_value > 0 and p_value < alpha,
+        }
+    return {
+        'trends': trends,
+        'drifting': sorted(
+            key for key, trend in trends.items() if trend and trend['drifting']
+        ),
+    }
+
+
+def csv_writer(handle):
+    """Return a writer for windows, having written a header to ``handle``.
+
+    :param handle: A file object, opened for writing text.
+    :returns: A ``csv.DictWriter``. Pass each window to its ``writerow``
+        method. Latencies are in seconds, and memory is in bytes.
+
+    """
+    writer = csv.DictWriter(handle, COLUMNS)
+    writer.writeheader()
+    return writer
+
+
+def format_window(row):
+    """Return a one-line, human-readable description of a window.
+
+    The columns line up with :data:`WINDOW_HEADER`.
+
+    :param row: A dict, as in the report returned by :func:`soak`.
+    :returns: A string.
+
+    """
+    return _TEMPLATE.format(
+        row['window'],
+        '{0:.1f}s'.format(row['start']),
+        row['requests'],
+        row['errors'],
+        row['failures'],
+        _format_ms(row['p50']),
+        _format_ms(row['p95']),
+        _format_ms(row['p99']),
+        _format_mb(row['rss']),
+    )
+
+
+def format_report(report):
+    """Return a human-readable table of a soak report, and its trends.
+
+    :param report: A dict, as returned by :func:`soak`.
+    :returns: A string.
+
+    """
+    lines = [WINDOW_HEADER]
+    lines.extend(format_window(row) for row in report['windows'])
+    lines.append('')
+    lines.append(format_trends(report))
+    return '\n'.join(lines)
+
+
+def format_trends(report):
+    """Return a human-readable description of the trends in a soak report.
+
+    :param report: A dict, as returned by :func:`soak`.
+    :returns: A string, with one line per series in :data:`SERIES`.
+
+    """
+    lines = []
+    for key in SERIES:
+        trend = report['trends'][key]
+        if trend is None:
+            lines.append('{0:>4}: too few windows'.format(key))
+            continue
+        lines.append('{0:>4}: S={1:+d} p={2:.4f}{3}'.format(
+            key,
+            trend['s'],
+            trend['p'],
+            ' DRIFTING' if trend['drifting'] else '',
+        ))
+    return '\n'.join(lines)
+
+
+def _format_ms(seconds):
+    """Format a latency as milliseconds, right-aligned in seven columns."""
+    if seconds is None:
+        return '{0:>7}'.format('-')
+    return '{0:>5.0f}ms'.format(seconds * 1000)
+
+
+def _format_mb(size):
+    """Format a number of bytes as megabytes, or "-" if it is ``None``."""
+    return '-' if size is None else '{0:.1f}MB'.format(size / 10 ** 6)
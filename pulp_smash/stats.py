@@ -0,0 +1,161 @@
+# coding=utf-8
+"""Tools for summarizing samples, such as request latencies."""
+from __future__ import division, unicode_literals
+
+import collections
+import math
+
+
+PERCENTILES = (50, 95, 99)
+"""The percentiles reported by :func:`summarize`."""
+
+
+def percentile(samples, pct):
+    """Return the ``pct`` percentile of ``samples``.
+
+    The nearest-rank method is used, so the returned value is always one of
+    the samples.
+
+    :param samples: A sorted sequence of numbers.
+    :param pct: A number between 0 and 100, inclusive.
+    :returns: A number, or ``None`` if ``samples`` is empty.
+
+    """
+    if not samples:
+        return None
+    rank = int(math.ceil(pct / 100 * len(samples)))
+    return samples[max(rank, 1) - 1]
+
+
+def summarize(samples):
+    """Summarize ``samples``.
+
+    :param samples: An iterable of numbers.
+    :returns: A dict with the keys "count", "mean", "max" and one "pN" key
+        for each of :data:`PERCENTILES`. If there are no samples, each value
+        other than "count" is ``None``.
+
+    """
+    samples = sorted(samples)
+    summary = {
+        'count': len(samples),
+        'mean': sum(samples) / len(samples) if samples else None,
+        'max': samples[-1] if samples else None,
+    }
+    for pct in PERCENTILES:
+        summary['p{}'.format(pct)] = percentile(samples, pct)
+    return summary
+
+
+def power_law_exponent(sizes, values):
+    """Estimate how fast ``values`` grow with ``sizes``.
+
+    A line is fitted to ``(log(size), log(value))`` by least squares, and its
+    slope is returned. If ``value`` is proportional to ``size ** k``, the
+    slope is ``k``: about 1 for linear growth, 2 for quadratic growth, and 0
+    if ``values`` do not depend on ``sizes`` at all. Pairs in which either
+    number is not positive are ignored.
+
+    :param sizes: A sequence of numbers.
+    :param values: A sequence of numbers, as long as ``sizes``.
+    :returns: A number, or ``None`` if fewer than two distinct sizes remain.
+
+    """
+    points = [
+        (math.log(size), math.log(value))
+        for size, value in zip(sizes, values)
+        if size is not None and value is not None and size > 0 and value > 0
+    ]
+    if len(set(x for x, _ in points)) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    return covariance / variance
+
+
+def mann_whitney_u(xs, ys):
+    """Test whether ``xs`` and ``ys`` come from the same distribution.
+
+    This is the Mann-Whitney U test, which makes no assumption about the
+    shape of the distributions, and which is not swayed by a few outliers.
+    That suits latencies, which are rarely normally distributed. The p-value
+    is computed with a normal approximation, corrected for ties and for
+    continuity, which is accurate once each sample has more than about twenty
+    values.
+
+    :param xs: A sequence of numbers.
+    :param ys: A sequence of numbers.
+    :returns: A ``(u, p)`` tuple. ``u`` is the number of pairs in which the
+        value from ``xs`` is greater than the value from ``ys``, with ties
+        counting half. ``p`` is the two-sided p-value: the probability of a
+        ``u`` at least this far from its expected value if both samples came
+        from the same distribution.
+    :raises ValueError: If either sample is empty.
+
+    """
+    if not xs or not ys:
+        raise ValueError('Both samples must contain at least one value.')
+    values = sorted(
+        [(value, 0) for value in xs] + [(value, 1) for value in ys]
+    )
+    n_x, n_y, total = len(xs), len(ys), len(values)
+    rank_sum = 0  # The sum of the ranks of `xs`.
+    ties = 0  # The sum of t ** 3 - t, for each group of t tied values.
+    i = 0
+    while i < total:
+        j = i
+        while j < total and values[j][0] == values[i][0]:
+            j += 1
+        rank = (i + 1 + j) / 2  # The average of ranks i + 1 to j.
+        rank_sum += rank * sum(1 for k in range(i, j) if values[k][1] == 0)
+        ties += (j - i) ** 3 - (j - i)
+        i = j
+    u = rank_sum - n_x * (n_x + 1) / 2
+    mean = n_x * n_y / 2
+    variance = n_x * n_y / 12 * (
+        total + 1 - ties / (total * (total - 1) if total > 1 else 1)
+    )
+    if variance <= 0:
+        return u, 1.0
+    z = max(abs(u - mean) - 0.5, 0) / math.sqrt(variance)
+    return u, math.erfc(z / math.sqrt(2))
+
+
+def mann_kendall(values):
+    """Test whether a series of values trends up or down.
+
+    This is the Mann-Kendall trend test. It asks whether later values tend to
+    be larger (or smaller) than earlier ones, without assuming that the trend
+    is linear or that the values are normally distributed, so a latency that
+    creeps up in steps is caught as surely as one that climbs steadily. The
+    p-value is computed with a normal approximation, corrected for ties and
+    for continuity, which is accurate once the series has about ten values.
+
+    :param values: A sequence of numbers, in time order.
+    :returns: An ``(s, p)`` tuple. ``s`` is the number of pairs of values in
+        which the later value is greater, less the number in which it is
+        smaller, so it is positive for an upward trend. ``p`` is the two-sided
+        p-value: the probability of an ``s`` at least this far from zero if
+        the values were in a random order.
+    :raises ValueError: If there are fewer than two values.
+
+    """
+    values = list(values)
+    total = len(values)
+    if total < 2:
+        raise ValueError('At least two values are needed to find a trend.')
+    s = sum(
+        (later > earlier) - (later < earlier)
+        for i, earlier in enumerate(values)
+        for later in values[i + 1:]
+    )
+    ties = 0  # The sum of t(t - 1)(2t + 5), for each group of t tied values.
+    for count in collections.Counter(values).values():
+        ties += count * (count - 1) * (2 * count + 5)
+    variance = (total * (total - 1) * (2 * total + 5) - ties) / 18
+    if variance <= 0:
+        return s, 1.0
+    z = max(abs(s) - 1, 0) / math.sqrt(variance)
+    return s, math.erfc(z / math.sqrt(2))
@@ -0,0 +1,322 @@
+# coding=utf-8
+"""Tools for waiting on Pulp's `tasks`_.
+
+Many API calls return a call report, and a call report may list one or more
+``spawned_tasks``. Waiting for those tasks one at a time is slow, and polling
+each one in a tight loop hammers the server. :func:`wait_for_tasks` instead
+polls many tasks at once by searching for them in batches, and it backs off as
+the tasks run longer:
+
+>>> from pulp_smash.api import get_client
+>>> from pulp_smash.tasks import spawned_task_hrefs, wait_for_tasks
+>>> client = get_client()
+>>> response = client.post(
+...     '/pulp/api/v2/repositories/actions/content/regenerate_applicability/',
+...     json={'repo_criteria': {}},
+... )
+>>> report = wait_for_tasks(client, spawned_task_hrefs(response.json()))
+>>> all(task['state'] == 'finished' for task in report.tasks.values())
+True
+
+Every :class:`pulp_smash.api.Client` also notes when it receives each call
+report that spawns tasks. After a run, :func:`harvest_timings` fetches those
+tasks, and it splits the time each took into time spent waiting in a queue
+and time spent running, per task type and worker. That tells slowness caused
+by too few workers apart from slowness caused by slow work.
+
+.. _tasks:
+    https://pulp.readthedocs.org/en/latest/dev-guide/integration/rest-api/tasks.html
+
+"""
+from __future__ import unicode_literals
+
+import calendar
+import re
+import time
+from collections import namedtuple
+from datetime import datetime
+from pulp_smash import stats
+from pulp_smash.constants import TASK_SEARCH_PATH
+from pulp_smash.utils import monotonic
+
+# A task in one of these states will never change state again.
+TASK_FINAL_STATES = frozenset(('canceled', 'error', 'finished', 'skipped'))
+
+
+class TaskFailedError(Exception):
+    """Indicates that tasks reached a final state other than "finished"."""
+
+
+class TaskTimedOutError(Exception):
+    """Indicates that tasks did not reach a final state before a deadline."""
+
+
+TaskReport = namedtuple(
+    'TaskReport',
+    ('tasks', 'durations', 'elapsed', 'polls'),
+)
+"""The outcome of a call to :func:`wait_for_tasks`.
+
+``tasks``
+    A dict mapping each task ID to the last task body received for it.
+``durations``
+    A dict mapping each task ID to the number of seconds that passed before
+    the task was seen in a final state.
+``elapsed``
+    The number of seconds spent waiting for all tasks.
+``polls``
+    The number of times the server was polled.
+
+"""
+
+
+def raise_for_tasks(report):
+    """Raise an exception if any of the tasks in ``report`` did not finish.
+
+    :param report: A :data:`TaskReport`, as returned by :func:`wait_for_tasks`.
+    :returns: Nothing.
+    :raises pulp_smash.tasks.TaskFailedError: If any task is in a state other
+        than "finished".
+
+    """
+    failed = sorted(
+        '{0} ({1})'.format(task_id_, task['state'])
+        for task_id_, task in report.tasks.items()
+        if task['state'] != 'finished'
+    )
+    if failed:
+        raise TaskFailedError(
+            '{0} of {1} tasks did not finish: {2}'.format(
+                len(failed), len(report.tasks), ', '.join(failed)
+            )
+        )
+
+
+def spawned_task_hrefs(call_report):
+    """Return the hrefs of the tasks spawned by a call report.
+
+    :param call_report: A dict. A call report, as decoded from JSON.
+    :returns: A tuple of strings, such as ``('/pulp/api/v2/tasks/1234/',)``.
+
+    """
+    return tuple(task['_href'] for task in call_report['spawned_tasks'])
+
+
+def task_id(href):
+    """Return the ID of the task at ``href``.
+
+    :param href: A string, such as ``/pulp/api/v2/tasks/1234/``.
+    :returns: A string, such as ``1234``.
+
+    """
+    return href.rstrip('/').rsplit('/', 1)[-1]
+
+
+def wait_for_tasks(  # pylint:disable=too-many-arguments
+        client,
+        hrefs,
+        timeout=300,
+        interval=0.1,
+        max_interval=5,
+        backoff=1.5,
+        batch_size=100):
+    """Wait for several tasks to reach a final state.
+
+    The tasks are polled by searching for up to ``batch_size`` tasks per
+    request, and all searches in a single poll are sent concurrently through
+    ``client``. The first poll happens immediately. After each poll, the time
+    between polls is multiplied by ``backoff``, up to ``max_interval``. Thus,
+    short tasks are noticed quickly, and long tasks do not cause the server to
+    be polled more often than needed.
+
+    :param client: A :class:`pulp_smash.api.Client` object.
+    :param hrefs: An iterable of task hrefs or task IDs.
+    :param timeout: A number. The maximum number of seconds to wait.
+    :param interval: A number. The initial number of seconds between polls.
+    :param max_interval: A number. The maximum number of seconds between
+        polls.
+    :param backoff: A number. How much to increase the interval after each
+        poll.
+    :param batch_size: An integer. The maximum number of tasks to search for
+        in a single request.
+    :returns: A :data:`TaskReport`.
+    :raises pulp_smash.tasks.TaskTimedOutError: If the tasks do not all reach
+        a final state within ``timeout`` seconds.
+    :raises requests.exceptions.HTTPError: If a search fails.
+
+    """
+    pending = set(task_id(href) for href in hrefs)
+    tasks = {}
+    durations = {}
+    polls = 0
+    start = monotonic()
+    deadline = start + timeout
+    while True:
+        polls += 1
+        found = search_tasks(client, pending, batch_size)
+        now = monotonic()
+        for task in found.values():
+            tasks[task['task_id']] = task
+            if task['state'] in TASK_FINAL_STATES:
+                pending.discard(task['task_id'])
+                durations.setdefault(task['task_id'], now - start)
+        if not pending:
+            return TaskReport(tasks, durations, now - start, polls)
+        if now >= deadline:
+            raise TaskTimedOutError(
+                '{0} of {1} tasks did not reach a final state within {2} '
+                'seconds: {3}'.format(
+                    len(pending), len(pending) + len(durations), timeout,
+                    ', '.join(sorted(pending))
+                )
+            )
+        time.sleep(min(interval, deadline - now))
+        interval = min(interval * backoff, max_interval)
+
+
+def search_tasks(client, hrefs, batch_size=100):
+    """Fetch several tasks at once.
+
+    Up to ``batch_size`` tasks are searched for per request, and all requests
+    are sent concurrently through ``client``.
+
+    :param client: A :class:`pulp_smash.api.Client` object.
+    :param hrefs: An iterable of task hrefs or task IDs.
+    :param batch_size: An integer. The maximum number of tasks to search for
+        in a single request.
+    :returns: A dict mapping task IDs to task bodies. Tasks that the server
+        does not know of are omitted.
+    :raises requests.exceptions.HTTPError: If a search fails.
+
+    """
+    ids = sorted(set(task_id(href) for href in hrefs))
+    responses = client.request_many(
+        ('POST', TASK_SEARCH_PATH, _search_criteria(ids[i:i + batch_size]))
+        for i in range(0, len(ids), batch_size)
+    )
+    tasks = {}
+    for response in responses:
+        response.raise_for_status()
+        for task in response.json():
+            tasks[task['task_id']] = task
+    return tasks
+
+
+def parse_timestamp(timestamp):
+    """Parse a timestamp such as "2015-07-13T18:50:04Z".
+
+    Fractions of a second and offsets such as "+02:00" are honoured. A
+    timestamp with no offset is taken to be in UTC, as Pulp's are.
+
+    :param timestamp: A string.
+    :returns: A number. Seconds since the epoch.
+    :raises ValueError: If ``timestamp`` cannot be parsed.
+
+    """
+    match = re.match(
+        r'^(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)(\.\d+)?'
+        r'(Z|([+-])(\d\d):?(\d\d))?$',
+        timestamp,
+    )
+    if match is None:
+        raise ValueError('Cannot parse timestamp: {0}'.format(timestamp))
+    parsed = datetime.strptime(match.group(1), '%Y-%m-%dT%H:%M:%S')
+    seconds = calendar.timegm(parsed.utctimetuple())
+    if match.group(2):
+        seconds += float(match.group(2))
+    if match.group(4):
+        offset = int(match.group(5)) * 3600 + int(match.group(6)) * 60
+        seconds -= offset if match.group(4) == '+' else -offset
+    return seconds
+
+
+def harvest_timings(client, received, batch_size=100):
+    """Fetch tasks, and break down the time they spent queued and running.
+
+    :param client: A :class:`pulp_smash.api.Client` object.
+    :param received: A dict mapping task IDs to the times, in seconds since
+        the epoch, at which the call reports that spawned them were received.
+        See :meth:`pulp_smash.metrics.Recorder.record_tasks`.
+    :param batch_size: Passed on to :func:`search_tasks`.
+    :returns: A list, as returned by :func:`timing_breakdown`.
+    :raises requests.exceptions.HTTPError: If a search fails.
+
+    """
+    tasks = search_tasks(client, received, batch_size)
+    return timing_breakdown(tasks.values(), received)
+
+
+def timing_breakdown(tasks, received):
+    """Break down the time that tasks spent queued and running.
+
+    A task's queue wait is the time from when the call report that spawned it
+    was received until the task started, and its run time is the time from
+    when it started until it finished. Queue waits compare the client's clock
+    with the server's, so they are only as accurate as the two clocks agree.
+    Pulp reports times to the second, so short queue waits may even come out
+    negative.
+
+    :param tasks: An iterable of task bodies.
+    :param received: A dict mapping task IDs to the times, in seconds since
+        the epoch, at which the call reports that spawned them were received.
+    :returns: A list of dicts, one per task type and worker, sorted by both.
+        Each has the keys "task_type", "worker", "count", "unstarted" (the
+        number of tasks that had not started), "queue_wait" and "run". The
+        last two are summaries from :func:`pulp_smash.stats.summarize`.
+
+    """
+    groups = {}
+    for task in tasks:
+        group = groups.setdefault(
+            (task.get('task_type') or '', task.get('worker_name') or ''),
+            {'count': 0, 'unstarted': 0, 'queue_wait': [], 'run': []},
+        )
+        group['count'] += 1
+        if not task.get('start_time'):
+            group['unstarted'] += 1
+            continue
+        start = parse_timestamp(task['start_time'])
+        if task['task_id'] in received:
+            group['queue_wait'].append(start - received[task['task_id']])
+        if task.get('finish_time'):
+            group['run'].append(parse_timestamp(task['finish_time']) - start)
+    return [{
+        'task_type': task_type,
+        'worker': worker,
+        'count': group['count'],
+        'unstarted': group['unstarted'],
+        'queue_wait': stats.summarize(group['queue_wait']),
+        'run': stats.summarize(group['run']),
+    } for (task_type, worker), group in sorted(groups.items())]
+
+
+def format_timings(breakdown):
+    """Return a human-readable table of a :func:`timing_breakdown`.
+
+    Task types are shortened to their last dotted component.
+
+    :returns: A string.
+
+    """
+    lines = ['{0:<40} {1:<30} {2:>5} {3:>10} {4:>10}'.format(
+        'task type', 'worker', 'count', 'queue p50', 'run p50'
+    )]
+    for row in breakdown:
+        lines.append('{0:<40} {1:<30} {2:>5} {3:>10} {4:>10}'.format(
+            row['task_type'].rsplit('.', 1)[-1],
+            row['worker'],
+            row['count'],
+            _format_seconds(row['queue_wait']['p50']),
+            _format_seconds(row['run']['p50']),
+        ))
+    return '\n'.join(lines)
+
+
+def _format_seconds(seconds):
+    """Format a number of seconds, or "-" if it is ``None``."""
+    return '-' if seconds is None else '{0:.3f}s'.format(seconds)
+
+
+def _search_criteria(ids):
+    """Return a search body that finds the tasks with the given IDs."""
+    return {'criteria': {'filters': {'task_id': {'$in': ids}}}}
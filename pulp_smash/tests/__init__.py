@@ -1,3 +1,22 @@
 # coding=utf-8
-"""Integration tests for Pulp."""
+"""Integration tests for Pulp.
+
+The resources in the global :class:`pulp_smash.fixtures.FixturePool` are
+deleted when the Python interpreter exits. If the ``PULP_SMASH_METRICS``
+environment variable is set, a report on the requests sent by the tests is
+also written then, along with the timings of the tasks those requests
+spawned. See :mod:`pulp_smash.metrics`.
+
+"""
 from __future__ import unicode_literals
+
+import functools
+import os
+from pulp_smash import config, fixtures, metrics, runner
+
+fixtures.close_pool_at_exit()
+if os.environ.get('PULP_SMASH_METRICS'):
+    metrics.write_report_at_exit(harvest=functools.partial(
+        runner.harvest_timings,
+        config.get_section(),
+    ))
@@ -7,13 +7,14 @@
 """
 from __future__ import unicode_literals
 
-import requests
-from pulp_smash.config import get_config
 from unittest2 import TestCase
-
-CALL_REPORT_KEYS = {'error', 'result', 'spawned_tasks'}
-CONSUMER = '/pulp/api/v2/consumers/actions/content/regenerate_applicability/'
-REPO = '/pulp/api/v2/repositories/actions/content/regenerate_applicability/'
+from pulp_smash.api import get_client
+from pulp_smash.constants import (
+    CALL_REPORT_KEYS,
+    CONSUMER_APPLICABILITY_PATH,
+    REPO_APPLICABILITY_PATH,
+)
+from pulp_smash.tasks import spawned_task_hrefs, wait_for_tasks
 
 
 class SuccessTestCase(TestCase):
@@ -22,15 +23,9 @@ class SuccessTestCase(TestCase):
     @classmethod
     def setUpClass(cls):
         """Make calls to the server and save the responses."""
-        config = get_config()
-        base_url = config.pop('base_url')
-        path_json_pairs = (
-            (CONSUMER, {'consumer_criteria': {}}),
-            (REPO, {'repo_criteria': {}})
-        )
-        cls.responses = tuple((
-            requests.post(base_url + path, json=json, **config)
-            for path, json in path_json_pairs
+        cls.responses = get_client().request_many((
+            ('POST', CONSUMER_APPLICABILITY_PATH, {'consumer_criteria': {}}),
+            ('POST', REPO_APPLICABILITY_PATH, {'repo_criteria': {}}),
         ))
 
     def test_status_code(self):
@@ -45,6 +40,18 @@ class SuccessTestCase(TestCase):
             with self.subTest(i):
                 self.assertEqual(set(response.json().keys()), CALL_REPORT_KEYS)
 
+    def test_spawned_tasks(self):
+        """Assert that the tasks spawned by each call finish successfully."""
+        hrefs = tuple((
+            href
+            for response in self.responses
+            for href in spawned_task_hrefs(response.json())
+        ))
+        report = wait_for_tasks(get_client(), hrefs)
+        for task_id, task in report.tasks.items():
+            with self.subTest(task_id):
+                self.assertEqual(task['state'], 'finished')
+
 
 class FailureTestCase(TestCase):
     """Unsuccessfully generate content applicability for consumers and
@@ -55,15 +62,9 @@ class FailureTestCase(TestCase):
     @classmethod
     def setUpClass(cls):
         """Make calls to the server and save the responses."""
-        config = get_config()
-        base_url = config.pop('base_url')
-        path_json_pairs = (
-            (CONSUMER, {'consumer_criteriaa': {}}),
-            (REPO, {'repo_criteriaa': {}})
-        )
-        cls.responses = tuple((
-            requests.post(base_url + path, json=json, **config)
-            for path, json in path_json_pairs
+        cls.responses = get_client().request_many((
+            ('POST', CONSUMER_APPLICABILITY_PATH, {'consumer_criteriaa': {}}),
+            ('POST', REPO_APPLICABILITY_PATH, {'repo_criteriaa': {}}),
         ))
 
     def test_status_code(self):
@@ -7,13 +7,11 @@
 """
 from __future__ import unicode_literals
 
-import requests
-from pulp_smash.config import get_config
 from unittest2 import TestCase
-
-
-LOGIN_KEYS = {'certificate', 'key'}
-LOGIN_PATH = '/pulp/api/v2/actions/login/'
+from pulp_smash.api import get_client
+from pulp_smash.config import get_config
+from pulp_smash.constants import LOGIN_KEYS, LOGIN_PATH
+from pulp_smash.jsonstream import iter_members
 
 
 class LoginSuccessTestCase(TestCase):
@@ -21,10 +19,17 @@ class LoginSuccessTestCase(TestCase):
 
     @classmethod
     def setUpClass(cls):
-        """Successfully log in to the server."""
-        config = get_config()
-        base_url = config.pop('base_url')
-        cls.response = requests.post(base_url + LOGIN_PATH, **config)
+        """Successfully log in to the server.
+
+        The credentials are passed explicitly, so that the shared client
+        sends them even if it authenticates with a login certificate.
+
+        """
+        cls.response = get_client().post(
+            LOGIN_PATH,
+            auth=tuple(get_config()['auth']),
+            stream=True,
+        )
 
     def test_status_code(self):
         """Assert that the response has an HTTP 200 status code."""
@@ -35,7 +40,8 @@ class LoginSuccessTestCase(TestCase):
         "certificate" keys.
 
         """
-        self.assertEqual(set(self.response.json().keys()), LOGIN_KEYS)
+        keys = {key for key, _ in iter_members(self.response)}
+        self.assertEqual(keys, LOGIN_KEYS)
 
 
 class LoginFailureTestCase(TestCase):
@@ -44,10 +50,11 @@ class LoginFailureTestCase(TestCase):
     @classmethod
     def setUpClass(cls):
         """Unsuccessfully log in to the server."""
-        config = get_config()
-        base_url = config.pop('base_url')
-        config['auth'] = ('', '')
-        cls.response = requests.post(base_url + LOGIN_PATH, **config)
+        cls.response = get_client().post(
+            LOGIN_PATH,
+            auth=('', ''),
+            stream=True,
+        )
 
     def test_status_code(self):
         """Assert that the response has an HTTP 401 status code."""
@@ -58,4 +65,5 @@ class LoginFailureTestCase(TestCase):
         "certificate" keys.
 
         """
-        self.assertNotEqual(set(self.response.json().keys()), LOGIN_KEYS)
+        keys = {key for key, _ in iter_members(self.response)}
+        self.assertNotEqual(keys, LOGIN_KEYS)
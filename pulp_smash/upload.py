@@ -0,0 +1,275 @@
+# coding=utf-8
+"""Tools for uploading files to Pulp as content units, and timing it.
+
+Pulp accepts content through `upload requests`_. An upload request is
+created, the file is PUT to it in pieces at given offsets, the assembled file
+is imported into a repository as a unit, and the upload request is deleted.
+:func:`upload_file` does all of this for one file, and :func:`upload_files`
+does it for several files in turn:
+
+>>> from pulp_smash.api import get_client
+>>> from pulp_smash.upload import format_report, upload_files
+>>> report = upload_files(get_client(), 'my-repo', ['a.iso', 'b.iso'])
+>>> print(format_report(report))
+
+Each file is memory-mapped, and each chunk sent is a ``memoryview`` of the
+mapping, so the file is never copied into memory by Python. Up to
+``concurrency`` chunks are sent at once, over the client's pool of
+connections. While they are in flight, the file's SHA-256 checksum is
+computed in the calling thread from the same mapping. Throughput is reported
+in MB/s, where a megabyte is a million bytes.
+
+This module backs the ``python -m pulp_smash upload`` command.
+
+.. _upload requests:
+    https://pulp.readthedocs.org/en/latest/dev-guide/integration/rest-api/content/upload.html
+
+"""
+from __future__ import division, unicode_literals
+
+import hashlib
+import os
+from multiprocessing.pool import ThreadPool
+from os.path import basename
+from pulp_smash.constants import CONTENT_UPLOAD_PATH, REPOSITORY_PATH
+from pulp_smash.tasks import (
+    raise_for_tasks,
+    spawned_task_hrefs,
+    wait_for_tasks,
+)
+from pulp_smash.utils import mapped_file, monotonic
+
+
+CHUNK_SIZE = 4 * 1024 * 1024
+"""The default number of bytes sent in each PUT request."""
+
+
+def unit_key(unit_type_id, path, size, checksum):
+    """Return a guess at the unit key for a file.
+
+    :param unit_type_id: A string, such as "iso" or "rpm".
+    :param path: A string. The path to the file.
+    :param size: An integer. The size of the file in bytes.
+    :param checksum: A string. The file's SHA-256 checksum, as hex digits.
+    :returns: For ISOs, a dict with "name", "size" and "checksum" keys. For
+        other types, an empty dict, which asks Pulp to read the unit key from
+        the file itself, as it does for RPMs.
+
+    """
+    if unit_type_id == 'iso':
+        return {'checksum': checksum, 'name': basename(path), 'size': size}
+    return {}
+
+
+def upload_file(  # pylint:disable=too-many-arguments,too-many-locals
+        client,
+        repo_id,
+        path,
+        unit_type_id='iso',
+        unit_metadata=None,
+        chunk_size=CHUNK_SIZE,
+        concurrency=4,
+        timeout=300,
+        progress=None):
+    """Upload a file and import it into a repository.
+
+    :param client: A :class:`pulp_smash.api.Client` object. Its ``pool_size``
+        should be at least ``concurrency``.
+    :param repo_id: A string. The repository to import the unit into.
+    :param path: A string. The path to the file.
+    :param unit_type_id: A string. The type of unit to import. The unit key
+        is guessed with :func:`unit_key`.
+    :param unit_metadata: A dict, or ``None``.
+    :param chunk_size: An integer. The number of bytes in each PUT request.
+    :param concurrency: An integer. How many PUT requests may be in flight at
+        once.
+    :param timeout: A number. The maximum number of seconds to wait for the
+        import task.
+    :param progress: A function, or ``None``. If given, it is called with the
+        file's path, the number of bytes sent so far, and the file's size,
+        after each chunk is sent.
+    :returns: A dict with the keys "path", "size", "checksum", "chunks",
+        "upload_seconds" (from creating the upload request until every chunk
+        is sent), "import_seconds" (from then until the import task
+        finishes), "seconds" (the sum of the two) and "mb_per_s" (the size
+        divided by "seconds", or ``None`` if no time passed).
+    :raises requests.exceptions.HTTPError: If a request fails.
+    :raises pulp_smash.tasks.TaskFailedError: If the import task fails.
+
+    """
+    size = os.path.getsize(path)
+    start = monotonic()
+    response = client.post(CONTENT_UPLOAD_PATH, json={})
+    response.raise_for_status()
+    upload_id = response.json()['upload_id']
+    upload_path = '{0}{1}/'.format(CONTENT_UPLOAD_PATH, upload_id)
+    try:
+        checksum, chunks = _send_file(
+            client,
+            upload_path,
+            path,
+            chunk_size,
+            concurrency,
+            progress,
+        )
+        uploaded = monotonic()
+        response = client.post(
+            '{0}{1}/actions/import_upload/'.format(REPOSITORY_PATH, repo_id),
+            json={
+                'unit_key': unit_key(unit_type_id, path, size, checksum),
+                'unit_metadata': unit_metadata or {},
+                'unit_type_id': unit_type_id,
+                'upload_id': upload_id,
+            },
+        )
+        response.raise_for_status()
+        raise_for_tasks(wait_for_tasks(
+            client,
+            spawned_task_hrefs(response.json()),
+            timeout=timeout,
+            max_interval=1,
+        ))
+    finally:
+        client.delete(upload_path)
+    finished = monotonic()
+    return {
+        'path': path,
+        'size': size,
+        'checksum': checksum,
+        'chunks': chunks,
+        'upload_seconds': uploaded - start,
+        'import_seconds': finished - uploaded,
+        'seconds': finished - start,
+        'mb_per_s': _rate(size, finished - start),
+    }
+
+
+def _send_file(  # pylint:disable=too-many-arguments
+        client,
+        upload_path,
+        path,
+        chunk_size,
+        concurrency,
+        progress):
+    """PUT a file to an upload request in chunks, and checksum it.
+
+    :returns: A ``(checksum, chunks)`` tuple.
+
+    """
+    hasher = hashlib.sha256()
+    with mapped_file(path) as view:
+        size = len(view)
+        if not size:
+            return hasher.hexdigest(), 0
+        offsets = range(0, size, chunk_size)
+
+        def send(offset):
+            """PUT the chunk at ``offset``, and return its length."""
+            chunk = view[offset:offset + chunk_size]
+            response = client.put(
+                '{0}{1}/'.format(upload_path, offset),
+                data=chunk,
+            )
+            response.raise_for_status()
+            return len(chunk)
+
+        pool = ThreadPool(max(min(concurrency, len(offsets)), 1))
+        try:
+            sent = 0
+            lengths = pool.imap_unordered(send, offsets)
+            # Hash while the pool sends. hashlib releases the GIL for large
+            # updates, so the two overlap.
+            for offset in offsets:
+                hasher.update(view[offset:offset + chunk_size])
+            for length in lengths:
+                sent += length
+                if progress is not None:
+                    progress(path, sent, size)
+        finally:
+            pool.terminate()
+            pool.join()
+    return hasher.hexdigest(), len(offsets)
+
+
+def upload_files(  # pylint:disable=too-many-arguments
+        client,
+        repo_id,
+        paths,
+        unit_type_id='iso',
+        chunk_size=CHUNK_SIZE,
+        concurrency=4,
+        timeout=300,
+        progress=None):
+    """Upload several files, one after another, and import them.
+
+    See :func:`upload_file` for a description of the arguments.
+
+    :returns: A dict with the keys "files" (a list of dicts, as returned by
+        :func:`upload_file`), "size" (the total number of bytes), "seconds"
+        and "mb_per_s".
+
+    """
+    files = []
+    start = monotonic()
+    for path in paths:
+        files.append(upload_file(
+            client,
+            repo_id,
+            path,
+            unit_type_id,
+            None,
+            chunk_size,
+            concurrency,
+            timeout,
+            progress,
+        ))
+    seconds = monotonic() - start
+    size = sum(result['size'] for result in files)
+    return {
+        'files': files,
+        'size': size,
+        'seconds': seconds,
+        'mb_per_s': _rate(size, seconds),
+    }
+
+
+def format_report(report):
+    """Return a human-readable table of an upload report.
+
+    :param report: A dict, as returned by :func:`upload_files`.
+    :returns: A string.
+
+    """
+    template = '{0:>10} {1:>9} {2:>9} {3:>10}  {4}'
+    lines = [template.format('size', 'upload', 'import', 'throughput', 'path')]
+    for result in report['files']:
+        lines.append(template.format(
+            _format_mb(result['size']),
+            '{0:.2f}s'.format(result['upload_seconds']),
+            '{0:.2f}s'.format(result['import_seconds']),
+            _format_rate(result['mb_per_s']),
+            result['path'],
+        ))
+    lines.append('')
+    lines.append('{0} files, {1} in {2:.2f}s: {3}'.format(
+        len(report['files']),
+        _format_mb(report['size']),
+        report['seconds'],
+        _format_rate(report['mb_per_s']),
+    ))
+    return '\n'.join(lines)
+
+
+def _rate(size, seconds):
+    """Return a throughput in MB/s, or ``None`` if no time passed."""
+    return size / 10 ** 6 / seconds if seconds > 0 else None
+
+
+def _format_mb(size):
+    """Format a number of bytes as megabytes."""
+    return '{0:.1f}MB'.format(size / 10 ** 6)
+
+
+def _format_rate(rate):
+    """Format a throughput, or "-" if it is ``None``."""
+    return '-' if rate is None else '{0:.1f}MB/s'.format(rate)
@@ -0,0 +1,145 @@
+# coding=utf-8
+"""Utility functions for Pulp tests."""
+from __future__ import unicode_literals
+
+import mmap
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from os.path import basename, dirname
+from pulp_smash.constants import STATUS_PATH
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # pylint:disable=invalid-name
+
+
+monotonic = getattr(  # pylint:disable=invalid-name
+    time,
+    'monotonic',
+    time.time,
+)
+"""A clock for measuring durations.
+
+It is :func:`time.monotonic`, or :func:`time.time` on Python 2.
+
+"""
+
+
+@contextmanager
+def locked_file(path, lock):
+    """Lock the file at ``path`` against other threads and processes.
+
+    A separate lock file, named after ``path``, is locked with ``flock(2)``
+    where available. This way, ``path`` itself may be replaced, as
+    :func:`write_atomically` does, while it is locked. ``flock`` locks against
+    other processes only, so ``lock`` is held too.
+
+    :param path: A string. The file to lock. It need not exist.
+    :param lock: A ``threading.Lock`` shared by the threads that lock
+        ``path``.
+
+    """
+    with lock:
+        with open(path + '.lock', 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+@contextmanager
+def mapped_file(path):
+    """Map a file into memory, and yield a read-only view of its contents.
+
+    Slicing the view does not copy the file's contents, except on Python 2,
+    where the view is the ``mmap.mmap`` object itself. The mapping is closed
+    on exit, unless a slice of it is still referenced, in which case it is
+    closed once the slice is garbage collected.
+
+    :param path: A string. The path to the file.
+    :raises IOError: If the file cannot be read.
+
+    """
+    with open(path, 'rb') as handle:
+        if not os.fstat(handle.fileno()).st_size:
+            yield memoryview(b'')  # Empty files cannot be mapped.
+            return
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        view = memoryview(mapped)
+    except TypeError:  # pragma: no cover
+        view = mapped  # Python 2
+    try:
+        yield view
+    finally:
+        if view is not mapped:
+            view.release()
+        try:
+            mapped.close()
+        except BufferError:
+            pass
+
+
+def write_atomically(path, data):
+    """Atomically replace the file at ``path``.
+
+    ``data`` is written to a temporary file in the same directory as
+    ``path``, and the temporary file is then renamed to ``path``, so readers
+    see either the old contents or the new ones. If ``path`` already exists,
+    its permissions are preserved. Otherwise, it is created readable and
+    writable by its owner only. If anything fails, the temporary file is
+    removed.
+
+    :param path: A string. The file to replace. It need not exist.
+    :param data: A byte or text string.
+
+    """
+    handle, tmp_path = tempfile.mkstemp(
+        dir=dirname(path) or '.',
+        prefix=basename(path) + '.',
+    )
+    try:
+        mode = 'wb' if isinstance(data, bytes) else 'w'
+        with os.fdopen(handle, mode) as tmp_file:
+            tmp_file.write(data)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        try:
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+        except OSError:
+            pass
+        os.rename(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def get_server_status(client):
+    """Return the server's status, as decoded from JSON.
+
+    :param client: A :class:`pulp_smash.api.Client` object.
+    :returns: A dict.
+    :raises requests.exceptions.HTTPError: If the server responds with an
+        error.
+
+    """
+    response = client.get(STATUS_PATH)
+    response.raise_for_status()
+    return response.json()
+
+
+def get_server_version(client):
+    """Return the version of Pulp running on the server.
+
+    :param client: A :class:`pulp_smash.api.Client` object.
+    :returns: A string, such as "2.7.0".
+    :raises requests.exceptions.HTTPError: If the server responds with an
+        error.
+
+    """
+    return get_server_status(client)['versions']['platform_version']
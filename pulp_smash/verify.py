@@ -0,0 +1,225 @@
+# coding=utf-8
+"""Tools for checking that published files match their expected checksums.
+
+After a repository is synced and published, each published file should match
+the checksum that Pulp reports for its unit. :func:`verify` checks a tree of
+files against a list of :data:`Expected` entries, in a pool of processes, and
+yields a :data:`Mismatch` for each problem as soon as it is found:
+
+>>> from pulp_smash.api import get_client
+>>> from pulp_smash.verify import fetch_expected, format_mismatch, verify
+>>> expected = fetch_expected(get_client(), 'my-repo', ('iso',))
+>>> for mismatch in verify('/var/www/pub/isos/my-repo/', expected):
+...     print(format_mismatch(mismatch))
+
+Expected entries may also be read from an ISO repository's ``PULP_MANIFEST``
+with :func:`read_manifest`. Files are hashed over memory maps, a window at a
+time, so that no file is read into memory by Python. A file's size is checked
+before it is hashed, so that truncated files are caught cheaply.
+
+This module backs the ``python -m pulp_smash verify`` command.
+
+"""
+from __future__ import unicode_literals
+
+import errno
+import hashlib
+import io
+import multiprocessing
+import os
+from collections import namedtuple
+from os.path import join
+from pulp_smash.constants import REPOSITORY_PATH
+from pulp_smash.jsonstream import iter_items
+from pulp_smash.utils import mapped_file
+
+
+ALGORITHMS = {'md5': 'md5', 'sha': 'sha1', 'sha1': 'sha1', 'sha256': 'sha256'}
+"""Maps the checksum types that Pulp reports to ``hashlib`` algorithms."""
+
+WINDOW_SIZE = 16 * 1024 * 1024
+"""The number of bytes hashed at a time."""
+
+Expected = namedtuple('Expected', ('path', 'algorithm', 'checksum', 'size'))
+"""What a file should look like.
+
+``path`` is relative to the root of the tree being checked, ``algorithm`` is
+a key in :data:`ALGORITHMS`, ``checksum`` is a string of hex digits, and
+``size`` is a number of bytes, or ``None`` if it is not known.
+
+"""
+
+Mismatch = namedtuple('Mismatch', ('path', 'problem', 'expected', 'actual'))
+"""A file that does not look as it should.
+
+``problem`` is one of "missing", "unreadable", "size" or "checksum". For the
+last two, ``expected`` and ``actual`` are the expected and actual sizes or
+checksums. For an unreadable file, ``actual`` describes the error.
+
+"""
+
+# The keys of unit metadata that may hold a unit's path, in order of
+# preference.
+_PATH_KEYS = ('relativepath', 'filename', 'name')
+
+
+def read_manifest(path):
+    """Read the expected files from a ``PULP_MANIFEST`` file.
+
+    Each line of the file is of the form "name,sha256 checksum,size".
+
+    :param path: A string. The path to the manifest.
+    :returns: A list of :data:`Expected` entries, whose paths are relative to
+        the manifest's directory.
+    :raises ValueError: If a line is malformed.
+
+    """
+    expected = []
+    with io.open(path, encoding='utf-8') as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            name, checksum, size = line.rsplit(',', 2)
+            expected.append(Expected(name, 'sha256', checksum, int(size)))
+    return expected
+
+
+def expected_from_units(units):
+    """Read the expected files from units, as returned by Pulp's API.
+
+    :param units: An iterable of dicts. Each is either a unit's metadata, or
+        a search result with a "metadata" key. The metadata must have a
+        "checksum" key and one of "relativepath", "filename" or "name". The
+        checksum type is read from "checksumtype", and defaults to sha256.
+    :returns: A generator of :data:`Expected` entries.
+    :raises KeyError: If a unit has no checksum or path.
+
+    """
+    for unit in units:
+        metadata = unit.get('metadata', unit)
+        path_key = next((key for key in _PATH_KEYS if key in metadata), None)
+        if path_key is None:
+            raise KeyError('Unit has none of {0}: {1!r}'.format(
+                _PATH_KEYS,
+                metadata,
+            ))
+        yield Expected(
+            metadata[path_key],
+            metadata.get('checksumtype') or 'sha256',
+            metadata['checksum'],
+            metadata.get('size'),
+        )
+
+
+def fetch_expected(client, repo_id, type_ids):
+    """Read the expected files from a repository's units.
+
+    The search results are decoded as they arrive, so that a repository with
+    many units can be checked without holding every unit in memory.
+
+    :param client: A :class:`pulp_smash.api.Client` object.
+    :param repo_id: A string. The repository whose units to search for.
+    :param type_ids: An iterable of unit types, such as ``('rpm',)``.
+    :returns: A generator of :data:`Expected` entries.
+    :raises requests.exceptions.HTTPError: If the search fails.
+
+    """
+    response = client.post(
+        '{0}{1}/search/units/'.format(REPOSITORY_PATH, repo_id),
+        json={'criteria': {'type_ids': list(type_ids)}},
+        stream=True,
+    )
+    response.raise_for_status()
+    return expected_from_units(iter_items(response))
+
+
+def hash_file(path, algorithm='sha256'):
+    """Return the checksum of a file.
+
+    :param path: A string. The path to the file.
+    :param algorithm: A string. A key in :data:`ALGORITHMS`.
+    :returns: A string of hex digits.
+    :raises KeyError: If ``algorithm`` is not supported.
+    :raises IOError: If the file cannot be read.
+
+    """
+    hasher = hashlib.new(ALGORITHMS[algorithm])
+    with mapped_file(path) as view:
+        for offset in range(0, len(view), WINDOW_SIZE):
+            hasher.update(view[offset:offset + WINDOW_SIZE])
+    return hasher.hexdigest()
+
+
+def check_file(root, expected):
+    """Check a single file.
+
+    :param root: A string. The directory that ``expected.path`` is relative
+        to.
+    :param expected: An :data:`Expected` entry.
+    :returns: A :data:`Mismatch`, or ``None`` if the file is as expected.
+
+    """
+    path = join(root, expected.path)
+    try:
+        size = os.stat(path).st_size
+        if expected.size is not None and size != expected.size:
+            return Mismatch(expected.path, 'size', expected.size, size)
+        actual = hash_file(path, expected.algorithm)
+    except (IOError, OSError) as err:
+        if err.errno == errno.ENOENT:
+            return Mismatch(expected.path, 'missing', None, None)
+        return Mismatch(expected.path, 'unreadable', None, type('')(err))
+    if actual != expected.checksum.lower():
+        return Mismatch(expected.path, 'checksum', expected.checksum, actual)
+    return None
+
+
+def _check_file_star(args):
+    """Call :func:`check_file` with a tuple of arguments."""
+    return check_file(*args)
+
+
+def verify(root, expected, processes=None):
+    """Check a tree of files, and yield each problem as it is found.
+
+    :param root: A string. The directory that each expected path is relative
+        to.
+    :param expected: An iterable of :data:`Expected` entries.
+    :param processes: An integer. How many files may be hashed at once.
+        Defaults to the number of CPUs.
+    :returns: A generator of :data:`Mismatch` tuples, in the order in which
+        they are found.
+    :raises KeyError: If a checksum type is not supported.
+
+    """
+    pool = multiprocessing.Pool(processes)
+    try:
+        for mismatch in pool.imap_unordered(
+                _check_file_star,
+                ((root, item) for item in expected)):
+            if mismatch is not None:
+                yield mismatch
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def format_mismatch(mismatch):
+    """Return a human-readable description of a mismatch.
+
+    :param mismatch: A :data:`Mismatch`.
+    :returns: A string.
+
+    """
+    if mismatch.problem in ('size', 'checksum'):
+        return '{0}: {1}: expected {2}, got {3}'.format(
+            mismatch.path,
+            mismatch.problem,
+            mismatch.expected,
+            mismatch.actual,
+        )
+    if mismatch.problem == 'unreadable':
+        return '{0}: unreadable: {1}'.format(mismatch.path, mismatch.actual)
+    return '{0}: {1}'.format(mismatch.path, mismatch.problem)
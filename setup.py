@@ -42,5 +42,11 @@ setup(
         'Programming Language :: Python :: 3.5',
     ],
     packages=find_packages(),
-    install_requires=['packaging', 'pyxdg', 'requests', 'unittest2'],
+    install_requires=[
+        'packaging',
+        'pyxdg',
+        'requests',
+        'six',
+        'unittest2',
+    ],
 )
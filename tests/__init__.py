@@ -1,3 +1,32 @@
 # coding=utf-8
 """Unit tests for Pulp Smash's internal libraries."""
 from __future__ import unicode_literals
+
+from unittest2 import TestCase
+from pulp_smash.api import Client
+from pulp_smash.stub import StubServer
+
+
+class StubTestCase(TestCase):
+    """A test case whose tests share a stub Pulp server.
+
+    ``cls.server`` is a running :class:`pulp_smash.stub.StubServer`, and
+    ``cls.client`` is a :class:`pulp_smash.api.Client` for it, which records
+    nothing.
+
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """Start a stub server, and create a client for it."""
+        super(StubTestCase, cls).setUpClass()
+        cls.server = StubServer()
+        cls.server.start()
+        cls.client = Client(cls.server.server_config(), recorder=None)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the stub server."""
+        cls.client.close()
+        cls.server.stop()
+        super(StubTestCase, cls).tearDownClass()
@@ -0,0 +1,347 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.api`."""
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+from os.path import join
+import mock
+from unittest2 import TestCase
+from pulp_smash import api, metrics
+from pulp_smash.config import ServerConfig
+from pulp_smash.constants import LOGIN_PATH
+
+
+class ClientInitTestCase(TestCase):
+    """Tests for ``pulp_smash.api.Client.__init__``."""
+
+    def setUp(self):
+        """Create a client from a server config with several settings."""
+        self.client = api.Client(ServerConfig(
+            'http://example.com',
+            auth=('alice', 'hackme'),
+            verify=False,
+            timeout=5,
+        ), pool_size=3, recorder=None)
+
+    def test_session_attrs(self):
+        """Assert "auth" is applied to the session, but "verify" is not."""
+        self.assertEqual(self.client.session.auth, ('alice', 'hackme'))
+        self.assertTrue(self.client.session.verify)
+
+    def test_verify_env(self):
+        """Assert "verify" wins over a CA bundle named by the environment."""
+        adapter = self.client.session.get_adapter('http://')
+        with mock.patch.dict(os.environ, {'REQUESTS_CA_BUNDLE': 'ca.pem'}):
+            with mock.patch.object(adapter, 'send') as send:
+                send.side_effect = ValueError
+                with self.assertRaises(ValueError):
+                    self.client.get('/foo/')
+        self.assertIs(send.call_args[1]['verify'], False)
+
+    def test_pool_size(self):
+        """Assert the session's adapters use the requested pool size."""
+        for prefix in ('http://', 'https://'):
+            with self.subTest(prefix):
+                adapter = self.client.session.get_adapter(prefix)
+                # pylint:disable=protected-access
+                self.assertEqual(adapter._pool_maxsize, 3)
+
+    def test_request_kwargs(self):
+        """Assert other settings are passed along with each request."""
+        with mock.patch.object(self.client.session, 'request') as request:
+            self.client.post('/foo/', json={})
+        request.assert_called_once_with(
+            'POST',
+            'http://example.com/foo/',
+            json={},
+            timeout=5,
+            verify=False,
+        )
+
+    def test_request_kwargs_override(self):
+        """Assert per-request arguments take precedence over settings."""
+        with mock.patch.object(self.client.session, 'request') as request:
+            self.client.get('/foo/', timeout=10)
+        request.assert_called_once_with(
+            'GET',
+            'http://example.com/foo/',
+            timeout=10,
+            verify=False,
+        )
+
+
+class RecordTestCase(TestCase):
+    """Tests for how :class:`pulp_smash.api.Client` records requests."""
+
+    def setUp(self):
+        """Create a client with its own recorder."""
+        self.recorder = metrics.Recorder()
+        self.client = api.Client(
+            ServerConfig('http://example.com'),
+            recorder=self.recorder,
+        )
+
+    def test_response(self):
+        """Assert a response's status code and size are recorded."""
+        with mock.patch.object(self.client.session, 'request') as request:
+            request.return_value.status_code = 202
+            request.return_value.content = b'{}'
+            self.client.post('/pulp/api/v2/tasks/abc/')
+        endpoint, = self.recorder.report()['endpoints']
+        self.assertEqual(endpoint['path'], '/pulp/api/v2/tasks/{id}/')
+        self.assertEqual(endpoint['statuses'], {'202': 1})
+        self.assertEqual(endpoint['bytes'], 2)
+
+    def test_spawned_tasks(self):
+        """Assert the tasks spawned by a call report are recorded."""
+        with mock.patch.object(self.client.session, 'request') as request:
+            request.return_value.status_code = 202
+            request.return_value.content = b'{}'
+            request.return_value.json.return_value = {'spawned_tasks': [
+                {'_href': '/pulp/api/v2/tasks/1/', 'task_id': '1'},
+            ]}
+            with mock.patch.object(api.time, 'time', return_value=100):
+                self.client.post('/pulp/api/v2/repositories/foo/')
+        self.assertEqual(self.recorder.report()['tasks'], {'1': 100})
+
+    def test_spawned_tasks_decoded_once(self):
+        """Assert a call report is decoded once, and passed to the caller."""
+        response = api.requests.Response()
+        response.status_code = 202
+        response._content = (  # pylint:disable=protected-access
+            b'{"spawned_tasks": [{"_href": "/pulp/api/v2/tasks/1/"}]}'
+        )
+        with mock.patch.object(self.client.session, 'request') as request:
+            request.return_value = response
+            with mock.patch.object(
+                    api.requests.models.complexjson,
+                    'loads',
+                    wraps=api.requests.models.complexjson.loads) as loads:
+                response = self.client.post('/pulp/api/v2/repositories/foo/')
+                call_report = response.json()
+                self.assertEqual(loads.call_count, 1)
+                self.assertIsNot(response.json(), call_report)
+                self.assertEqual(loads.call_count, 2)
+        self.assertEqual(
+            call_report,
+            {'spawned_tasks': [{'_href': '/pulp/api/v2/tasks/1/'}]},
+        )
+        self.assertEqual(list(self.recorder.report()['tasks']), ['1'])
+
+    def test_stream(self):
+        """Assert a streamed response's body is not read."""
+        with mock.patch.object(self.client.session, 'request') as request:
+            request.return_value.status_code = 200
+            request.return_value.headers = {'Content-Length': '10'}
+            type(request.return_value).content = mock.PropertyMock(
+                side_effect=AssertionError
+            )
+            self.client.get('/', stream=True)
+        self.assertEqual(self.recorder.report()['endpoints'][0]['bytes'], 10)
+
+    def test_exception(self):
+        """Assert a request that raises an exception is recorded."""
+        with mock.patch.object(self.client.session, 'request') as request:
+            request.side_effect = api.requests.exceptions.ConnectionError
+            with self.assertRaises(api.requests.exceptions.ConnectionError):
+                self.client.get('/')
+        self.assertEqual(self.recorder.report()['endpoints'][0]['errors'], 1)
+
+
+class URLTestCase(TestCase):
+    """Tests for :meth:`pulp_smash.api.Client.url`."""
+
+    def setUp(self):
+        """Create a client."""
+        self.client = api.Client(ServerConfig('https://example.com:250'))
+
+    def test_path(self):
+        """Assert paths are appended to the ``base_url``."""
+        self.assertEqual(
+            self.client.url('/pulp/api/v2/'),
+            'https://example.com:250/pulp/api/v2/',
+        )
+
+    def test_absolute(self):
+        """Assert absolute URLs are returned unchanged."""
+        url = 'http://example.org/pulp/api/v2/'
+        self.assertEqual(self.client.url(url), url)
+
+
+class RequestManyTestCase(TestCase):
+    """Tests for :meth:`pulp_smash.api.Client.request_many`."""
+
+    def setUp(self):
+        """Create a client."""
+        self.client = api.Client(
+            ServerConfig('http://example.com'),
+            recorder=None,
+        )
+
+    def test_order(self):
+        """Assert responses are returned in the same order as calls."""
+        calls = tuple(('POST', '/{}/'.format(i), {'i': i}) for i in range(20))
+        with mock.patch.object(self.client, 'request') as request:
+            request.side_effect = lambda method, path, **kwargs: path
+            responses = self.client.request_many(calls, concurrency=4)
+        self.assertEqual(responses, tuple(path for _, path, _ in calls))
+
+    def test_payload(self):
+        """Assert payloads are sent as JSON, and ``None`` sends no body."""
+        with mock.patch.object(self.client, 'request') as request:
+            self.client.request_many((
+                ('POST', '/foo/', {'bar': 'baz'}),
+                ('GET', '/foo/', None),
+            ), concurrency=1)
+        self.assertEqual(request.call_args_list, [
+            mock.call('POST', '/foo/', json={'bar': 'baz'}),
+            mock.call('GET', '/foo/'),
+        ])
+
+    def test_empty(self):
+        """Assert no calls produce no responses."""
+        self.assertEqual(self.client.request_many(()), ())
+
+    def test_exception(self):
+        """Assert an exception raised by a request is re-raised."""
+        with mock.patch.object(self.client, 'request') as request:
+            request.side_effect = ValueError
+            with self.assertRaises(ValueError):
+                self.client.request_many((('GET', '/foo/', None),))
+
+
+class GetClientTestCase(TestCase):
+    """Tests for :func:`pulp_smash.api.get_client`."""
+
+    def test_cache(self):
+        """Assert a single client is built and shared."""
+        with mock.patch.object(api, '_CLIENT', None):
+            with mock.patch.object(api, 'get_config') as get_config:
+                get_config.return_value = ServerConfig('http://example.com')
+                client = api.get_client()
+                self.assertIs(api.get_client(), client)
+                api.reset_client()
+                self.assertIsNot(api.get_client(), client)
+        self.assertEqual(get_config.call_count, 2)
+
+    def test_reset_closes(self):
+        """Assert resetting the client closes it, saving its cassette."""
+        cassette = mock.Mock(mode='record')
+        client = api.Client(
+            ServerConfig('http://example.com'),
+            recorder=None,
+            cassette=cassette,
+        )
+        with mock.patch.object(api, '_CLIENT', client):
+            api.reset_client()
+            self.assertIsNone(api._CLIENT)  # pylint:disable=protected-access
+        self.assertTrue(cassette.save.called)
+
+
+class LoginCertTestCase(TestCase):
+    """Tests for how :class:`pulp_smash.api.Client` uses login certificates."""
+
+    def setUp(self):
+        """Create a client that uses a mock login certificate."""
+        patcher = mock.patch.object(api.auth, 'get_login_cert')
+        self.get_login_cert = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.login_cert = self.get_login_cert.return_value
+        self.login_cert.get.return_value = 'old.pem'
+        self.login_cert.refresh.return_value = 'new.pem'
+        self.client = api.Client(
+            ServerConfig('https://example.com', auth=('alice', 'hackme')),
+            recorder=None,
+            login_cert=True,
+        )
+
+    def test_session_auth(self):
+        """Assert credentials are not sent with each request."""
+        self.assertIsNone(self.client.session.auth)
+
+    def test_cert(self):
+        """Assert the login certificate is sent with each request."""
+        with mock.patch.object(self.client.session, 'request') as request:
+            request.return_value.status_code = 200
+            self.client.get('/foo/')
+        request.assert_called_once_with(
+            'GET',
+            'https://example.com/foo/',
+            cert='old.pem',
+        )
+        self.assertEqual(self.login_cert.refresh.call_count, 0)
+
+    def test_unauthorized(self):
+        """Assert a rejected cert is refreshed, and the request is resent."""
+        with mock.patch.object(self.client.session, 'request') as request:
+            request.side_effect = (
+                mock.Mock(status_code=401),
+                mock.Mock(status_code=200),
+            )
+            response = self.client.get('/foo/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.login_cert.refresh.call_count, 1)
+        self.assertEqual(request.call_args[1], {'cert': 'new.pem'})
+
+    def test_login_verify(self):
+        """Assert the login POST shares the request's TLS settings."""
+        cert_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cert_dir)
+        server_config = ServerConfig(
+            'https://example.com',
+            auth=('alice', 'hackme'),
+            verify=False,
+        )
+        self.get_login_cert.return_value = api.auth.LoginCert(
+            server_config,
+            path=join(cert_dir, 'cert.pem'),
+        )
+        client = api.Client(server_config, recorder=None, login_cert=True)
+        with mock.patch.object(client.session, 'request') as request:
+            request.return_value.status_code = 200
+            request.return_value.json.return_value = {
+                'certificate': 'CERT',
+                'key': 'KEY',
+            }
+            client.get('/foo/', timeout=5)
+        login, get = request.call_args_list
+        self.assertEqual(login[0][1], 'https://example.com' + LOGIN_PATH)
+        self.assertEqual(login[1]['verify'], False)
+        self.assertEqual(login[1]['timeout'], 5)
+        self.assertEqual(get[1]['verify'], False)
+
+    def test_explicit_auth(self):
+        """Assert a request with its own credentials is sent as-is."""
+        with mock.patch.object(self.client.session, 'request') as request:
+            request.return_value.status_code = 401
+            self.client.post('/foo/', auth=('', ''))
+        request.assert_called_once_with(
+            'POST',
+            'https://example.com/foo/',
+            auth=('', ''),
+        )
+        self.assertEqual(self.login_cert.get.call_count, 0)
+
+    def test_plain_http(self):
+        """Assert login certificates are not used without TLS."""
+        client = api.Client(
+            ServerConfig('http://example.com', auth=('alice', 'hackme')),
+            recorder=None,
+            login_cert=True,
+        )
+        self.assertIsNone(client.login_cert)
+        self.assertEqual(client.session.auth, ('alice', 'hackme'))
+
+    def test_replay(self):
+        """Assert login certificates are not used with a replaying cassette."""
+        cassette = mock.Mock(mode='replay')
+        client = api.Client(
+            ServerConfig('https://example.com', auth=('alice', 'hackme')),
+            recorder=None,
+            cassette=cassette,
+            login_cert=True,
+        )
+        self.assertIsNone(client.login_cert)
+        self.assertEqual(client.session.auth, ('alice', 'hackme'))
@@ -0,0 +1,129 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.auth`."""
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import time
+from os.path import join
+import mock
+from requests.exceptions import HTTPError
+from unittest2 import TestCase
+from pulp_smash import auth
+from pulp_smash.config import ServerConfig
+from pulp_smash.constants import LOGIN_PATH
+
+
+def _session():
+    """Return a mock session whose logins succeed."""
+    session = mock.Mock()
+    session.post.return_value.json.return_value = {
+        'certificate': 'CERT',
+        'key': 'KEY',
+    }
+    return session
+
+
+class LoginCertTestCase(TestCase):
+    """Tests for :class:`pulp_smash.auth.LoginCert`."""
+
+    def setUp(self):
+        """Create a login certificate that is stored in a temporary dir."""
+        cert_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cert_dir)
+        self.server_config = ServerConfig(
+            'https://example.com',
+            auth=('alice', 'hackme'),
+        )
+        self.login_cert = auth.LoginCert(
+            self.server_config,
+            path=join(cert_dir, 'cert.pem'),
+        )
+        self.session = _session()
+
+    def test_login(self):
+        """Assert a certificate is fetched and stored privately."""
+        path = self.login_cert.get(self.session)
+        self.session.post.assert_called_once_with(
+            'https://example.com' + LOGIN_PATH,
+            auth=('alice', 'hackme'),
+        )
+        with open(path) as handle:
+            self.assertEqual(handle.read(), 'KEY\nCERT\n')
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+
+    def test_login_kwargs(self):
+        """Assert extra arguments are passed along when logging in."""
+        self.login_cert.get(self.session, verify=False, timeout=5)
+        self.login_cert.refresh(self.session, time.time() + 60, verify=False)
+        self.assertEqual(self.session.post.call_args_list, [
+            mock.call(
+                'https://example.com' + LOGIN_PATH,
+                auth=('alice', 'hackme'),
+                timeout=5,
+                verify=False,
+            ),
+            mock.call(
+                'https://example.com' + LOGIN_PATH,
+                auth=('alice', 'hackme'),
+                verify=False,
+            ),
+        ])
+
+    def test_cached(self):
+        """Assert a fresh certificate is reused, even by other objects."""
+        self.login_cert.get(self.session)
+        self.login_cert.get(self.session)
+        other = auth.LoginCert(self.server_config, path=self.login_cert.path)
+        other.get(self.session)
+        self.assertEqual(self.session.post.call_count, 1)
+
+    def test_expired(self):
+        """Assert an expired certificate is replaced."""
+        path = self.login_cert.get(self.session)
+        issued = time.time() - auth.DEFAULT_LIFETIME - 1
+        os.utime(path, (issued, issued))
+        self.login_cert.get(self.session)
+        self.assertEqual(self.session.post.call_count, 2)
+
+    def test_refresh(self):
+        """Assert a certificate is refreshed only if older than ``since``."""
+        self.login_cert.get(self.session)
+        self.login_cert.refresh(self.session, time.time() - 60)
+        self.assertEqual(self.session.post.call_count, 1)
+        self.login_cert.refresh(self.session, time.time() + 60)
+        self.assertEqual(self.session.post.call_count, 2)
+
+    def test_login_fails(self):
+        """Assert a failed login raises an exception and stores nothing."""
+        response = self.session.post.return_value
+        response.raise_for_status.side_effect = HTTPError
+        with self.assertRaises(HTTPError):
+            self.login_cert.get(self.session)
+        self.assertFalse(os.path.exists(self.login_cert.path))
+
+    def test_write_fails(self):
+        """Assert a failed write leaves no certificate or temporary file."""
+        with mock.patch.object(os, 'rename', side_effect=OSError):
+            with self.assertRaises(OSError):
+                self.login_cert.get(self.session)
+        self.assertEqual(os.listdir(os.path.dirname(self.login_cert.path)), [])
+
+
+class GetLoginCertTestCase(TestCase):
+    """Tests for :func:`pulp_smash.auth.get_login_cert`."""
+
+    def test_cache(self):
+        """Assert one certificate is shared per server and user."""
+        with mock.patch.object(auth, '_LOGIN_CERTS', {}):
+            with mock.patch.object(auth, '_default_path'):
+                alice = auth.get_login_cert(
+                    ServerConfig('https://example.com', auth=('alice', 'a'))
+                )
+                self.assertIs(alice, auth.get_login_cert(
+                    ServerConfig('https://example.com', auth=('alice', 'b'))
+                ))
+                self.assertIsNot(alice, auth.get_login_cert(
+                    ServerConfig('https://example.com', auth=('bob', 'b'))
+                ))
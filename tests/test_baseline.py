@@ -0,0 +1,130 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.baseline`."""
+from __future__ import division, unicode_literals
+
+import json
+import shutil
+import tempfile
+from os.path import join
+from unittest2 import TestCase
+from pulp_smash import baseline, metrics
+
+
+def _metrics(latencies):
+    """Return a metrics report.
+
+    :param latencies: A dict mapping paths to lists of latencies of POST
+        requests.
+
+    """
+    recorder = metrics.Recorder()
+    for path, values in latencies.items():
+        for value in values:
+            recorder.record('POST', path, 200, 0, value)
+    return recorder.report()
+
+
+# Fifty latencies, spread out between 10ms and 15ms.
+LATENCIES = [0.01 + i / 10000 for i in range(50)]
+
+
+class BaselineStoreTestCase(TestCase):
+    """Tests for :class:`pulp_smash.baseline.BaselineStore`."""
+
+    def setUp(self):
+        """Pick a path for a store."""
+        store_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, store_dir)
+        self.path = join(store_dir, 'baselines.json')
+
+    def test_round_trip(self):
+        """Assert baselines are saved, and are keyed by section and version."""
+        store = baseline.BaselineStore(self.path)
+        self.assertEqual(store.versions('default'), [])
+        report = _metrics({'/a/': LATENCIES})
+        store.put('default', '2.7.0', report)
+        store.put('default', '2.6.0', _metrics({}))
+        store.put('other', '2.7.0', _metrics({}))
+        store.save()
+        store = baseline.BaselineStore(self.path)
+        self.assertEqual(store.versions('default'), ['2.7.0', '2.6.0'])
+        self.assertEqual(
+            store.get('default', '2.7.0'),
+            {'endpoints': report['endpoints']},
+        )
+        self.assertEqual(store.get('other', '2.7.0'), {'endpoints': []})
+        self.assertIsNone(store.get('other', '2.6.0'))
+
+    def test_read_metrics(self):
+        """Assert metrics are read from run reports and metrics files."""
+        report = _metrics({'/a/': LATENCIES})
+        for data in (report, {'metrics': {'default': report}}):
+            with self.subTest(data=data):
+                with open(self.path, 'w') as handle:
+                    json.dump(data, handle)
+                self.assertEqual(
+                    baseline.read_metrics(self.path, 'default'),
+                    report,
+                )
+
+
+class CompareTestCase(TestCase):
+    """Tests for :func:`pulp_smash.baseline.compare` and its relatives."""
+
+    def setUp(self):
+        """Compare two reports, in which each endpoint behaves differently."""
+        self.rows = baseline.compare(
+            _metrics({
+                '/faster/': LATENCIES,
+                '/gone/': LATENCIES,
+                '/slower/': LATENCIES,
+                '/slightly-slower/': LATENCIES,
+                '/unchanged/': LATENCIES,
+                '/few/': LATENCIES[:5],
+            }),
+            _metrics({
+                '/faster/': [value / 2 for value in LATENCIES],
+                '/new/': LATENCIES,
+                '/slower/': [value * 2 for value in LATENCIES],
+                '/slightly-slower/': [value + 0.0005 for value in LATENCIES],
+                '/unchanged/': LATENCIES[::-1],
+                '/few/': LATENCIES[:5],
+            }),
+        )
+
+    def test_verdicts(self):
+        """Assert each endpoint is given the right verdict."""
+        self.assertEqual(
+            {row['path']: row['verdict'] for row in self.rows},
+            {
+                '/faster/': 'faster',
+                '/few/': 'few samples',
+                '/gone/': 'gone',
+                '/new/': 'new',
+                '/slightly-slower/': 'unchanged',
+                '/slower/': 'slower',
+                '/unchanged/': 'unchanged',
+            },
+        )
+        self.assertTrue(baseline.regressed(self.rows))
+        self.assertFalse(baseline.regressed(self.rows[:1]))
+
+    def test_row(self):
+        """Assert a row describes the change in median latency."""
+        row = [row for row in self.rows if row['path'] == '/slower/'][0]
+        self.assertEqual(row['method'], 'POST')
+        self.assertAlmostEqual(row['change'], 1)
+        self.assertAlmostEqual(row['current'], row['baseline'] * 2)
+        self.assertLess(row['p'], 0.01)
+
+    def test_format_comparison(self):
+        """Assert a table and a count of verdicts are returned."""
+        text = baseline.format_comparison(self.rows)
+        lines = text.splitlines()
+        self.assertEqual(len(lines), 1 + 7 + 2)
+        self.assertIn('+100.0%', text)
+        self.assertEqual(lines[-1], (
+            '1 faster, 1 few samples, 1 gone, 1 new, 1 slower, 2 unchanged'
+        ))
+        lines = baseline.format_comparison(self.rows, True).splitlines()
+        self.assertEqual(len(lines), 1 + 5 + 2)
@@ -0,0 +1,168 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.benchmarks.content_applicability`."""
+from __future__ import division, unicode_literals
+
+import os
+import shutil
+import tempfile
+import mock
+from unittest2 import TestCase
+from pulp_smash.api import Client
+from pulp_smash.benchmarks import content_applicability
+from pulp_smash.seed import Seeder
+from pulp_smash.stub import StubServer
+
+
+def _row(dimension, size, action, end_to_end):
+    """Return a row of a report, in which ``dimension`` is ``size``."""
+    row = {
+        'dimension': dimension,
+        'consumers': 1,
+        'repositories': 1,
+        'errata': 1,
+        'action': action,
+        'end_to_end': end_to_end,
+        'task_run': None,
+        'tasks': 1,
+    }
+    row[dimension] = size
+    return row
+
+
+class TaskRunTimeTestCase(TestCase):
+    """Tests for ``task_run_time``.
+
+    See :func:`pulp_smash.benchmarks.content_applicability.task_run_time`.
+
+    """
+
+    def test_run_time(self):
+        """Assert the time from first start to last finish is returned."""
+        self.assertEqual(content_applicability.task_run_time([
+            {
+                'start_time': '2015-07-13T18:50:04Z',
+                'finish_time': '2015-07-13T18:50:10Z',
+            },
+            {
+                'start_time': '2015-07-13T18:50:02.5Z',
+                'finish_time': '2015-07-13T18:50:08Z',
+            },
+        ]), 7.5)
+
+    def test_missing(self):
+        """Assert ``None`` is returned if a time is missing."""
+        for tasks in ([], [{'start_time': '2015-07-13T18:50:04Z'}]):
+            with self.subTest(tasks):
+                self.assertIsNone(content_applicability.task_run_time(tasks))
+
+
+class FormatTestCase(TestCase):
+    """Tests for fitting and formatting a report."""
+
+    def setUp(self):
+        """Build a report in which consumer regeneration is quadratic."""
+        rows = [
+            _row('consumers', size, action, size ** exponent / 1000)
+            for size in (10, 100, 1000)
+            for action, exponent in (('consumers', 2), ('repositories', 1))
+        ]
+        self.report = {
+            'rows': rows,
+            'exponents': content_applicability.fit_exponents(rows),
+        }
+
+    def test_fit_exponents(self):
+        """Assert an exponent is fitted per dimension and action."""
+        fits = self.report['exponents']
+        self.assertEqual(set(fits), {'consumers'})
+        self.assertAlmostEqual(fits['consumers']['consumers']['end_to_end'], 2)
+        self.assertAlmostEqual(
+            fits['consumers']['repositories']['end_to_end'],
+            1,
+        )
+        self.assertIsNone(fits['consumers']['consumers']['task_run'])
+
+    def test_format_csv(self):
+        """Assert a header and one line per row are returned."""
+        lines = content_applicability.format_csv(self.report).splitlines()
+        self.assertEqual(lines[0].split(','), list(
+            content_applicability.COLUMNS
+        ))
+        self.assertEqual(len(lines), 7)
+        self.assertEqual(lines[1], 'consumers,10,1,1,consumers,0.1,,1')
+
+    def test_format_report(self):
+        """Assert each row and each exponent is described."""
+        lines = content_applicability.format_report(self.report).splitlines()
+        self.assertEqual(len(lines), 1 + 6 + 2 + 2)
+        self.assertIn(
+            '  regenerating consumers, by consumers: 2.000, n/a',
+            lines,
+        )
+
+
+class SweepTestCase(TestCase):
+    """Tests for :func:`pulp_smash.benchmarks.content_applicability.sweep`."""
+
+    def setUp(self):
+        """Create a directory for seeding journals."""
+        self.journal_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.journal_dir)
+
+    def test_sweep(self):
+        """Sweep two dimensions against a stub server."""
+        with StubServer() as server:
+            with Client(server.server_config(), recorder=None) as client:
+                report = content_applicability.sweep(
+                    client,
+                    {'consumers': 2, 'repositories': 2, 'errata': 1},
+                    {'consumers': [2, 4], 'errata': [1, 3]},
+                    packages=2,
+                    journal_dir=self.journal_dir,
+                )
+            self.assertEqual(server.consumers, {})
+            self.assertEqual(server.repositories, {})
+        self.assertEqual(os.listdir(self.journal_dir), [])
+        self.assertEqual(
+            [(row['dimension'], row['consumers'], row['errata'])
+             for row in report['rows'][::2]],
+            [('consumers', 2, 1), ('consumers', 4, 1), ('errata', 2, 1),
+             ('errata', 2, 3)],
+        )
+        self.assertEqual(
+            [row['action'] for row in report['rows'][:2]],
+            ['consumers', 'repositories'],
+        )
+        # The base point appears in both sweeps, but is measured once.
+        self.assertEqual(report['rows'][0], dict(
+            report['rows'][4],
+            dimension='consumers',
+        ))
+        for row in report['rows']:
+            self.assertGreater(row['end_to_end'], 0)
+            self.assertEqual(row['tasks'], 1)
+        self.assertEqual(set(report['exponents']), {'consumers', 'errata'})
+
+    def test_seed_failure(self):
+        """Assert resources are deleted if seeding them fails."""
+        seed = Seeder.seed
+
+        def seed_and_fail(seeder):
+            """Seed, and then fail as if interrupted."""
+            seed(seeder)
+            raise KeyboardInterrupt
+
+        with StubServer() as server:
+            with Client(server.server_config(), recorder=None) as client:
+                with mock.patch.object(Seeder, 'seed', seed_and_fail):
+                    with self.assertRaises(KeyboardInterrupt):
+                        content_applicability.sweep(
+                            client,
+                            {'consumers': 2, 'repositories': 2, 'errata': 1},
+                            {'consumers': [2]},
+                            packages=2,
+                            journal_dir=self.journal_dir,
+                        )
+            self.assertEqual(server.consumers, {})
+            self.assertEqual(server.repositories, {})
+        self.assertEqual(os.listdir(self.journal_dir), [])
@@ -0,0 +1,212 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.cassette`."""
+from __future__ import unicode_literals
+
+import os
+import shutil
+import stat
+import tempfile
+from os.path import join
+import mock
+from unittest2 import TestCase
+from pulp_smash import upload
+from pulp_smash.api import Client
+from pulp_smash.cassette import REDACTED, Cassette, CassetteMissError
+from pulp_smash.constants import (
+    LOGIN_PATH,
+    REPO_APPLICABILITY_PATH,
+    REPOSITORY_PATH,
+)
+from pulp_smash.jsonstream import iter_members
+from pulp_smash.stub import StubServer
+
+
+class CassetteTestCase(TestCase):
+    """Tests for :class:`pulp_smash.cassette.Cassette`."""
+
+    def setUp(self):
+        """Create a temporary directory."""
+        self.path = join(tempfile.mkdtemp(), 'cassette.json.gz')
+        self.addCleanup(shutil.rmtree, self.path.rsplit('/', 1)[0])
+
+    def test_bad_mode(self):
+        """Assert an unknown mode is rejected."""
+        with self.assertRaises(ValueError):
+            Cassette(self.path, 'rewind')
+
+    def test_key(self):
+        """Assert keys vary with each part of a request and the section."""
+        cassette = Cassette(self.path, 'record')
+        keys = set((
+            cassette.key('GET', 'http://example.com/', None),
+            cassette.key('POST', 'http://example.com/', None),
+            cassette.key('GET', 'http://example.org/', None),
+            cassette.key('GET', 'http://example.com/', b'{}'),
+            Cassette(self.path, 'record', 'other').key(
+                'GET', 'http://example.com/', None
+            ),
+        ))
+        self.assertEqual(len(keys), 5)
+        self.assertEqual(
+            cassette.key('GET', 'http://example.com/', ''),
+            cassette.key('get', 'http://example.com/', None),
+        )
+        self.assertEqual(
+            cassette.key('PUT', 'http://example.com/', memoryview(b'ab')),
+            cassette.key('PUT', 'http://example.com/', 'ab'),
+        )
+
+    def test_lru(self):
+        """Assert the least recently used entry is evicted."""
+        cassette = Cassette(self.path, 'record', max_entries=2)
+        cassette.put('a', {})
+        cassette.put('b', {})
+        cassette.get('a')
+        cassette.put('c', {})
+        self.assertEqual(len(cassette), 2)
+        cassette.get('a')
+        with self.assertRaises(KeyError):
+            cassette.get('b')
+
+    def test_save(self):
+        """Assert a saved cassette can be read back."""
+        cassette = Cassette(self.path, 'record', server_version='2.7.0')
+        cassette.put('a', {'foo': 'bar'})
+        cassette.save()
+        cassette = Cassette(self.path, 'replay')
+        self.assertEqual(cassette.get('a'), {'foo': 'bar'})
+        self.assertEqual(cassette.server_version, '2.7.0')
+
+    def test_save_private(self):
+        """Assert a saved cassette and its new directory are private."""
+        path = join(self.path.rsplit('/', 1)[0], 'sub', 'cassette.json.gz')
+        cassette = Cassette(path, 'record')
+        cassette.put('a', {})
+        cassette.save()
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+        self.assertEqual(
+            stat.S_IMODE(os.stat(os.path.dirname(path)).st_mode) & 0o077,
+            0,
+        )
+        self.assertEqual(
+            os.listdir(os.path.dirname(path)),
+            ['cassette.json.gz'],
+        )
+
+    def test_replay_save(self):
+        """Assert a replaying cassette is not written to disk."""
+        Cassette(self.path, 'replay').save()
+        with self.assertRaises(KeyError):
+            Cassette(self.path, 'replay').get('a')
+
+    def test_save_once(self):
+        """Assert a cassette is written only if it has changed."""
+        cassette = Cassette(self.path, 'record')
+        with mock.patch.object(
+                tempfile,
+                'mkstemp',
+                wraps=tempfile.mkstemp) as mkstemp:
+            cassette.save()
+            cassette.put('a', {})
+            cassette.save()
+            cassette.save()
+        self.assertEqual(mkstemp.call_count, 1)
+
+    def test_version_change(self):
+        """Assert entries are discarded if the server version changes."""
+        cassette = Cassette(self.path, 'record', server_version='2.7.0')
+        cassette.put('a', {})
+        cassette.save()
+        self.assertEqual(len(Cassette(self.path, 'record', None, '2.7.0')), 1)
+        self.assertEqual(len(Cassette(self.path, 'record', None, '2.8.0')), 0)
+
+
+class CassetteAdapterTestCase(TestCase):
+    """Tests for :class:`pulp_smash.cassette.CassetteAdapter`."""
+
+    def setUp(self):
+        """Create a temporary directory."""
+        self.path = join(tempfile.mkdtemp(), 'cassette.json.gz')
+        self.addCleanup(shutil.rmtree, self.path.rsplit('/', 1)[0])
+
+    def test_record_replay(self):
+        """Record responses from a stub server, and replay them without it."""
+        calls = (
+            ('POST', LOGIN_PATH, None),
+            ('POST', REPO_APPLICABILITY_PATH, {'repo_criteria': {}}),
+            ('POST', REPO_APPLICABILITY_PATH, {}),
+        )
+        with StubServer() as server:
+            server_config = server.server_config()
+            with Client(
+                    server_config,
+                    recorder=None,
+                    cassette=Cassette(self.path, 'record')) as client:
+                recorded = client.request_many(calls)
+        with Client(
+                server_config,
+                recorder=None,
+                cassette=Cassette(self.path, 'replay')) as client:
+            replayed = client.request_many(calls)
+            with self.assertRaises(CassetteMissError) as miss:
+                client.get('/pulp/api/v2/')
+        for old, new in zip(recorded, replayed):
+            self.assertEqual(old.status_code, new.status_code)
+            self.assertEqual(old.headers, new.headers)
+        self.assertEqual(recorded[1].json(), replayed[1].json())
+        self.assertEqual(
+            replayed[0].json(),
+            {key: REDACTED for key in recorded[0].json()},
+        )
+        self.assertIsInstance(miss.exception.__cause__, KeyError)
+
+    def test_record_stream(self):
+        """Assert a streamed response is recorded once read, and not before."""
+        cassette = Cassette(self.path, 'record')
+        with StubServer() as server:
+            with Client(
+                    server.server_config(),
+                    recorder=None,
+                    cassette=cassette) as client:
+                client.post(LOGIN_PATH, stream=True).close()
+                response = client.post(LOGIN_PATH, stream=True)
+                self.assertEqual(len(cassette), 0)
+                keys = {key for key, _ in iter_members(response)}
+        self.assertEqual(len(cassette), 1)
+        with Client(
+                server.server_config(),
+                recorder=None,
+                cassette=Cassette(self.path, 'replay')) as client:
+            self.assertEqual(set(client.post(LOGIN_PATH).json()), keys)
+
+    def test_replay_stream(self):
+        """Assert a replayed response can be streamed, and closed."""
+        with StubServer() as server:
+            server_config = server.server_config()
+            with Client(
+                    server_config,
+                    recorder=None,
+                    cassette=Cassette(self.path, 'record')) as client:
+                recorded = client.post(LOGIN_PATH, stream=True).json()
+        recorded = {key: REDACTED for key in recorded}
+        with Client(
+                server_config,
+                recorder=None,
+                cassette=Cassette(self.path, 'replay')) as client:
+            response = client.post(LOGIN_PATH, stream=True)
+            self.assertEqual(dict(iter_members(response)), recorded)
+            response.close()
+
+    def test_record_upload(self):
+        """Assert chunks of a memory-mapped file can be recorded."""
+        path = join(self.path.rsplit('/', 1)[0], 'a.iso')
+        with open(path, 'wb') as handle:
+            handle.write(b'abcdef')
+        with StubServer() as server:
+            with Client(
+                    server.server_config(),
+                    recorder=None,
+                    cassette=Cassette(self.path, 'record')) as client:
+                client.post(REPOSITORY_PATH, json={'id': 'isos'})
+                report = upload.upload_file(client, 'isos', path, chunk_size=4)
+        self.assertEqual(report['chunks'], 2)
@@ -0,0 +1,36 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.commands`."""
+from __future__ import unicode_literals
+
+import argparse
+from unittest2 import TestCase
+from pulp_smash import commands
+
+
+class PositiveTestCase(TestCase):
+    """Tests for the number argument types."""
+
+    def test_positive_int(self):
+        """Assert positive integers are parsed, and others refused."""
+        self.assertEqual(commands.positive_int('3'), 3)
+        for value in ('0', '-1'):
+            with self.subTest(value=value):
+                with self.assertRaises(argparse.ArgumentTypeError):
+                    commands.positive_int(value)
+
+    def test_positive_float(self):
+        """Assert positive numbers are parsed, and others refused."""
+        self.assertEqual(commands.positive_float('0.5'), 0.5)
+        for value in ('0', '-1', 'nan'):
+            with self.subTest(value=value):
+                with self.assertRaises(argparse.ArgumentTypeError):
+                    commands.positive_float(value)
+
+    def test_fraction(self):
+        """Assert fractions in (0, 1] are parsed, and others refused."""
+        self.assertEqual(commands.fraction('1'), 1)
+        self.assertEqual(commands.fraction('0.01'), 0.01)
+        for value in ('0', '-0.5', '1.5', 'nan'):
+            with self.subTest(value=value):
+                with self.assertRaises(argparse.ArgumentTypeError):
+                    commands.fraction(value)
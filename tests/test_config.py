@@ -2,8 +2,10 @@
 """Unit tests for :mod:`pulp_smash.config`."""
 from __future__ import unicode_literals
 
-from pulp_smash.config import ServerConfig
+import os
+import mock
 from unittest2 import TestCase
+from pulp_smash.config import ServerConfig, get_config, get_section, reset
 
 
 class InitTestCase(TestCase):
@@ -13,3 +15,39 @@ class InitTestCase(TestCase):
         """Ensure the first arg is named ``base_url``."""
         config = ServerConfig('bar')
         self.assertEqual(config['base_url'], 'bar')
+
+
+class GetSectionTestCase(TestCase):
+    """Tests for :func:`pulp_smash.config.get_section`."""
+
+    def test_default(self):
+        """Assert "default" is returned if no section is selected."""
+        with mock.patch.dict(os.environ, {'PULP_SMASH_SECTION': ''}):
+            self.assertEqual(get_section(), 'default')
+
+    def test_selected(self):
+        """Assert the ``PULP_SMASH_SECTION`` environment variable is used."""
+        with mock.patch.dict(os.environ, {'PULP_SMASH_SECTION': 'foo'}):
+            self.assertEqual(get_section(), 'foo')
+
+
+class GetConfigTestCase(TestCase):
+    """Tests for :func:`pulp_smash.config.get_config`."""
+
+    def test_reset(self):
+        """Assert the cache can be emptied, or filled with a given config."""
+        with mock.patch('pulp_smash.config._CONFIG', None):
+            with mock.patch.object(ServerConfig, 'read') as read:
+                read.return_value = ServerConfig('http://example.com')
+                get_config()
+                get_config()
+                self.assertEqual(read.call_count, 1)
+                reset()
+                get_config()
+                self.assertEqual(read.call_count, 2)
+                reset(ServerConfig('http://example.org'))
+                self.assertEqual(
+                    get_config()['base_url'],
+                    'http://example.org',
+                )
+                self.assertEqual(read.call_count, 2)
@@ -0,0 +1,207 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.config.base`."""
+from __future__ import unicode_literals
+
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+from os.path import join
+import mock
+from unittest2 import TestCase
+from pulp_smash.config import base
+from pulp_smash.config.base import ConfigSection
+
+# pylint:disable=protected-access
+
+
+def _save_section(args):
+    """Save a section named ``section`` to ``path``.
+
+    This function is executed by worker processes, so it must be importable.
+
+    """
+    path, section = args
+    ConfigSection(base_url=section).save(section, path)
+
+
+class GetConfigFilePathTestCase(TestCase):
+    """Tests for :func:`pulp_smash.config.base._get_config_file_path`."""
+
+    def setUp(self):
+        """Create a configuration file, and empty the path cache."""
+        self.config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.config_dir)
+        self.path = join(self.config_dir, 'settings.json')
+        with open(self.path, 'w') as handle:
+            handle.write('{}')
+        patchers = (
+            mock.patch.object(base, '_CONFIG_FILE_PATHS', {}),
+            mock.patch.object(base.BaseDirectory, 'load_config_paths'),
+        )
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+        patchers[0].start()
+        self.load_config_paths = patchers[1].start()
+        self.load_config_paths.return_value = [self.config_dir]
+
+    def test_cache(self):
+        """Assert the XDG directories are searched only once."""
+        for _ in range(2):
+            self.assertEqual(
+                base._get_config_file_path('foo', 'settings.json'),
+                self.path,
+            )
+        self.assertEqual(self.load_config_paths.call_count, 1)
+
+    def test_file_removed(self):
+        """Assert the XDG directories are searched again if a file is gone."""
+        base._get_config_file_path('foo', 'settings.json')
+        os.remove(self.path)
+        with self.assertRaises(base.ConfigFileNotFoundError):
+            base._get_config_file_path('foo', 'settings.json')
+        self.assertEqual(self.load_config_paths.call_count, 2)
+
+
+class ReadConfigFileTestCase(TestCase):
+    """Tests for how :class:`pulp_smash.config.base.ConfigSection` caches
+    parsed configuration files.
+
+    """
+
+    def setUp(self):
+        """Create a configuration file, and empty the file cache."""
+        config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, config_dir)
+        self.path = join(config_dir, 'settings.json')
+        self.write({
+            'default': {'base_url': 'http://example.com', 'auth': ['a', 'b']},
+            'alternate': {'base_url': 'http://example.org'},
+        })
+        patcher = mock.patch.object(base, '_CONFIG_FILES', {})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write(self, config):
+        """Replace the contents of the configuration file."""
+        with open(self.path, 'w') as handle:
+            json.dump(config, handle)
+
+    def test_parse_once(self):
+        """Assert an unchanged file is parsed only once."""
+        with mock.patch.object(base.json, 'load', wraps=json.load) as load:
+            for _ in range(3):
+                ConfigSection.read(path=self.path)
+                ConfigSection.sections(path=self.path)
+        self.assertEqual(load.call_count, 1)
+
+    def test_changed(self):
+        """Assert a changed file is parsed again."""
+        self.assertEqual(
+            set(ConfigSection.sections(path=self.path)),
+            {'default', 'alternate'},
+        )
+        self.write({'default': {'base_url': 'http://example.net'}})
+        self.assertEqual(ConfigSection.sections(path=self.path), ('default',))
+        self.assertEqual(
+            ConfigSection.read(path=self.path)['base_url'],
+            'http://example.net',
+        )
+
+    def test_replaced(self):
+        """Assert a file is parsed again if another file is renamed over it.
+
+        The replacement file is given the same size and modification time as
+        the original, so only its inode differs.
+
+        """
+        ConfigSection.read(path=self.path)
+        stat = os.stat(self.path)
+        other_path = self.path + '.new'
+        with open(other_path, 'w') as handle:
+            with open(self.path) as original:
+                handle.write(original.read().replace('.com', '.net'))
+        os.utime(other_path, (stat.st_atime, stat.st_mtime))
+        os.rename(other_path, self.path)
+        self.assertEqual(
+            ConfigSection.read(path=self.path)['base_url'],
+            'http://example.net',
+        )
+
+    def test_save(self):
+        """Assert a section saved by this process is read back."""
+        ConfigSection.read(path=self.path)
+        ConfigSection(base_url='http://example.net').save(path=self.path)
+        self.assertEqual(
+            ConfigSection.read(path=self.path)['base_url'],
+            'http://example.net',
+        )
+
+    def test_independent_copies(self):
+        """Assert sections read from the cache do not share state."""
+        config = ConfigSection.read(path=self.path)
+        config['auth'].append('c')
+        self.assertEqual(
+            ConfigSection.read(path=self.path)['auth'],
+            ['a', 'b'],
+        )
+
+
+class SaveSectionsTestCase(TestCase):
+    """Tests for :meth:`pulp_smash.config.base.ConfigSection.save_sections`."""
+
+    def setUp(self):
+        """Create a configuration directory."""
+        config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, config_dir)
+        self.path = join(config_dir, 'settings.json')
+
+    def read(self):
+        """Return the parsed configuration file."""
+        with open(self.path) as handle:
+            return json.load(handle)
+
+    def test_batch(self):
+        """Save and delete several sections at once."""
+        ConfigSection.save_sections(dict.fromkeys('abc', {}), path=self.path)
+        ConfigSection.save_sections(
+            {'a': {'x': 1}, 'd': {}},
+            deleted=('b', 'c'),
+            path=self.path,
+        )
+        self.assertEqual(self.read(), {'a': {'x': 1}, 'd': {}})
+
+    def test_delete_missing(self):
+        """Assert deleting a missing section leaves the file untouched."""
+        ConfigSection.save_sections({'a': {}}, path=self.path)
+        with self.assertRaises(KeyError):
+            ConfigSection.save_sections({'b': {}}, ('c',), path=self.path)
+        self.assertEqual(self.read(), {'a': {}})
+
+    def test_delete(self):
+        """Assert :meth:`ConfigSection.delete` removes a section."""
+        ConfigSection.save_sections({'a': {}, 'b': {}}, path=self.path)
+        ConfigSection.delete('a', self.path)
+        self.assertEqual(self.read(), {'b': {}})
+
+    def test_permissions(self):
+        """Assert an existing file's permissions are preserved."""
+        ConfigSection.save_sections({'a': {}}, path=self.path)
+        os.chmod(self.path, 0o640)
+        ConfigSection.save_sections({'b': {}}, path=self.path)
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o640)
+
+    def test_processes(self):
+        """Assert concurrent saves from several processes are all kept."""
+        sections = tuple('section-{}'.format(i) for i in range(40))
+        pool = multiprocessing.Pool(8)
+        try:
+            pool.map(_save_section, ((self.path, name) for name in sections))
+        finally:
+            pool.close()
+            pool.join()
+        self.assertEqual(
+            self.read(),
+            {name: {'base_url': name} for name in sections},
+        )
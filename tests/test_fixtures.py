@@ -0,0 +1,112 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.fixtures`."""
+from __future__ import unicode_literals
+
+from multiprocessing.pool import ThreadPool
+import mock
+from requests.exceptions import RequestException
+from unittest2 import TestCase
+from pulp_smash import fixtures
+from tests import StubTestCase
+
+
+class FixturePoolTestCase(StubTestCase):
+    """Tests for :class:`pulp_smash.fixtures.FixturePool`."""
+
+    def setUp(self):
+        """Create a fixture pool."""
+        self.pool = fixtures.FixturePool(self.client)
+
+    def test_shared(self):
+        """Assert a shared resource is created once, and copies handed out."""
+        def get_repo(_):
+            """Ask the pool for a shared repository."""
+            return self.pool.shared('repository', 'foo', notes={'a': 1})
+
+        workers = ThreadPool(4)
+        try:
+            repos = workers.map(get_repo, range(8))
+        finally:
+            workers.terminate()
+        self.assertEqual(len(self.server.repositories), 1)
+        self.assertEqual(len(set(repo['id'] for repo in repos)), 1)
+        repos[0]['notes']['a'] = 2
+        self.assertEqual(
+            self.pool.shared('repository', 'foo', notes={'a': 1})['notes'],
+            {'a': 1},
+        )
+        self.pool.close()
+
+    def test_shared_attrs(self):
+        """Assert a shared resource may not be asked for with other attrs."""
+        self.pool.shared('repository', 'foo')
+        with self.assertRaises(ValueError):
+            self.pool.shared('repository', 'foo', notes={'a': 1})
+        self.pool.close()
+
+    def test_fresh(self):
+        """Assert each fresh resource is new, and not shared."""
+        consumers = [self.pool.fresh('consumer') for _ in range(3)]
+        shared = self.pool.shared('consumer', 'bar')
+        ids = set(consumer['id'] for consumer in consumers + [shared])
+        self.assertEqual(len(ids), 4)
+        for consumer in consumers:
+            self.assertTrue(consumer['id'].startswith(self.pool.prefix))
+            self.assertEqual(
+                self.client.get(consumer['_href']).json()['id'],
+                consumer['id'],
+            )
+        self.pool.close()
+
+    def test_close(self):
+        """Assert all resources are deleted at once, and tasks awaited."""
+        repos_before = set(self.server.repositories)
+        tasks_before = len(self.server.tasks)
+        for _ in range(3):
+            self.pool.fresh('repository')
+            self.pool.fresh('consumer')
+        self.pool.shared('repository', 'foo')
+        self.client.delete(self.pool.fresh('repository')['_href'])
+        with mock.patch.object(
+                self.client,
+                'request_many',
+                wraps=self.client.request_many) as request_many:
+            self.pool.close()
+        # One batch of deletions, and one poll for the spawned tasks.
+        self.assertEqual(request_many.call_count, 2)
+        self.assertEqual(set(self.server.repositories), repos_before)
+        self.assertEqual(
+            [key for key in self.server.consumers
+             if key.startswith(self.pool.prefix)],
+            [],
+        )
+        self.assertEqual(len(self.server.tasks), tasks_before + 5)
+
+
+class GetPoolTestCase(TestCase):
+    """Tests for :func:`pulp_smash.fixtures.get_pool` and its relatives."""
+
+    def test_cache(self):
+        """Assert a single pool is shared, until it is closed."""
+        with mock.patch.object(fixtures, '_POOL', None):
+            with mock.patch.object(fixtures.api, 'get_client'):
+                pool = fixtures.get_pool()
+                self.assertIs(fixtures.get_pool(), pool)
+                with mock.patch.object(pool, 'close') as close:
+                    fixtures.close_pool()
+                self.assertEqual(close.call_count, 1)
+                self.assertIsNot(fixtures.get_pool(), pool)
+
+    def test_close_pool_at_exit(self):
+        """Assert failing to close the pool at exit prints a warning."""
+        with mock.patch.object(fixtures.atexit, 'register') as register:
+            fixtures.close_pool_at_exit()
+        close, = register.call_args[0]
+        with mock.patch.object(fixtures, '_POOL') as pool:
+            pool.close.side_effect = RequestException('Boom')
+            with mock.patch.object(fixtures.sys, 'stderr') as stderr:
+                close()
+            # pylint:disable=protected-access
+            self.assertIsNone(fixtures._POOL)
+        self.assertEqual(pool.close.call_count, 1)
+        self.assertIn('Boom', stderr.write.call_args[0][0])
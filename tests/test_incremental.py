@@ -0,0 +1,83 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.incremental`."""
+from __future__ import unicode_literals
+
+import shutil
+import tempfile
+from os.path import join
+import mock
+from unittest2 import TestCase
+from pulp_smash import incremental
+from tests import StubTestCase
+
+LOGIN_CLASS = 'pulp_smash.tests.test_login.LoginSuccessTestCase'
+
+
+class PassCacheTestCase(TestCase):
+    """Tests for :class:`pulp_smash.incremental.PassCache`."""
+
+    def setUp(self):
+        """Pick a path for a cache."""
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        self.path = join(cache_dir, 'passes.json')
+
+    def test_round_trip(self):
+        """Assert passes are saved, and failures forget earlier passes."""
+        passes = incremental.PassCache(self.path)
+        passes.update('default', 'a.A', 'abc')
+        passes.update('default', 'a.B', 'def')
+        passes.save()
+        passes = incremental.PassCache(self.path)
+        passes.update('default', 'a.B', None)
+        passes.save()
+        passes = incremental.PassCache(self.path)
+        self.assertTrue(passes.passed('default', 'a.A', 'abc'))
+        self.assertFalse(passes.passed('default', 'a.A', 'xyz'))
+        self.assertFalse(passes.passed('default', 'a.B', 'def'))
+        self.assertFalse(passes.passed('other', 'a.A', 'abc'))
+
+    def test_no_fingerprint(self):
+        """Assert a class with no fingerprint never counts as passed."""
+        passes = incremental.PassCache(self.path)
+        self.assertFalse(passes.passed('default', 'a.A', None))
+
+
+class FingerprintTestCase(StubTestCase):
+    """Tests for the fingerprint functions in :mod:`pulp_smash.incremental`."""
+
+    def fingerprint(self, section='default', **kwargs):
+        """Return a server fingerprint, with ``kwargs`` added to the config."""
+        server_config = self.server.server_config()
+        server_config.update(kwargs)
+        with mock.patch.object(incremental.ServerConfig, 'read') as read:
+            read.return_value = server_config
+            return incremental.server_fingerprint(section)
+
+    def test_stable(self):
+        """Assert fingerprints do not change from moment to moment."""
+        self.assertEqual(self.fingerprint(), self.fingerprint())
+
+    def test_server(self):
+        """Assert the section, its settings and the server's version count."""
+        fingerprint = self.fingerprint()
+        self.assertNotEqual(fingerprint, self.fingerprint('other'))
+        self.assertNotEqual(fingerprint, self.fingerprint(verify=False))
+        with mock.patch.object(self.server, 'version', '2.8.0'):
+            self.assertNotEqual(fingerprint, self.fingerprint())
+
+    def test_class(self):
+        """Assert class fingerprints depend on the class and the server."""
+        fingerprint = incremental.class_fingerprint(LOGIN_CLASS, 'abc')
+        self.assertEqual(
+            fingerprint,
+            incremental.class_fingerprint(LOGIN_CLASS, 'abc'),
+        )
+        self.assertNotEqual(
+            fingerprint,
+            incremental.class_fingerprint(LOGIN_CLASS, 'xyz'),
+        )
+        self.assertNotEqual(fingerprint, incremental.class_fingerprint(
+            'pulp_smash.tests.test_login.LoginFailureTestCase',
+            'abc',
+        ))
@@ -0,0 +1,89 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.jsonstore`."""
+from __future__ import unicode_literals
+
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+from os.path import join
+from unittest2 import TestCase
+from pulp_smash.jsonstore import JsonStore
+
+
+class _Store(JsonStore):
+    """A store with public methods for changing it."""
+
+    def get(self, section):
+        """Return a copy of a section."""
+        return dict(self._sections.get(section, {}))
+
+    def set(self, section, key, value):
+        """Set a key in a section."""
+        self._set(section, key, value)
+
+    def delete(self, section, key):
+        """Delete a key from a section."""
+        self._delete(section, key)
+
+
+def _save_keys(args):
+    """Save ``count`` keys to a store, one save per key."""
+    path, worker, count = args
+    for i in range(count):
+        store = _Store(path)
+        store.set('default', '{0}-{1}'.format(worker, i), i)
+        store.save()
+
+
+class JsonStoreTestCase(TestCase):
+    """Tests for :class:`pulp_smash.jsonstore.JsonStore`."""
+
+    def setUp(self):
+        """Pick a path for a store."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = join(directory, 'store.json')
+
+    def test_missing(self):
+        """Assert a missing or corrupt file is empty."""
+        self.assertEqual(_Store(self.path).get('default'), {})
+        with open(self.path, 'w') as handle:
+            handle.write('{"defa')
+        self.assertEqual(_Store(self.path).get('default'), {})
+
+    def test_merge(self):
+        """Assert saving applies only this object's changes to the file."""
+        with open(self.path, 'w') as handle:
+            json.dump({'default': {'a': 1, 'b': 2, 'c': 3}}, handle)
+        os.chmod(self.path, 0o640)
+        first = _Store(self.path)
+        second = _Store(self.path)
+        first.set('default', 'a', 10)
+        first.delete('default', 'b')
+        second.set('default', 'd', 4)
+        second.set('other', 'a', 5)
+        first.save()
+        second.save()
+        self.assertEqual(second.get('default'), {'a': 10, 'c': 3, 'd': 4})
+        with open(self.path) as handle:
+            self.assertEqual(json.load(handle), {
+                'default': {'a': 10, 'c': 3, 'd': 4},
+                'other': {'a': 5},
+            })
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o640)
+        self.assertEqual(
+            sorted(os.listdir(os.path.dirname(self.path))),
+            ['store.json', 'store.json.lock'],
+        )
+
+    def test_processes(self):
+        """Assert no process's changes are lost when several save at once."""
+        pool = multiprocessing.Pool(4)
+        try:
+            pool.map(_save_keys, [(self.path, i, 10) for i in range(4)])
+        finally:
+            pool.close()
+            pool.join()
+        self.assertEqual(len(_Store(self.path).get('default')), 40)
@@ -0,0 +1,121 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.jsonstream`."""
+from __future__ import unicode_literals
+
+import json
+from unittest2 import TestCase
+from pulp_smash import jsonstream
+from pulp_smash.api import Client
+from pulp_smash.constants import LOGIN_KEYS, LOGIN_PATH
+from pulp_smash.stub import StubServer
+
+DOCUMENT = {
+    'skipped': {'text': 'a "quoted" } ] \\', 'nested': [[{}], {'a': []}]},
+    'also skipped': [1, 'x'],
+    'selected': {
+        'items': [
+            12345,
+            -1.5e3,
+            'café ☃',
+            {'key': [True, False, None]},
+            [],
+            'back\\slash \\"',
+        ],
+    },
+}
+ITEMS = DOCUMENT['selected']['items']
+
+
+def _chunks(text, size):
+    """Split ``text`` into UTF-8 byte strings of ``size`` bytes."""
+    data = text.encode('utf-8')
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def _split_after(start, end, rest):
+    """Return chunks of a document whose first read ends with ``end``.
+
+    The document is ``start``, then padding, then ``end`` and ``rest``.
+
+    """
+    padding = 'x' * (jsonstream.CHUNK_SIZE - len(start) - len(end))
+    return _chunks(start + padding + end + rest, jsonstream.CHUNK_SIZE)
+
+
+class IterItemsTestCase(TestCase):
+    """Tests for :func:`pulp_smash.jsonstream.iter_items`."""
+
+    def test_chunk_sizes(self):
+        """Assert chunk boundaries, even within characters, do not matter."""
+        text = json.dumps(DOCUMENT, indent=2)
+        for size in (1, 2, 3, 7, 100, len(text)):
+            with self.subTest(size=size):
+                self.assertEqual(list(jsonstream.iter_items(
+                    _chunks(text, size),
+                    ('selected', 'items'),
+                )), ITEMS)
+
+    def test_split_number(self):
+        """Assert a number split across reads, after "." or "e", is whole."""
+        for head, tail, number in (('1.', '5', 1.5), ('2.5e', '2', 250.0)):
+            with self.subTest(head=head):
+                self.assertEqual(list(jsonstream.iter_items(
+                    _split_after('["', '", ' + head, tail + ', 2]')
+                ))[1:], [number, 2])
+
+    def test_top_level(self):
+        """Assert the items of a top-level array are yielded, one by one."""
+        items = jsonstream.iter_items(iter(['[1, ', '{"a": 2}', ' ,3', '4]']))
+        self.assertEqual(next(items), 1)
+        self.assertEqual(next(items), {'a': 2})
+        self.assertEqual(list(items), [34])
+
+    def test_empty(self):
+        """Assert an empty array yields nothing."""
+        self.assertEqual(list(jsonstream.iter_items([b' [ ] '])), [])
+
+    def test_missing_key(self):
+        """Assert ``KeyError`` is raised if a key in the path is missing."""
+        for text in ('{}', '{"a": {"b": []}}'):
+            with self.subTest(text=text):
+                with self.assertRaises(KeyError):
+                    list(jsonstream.iter_items([text], ('b',)))
+
+    def test_invalid(self):
+        """Assert ``ValueError`` is raised if the document is not valid."""
+        for text in ('{}', '[1 2]', '[1,', '["a]', '{"a" 1}', ''):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    list(jsonstream.iter_items([text]))
+
+
+class IterMembersTestCase(TestCase):
+    """Tests for :func:`pulp_smash.jsonstream.iter_members`."""
+
+    def test_members(self):
+        """Assert key and value tuples are yielded, in document order."""
+        text = '{"a": 1, "b": {"c": [2]}, "d": "e"}'
+        self.assertEqual(list(jsonstream.iter_members(_chunks(text, 4))), [
+            ('a', 1),
+            ('b', {'c': [2]}),
+            ('d', 'e'),
+        ])
+        self.assertEqual(
+            list(jsonstream.iter_members([text], ('b',))),
+            [('c', [2])],
+        )
+
+    def test_split_number(self):
+        """Assert a member's number split across reads after "." is whole."""
+        self.assertEqual(list(jsonstream.iter_members(
+            _split_after('{"pad": "', '", "count": 12.', '5}')
+        ))[1], ('count', 12.5))
+
+    def test_response(self):
+        """Assert a streamed response from a server is decoded and closed."""
+        with StubServer() as server:
+            with Client(server.server_config(), recorder=None) as client:
+                response = client.post(LOGIN_PATH, stream=True)
+                keys = {key for key, _ in jsonstream.iter_members(response)}
+        self.assertEqual(keys, LOGIN_KEYS)
+        self.assertTrue(response.raw.closed)
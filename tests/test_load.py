@@ -0,0 +1,127 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.load`."""
+from __future__ import unicode_literals
+
+import mock
+from unittest2 import TestCase
+from pulp_smash import load
+from pulp_smash.api import Client
+from pulp_smash.constants import REPO_APPLICABILITY_PATH
+from pulp_smash.stub import StubServer
+from tests import StubTestCase
+
+
+class GenerateLoadTestCase(StubTestCase):
+    """Tests for :func:`pulp_smash.load.generate_load`."""
+
+    def test_concurrency(self):
+        """Generate load with a fixed concurrency."""
+        report = load.generate_load(
+            self.client, load.ENDPOINTS['repo'], 0.2, concurrency=2
+        )
+        self.assertGreater(report.requests, 0)
+        self.assertEqual(report.errors, 0)
+        self.assertEqual(len(report.latencies), report.requests)
+        summary = report.summary()
+        self.assertEqual(summary['latency']['count'], report.requests)
+        self.assertGreater(summary['throughput'], 0)
+
+    def test_rate(self):
+        """Generate load at a fixed rate."""
+        report = load.generate_load(
+            self.client, load.ENDPOINTS['login'], 0.5, concurrency=2, rate=20
+        )
+        self.assertEqual(report.requests, 10)
+
+    def test_errors(self):
+        """Assert responses with 4XX status codes count as errors."""
+        report = load.generate_load(
+            self.client, ('POST', REPO_APPLICABILITY_PATH, {}), 0.1
+        )
+        self.assertGreater(report.requests, 0)
+        self.assertEqual(report.error_rate, 1)
+
+    def test_invalid(self):
+        """Assert no threads, or a rate of zero or less, is refused."""
+        for kwargs in ({'concurrency': 0}, {'rate': 0}, {'rate': -1}):
+            with self.subTest(kwargs=kwargs):
+                with self.assertRaises(ValueError):
+                    load.generate_load(
+                        self.client, load.ENDPOINTS['repo'], 0.1, **kwargs
+                    )
+
+
+def _fake_load(client, call, duration, concurrency):
+    """Imitate a server whose latency grows with concurrency.
+
+    Up to a concurrency of five, the 95th percentile latency is within 0.5
+    seconds, and throughput grows with concurrency.
+
+    """  # pylint:disable=unused-argument
+    requests = 10 * concurrency
+    return load.LoadReport(requests, 0, 1, [0.1 * concurrency] * requests)
+
+
+class ProbeTestCase(TestCase):
+    """Tests for :func:`pulp_smash.load.probe`."""
+
+    slo = load.SLO(95, 0.5, 0.01)
+
+    def test_aimd(self):
+        """Assert concurrency rises additively and falls multiplicatively."""
+        with mock.patch.object(load, 'generate_load', _fake_load):
+            report = load.probe(None, None, self.slo)
+        self.assertEqual(
+            [point['concurrency'] for point in report.curve],
+            [1, 2, 3, 4, 5, 6, 3, 4, 5, 6, 3, 4, 5, 6],
+        )
+        self.assertEqual(
+            [point['ok'] for point in report.curve[:6]],
+            [True] * 5 + [False],
+        )
+        self.assertEqual(report.max_throughput, 50)
+
+    def test_max_concurrency(self):
+        """Assert probing stops at the maximum concurrency."""
+        with mock.patch.object(load, 'generate_load', _fake_load):
+            report = load.probe(None, None, self.slo, max_concurrency=3)
+        self.assertEqual(
+            [point['concurrency'] for point in report.curve],
+            [1, 2, 3],
+        )
+        self.assertEqual(report.max_throughput, 30)
+
+    def test_never_met(self):
+        """Assert a server that never meets the SLO is reported as such."""
+        slo = load.SLO(95, 0.01, 0.01)
+        with mock.patch.object(load, 'generate_load', _fake_load):
+            report = load.probe(None, None, slo)
+        self.assertIsNone(report.max_throughput)
+        self.assertEqual(len(report.curve), 3)
+        self.assertIn('never met', load.format_probe_report(report))
+
+    def test_stub(self):
+        """Probe a stub server."""
+        with StubServer() as server:
+            with Client(server.server_config(), recorder=None) as client:
+                report = load.probe(
+                    client,
+                    load.ENDPOINTS['login'],
+                    self.slo,
+                    step_duration=0.1,
+                    max_steps=3,
+                )
+        self.assertEqual(len(report.curve), 3)
+        self.assertGreater(report.max_throughput, 0)
+        text = load.format_probe_report(report)
+        self.assertIn('max sustainable throughput', text)
+        self.assertEqual(len(text.splitlines()), 5)
+
+
+class FormatSummaryTestCase(TestCase):
+    """Tests for :func:`pulp_smash.load.format_summary`."""
+
+    def test_empty(self):
+        """Assert a report with no requests can be formatted."""
+        text = load.format_summary(load.LoadReport(0, 0, 1, []).summary())
+        self.assertIn('p99:', text)
@@ -0,0 +1,200 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.metrics`."""
+from __future__ import unicode_literals
+
+import csv
+import json
+import shutil
+import tempfile
+from os.path import join
+import mock
+from unittest2 import TestCase
+from pulp_smash import metrics
+
+
+class PathTemplateTestCase(TestCase):
+    """Tests for :func:`pulp_smash.metrics.path_template`."""
+
+    def test_templates(self):
+        """Assert resource IDs are replaced, and nothing else is."""
+        for url, template in (
+                ('/pulp/api/v2/actions/login/', '/pulp/api/v2/actions/login/'),
+                (
+                    'https://example.com/pulp/api/v2/repositories/zoo/',
+                    '/pulp/api/v2/repositories/{id}/',
+                ),
+                (
+                    '/pulp/api/v2/repositories/actions/content/'
+                    'regenerate_applicability/',
+                    '/pulp/api/v2/repositories/actions/content/'
+                    'regenerate_applicability/',
+                ),
+                (
+                    '/pulp/api/v2/consumers/c1/profiles/rpm/?details=true',
+                    '/pulp/api/v2/consumers/{id}/profiles/{id}/',
+                ),
+                (
+                    '/pulp/api/v2/content/units/rpm/'
+                    '5b4ecfdd-1a4b-4d5e-8a4c-8e1b2c3d4e5f/',
+                    '/pulp/api/v2/content/units/rpm/{id}/',
+                ),
+        ):
+            with self.subTest(url):
+                self.assertEqual(metrics.path_template(url), template)
+
+
+class HistogramTestCase(TestCase):
+    """Tests for :class:`pulp_smash.metrics.Histogram`."""
+
+    def test_empty(self):
+        """Assert an empty histogram has no percentiles."""
+        self.assertIsNone(metrics.Histogram().percentile(50))
+
+    def test_percentile(self):
+        """Assert percentiles are bucket upper bounds, capped by the max."""
+        histogram = metrics.Histogram()
+        for value in (0.0015,) * 98 + (0.1, 0.2):
+            histogram.add(value)
+        self.assertEqual(histogram.percentile(50), 0.002)
+        self.assertEqual(histogram.percentile(99), 0.128)
+        self.assertEqual(histogram.percentile(100), 0.2)
+        self.assertEqual(histogram.count, 100)
+
+    def test_overflow(self):
+        """Assert values beyond the last bucket are reported as the max."""
+        histogram = metrics.Histogram()
+        histogram.add(1000)
+        self.assertEqual(histogram.percentile(50), 1000)
+
+    def test_samples(self):
+        """Assert the sample never grows beyond ``SAMPLE_SIZE``."""
+        histogram = metrics.Histogram()
+        values = range(3 * metrics.SAMPLE_SIZE)
+        for value in values:
+            histogram.add(value)
+        self.assertEqual(len(histogram.samples), metrics.SAMPLE_SIZE)
+        self.assertLessEqual(set(histogram.samples), set(values))
+        # Later values must have a chance of replacing earlier ones.
+        self.assertGreater(max(histogram.samples), metrics.SAMPLE_SIZE)
+
+    def test_merge_samples(self):
+        """Assert merged samples are weighted by each histogram's count."""
+        histograms = [metrics.Histogram(), metrics.Histogram()]
+        for histogram, value, count in zip(histograms, (1, 2), (3, 1)):
+            for _ in range(count * metrics.SAMPLE_SIZE):
+                histogram.add(value)
+        histograms[0].merge(histograms[1].to_dict())
+        samples = histograms[0].samples
+        self.assertEqual(len(samples), metrics.SAMPLE_SIZE)
+        self.assertEqual(samples.count(2), metrics.SAMPLE_SIZE // 4)
+
+
+class RecorderTestCase(TestCase):
+    """Tests for :class:`pulp_smash.metrics.Recorder`."""
+
+    def setUp(self):
+        """Create a recorder and record several requests."""
+        self.recorder = metrics.Recorder()
+        self.recorder.record('post', '/pulp/api/v2/tasks/a/', 200, 10, 0.01)
+        self.recorder.record('POST', '/pulp/api/v2/tasks/b/', 503, 5, 0.02)
+        self.recorder.record('GET', '/pulp/api/v2/tasks/a/', None, 0, 0.03)
+
+    def test_report(self):
+        """Assert requests are aggregated by method and path template."""
+        self.assertEqual(len(self.recorder), 3)
+        get, post = self.recorder.report()['endpoints']
+        self.assertEqual(get['method'], 'GET')
+        self.assertEqual(get['errors'], 1)
+        self.assertEqual(post['count'], 2)
+        self.assertEqual(post['errors'], 1)
+        self.assertEqual(post['bytes'], 15)
+        self.assertEqual(post['statuses'], {'200': 1, '503': 1})
+
+    def test_merge(self):
+        """Assert a report can be folded into another recorder."""
+        other = metrics.Recorder()
+        other.record('POST', '/pulp/api/v2/tasks/c/', 200, 1, 0.5)
+        other.merge(self.recorder.report())
+        other.merge(self.recorder.report())
+        self.assertEqual(len(other), 7)
+        get, post = other.report()['endpoints']
+        self.assertEqual(get['statuses'], {'None': 2})
+        self.assertEqual(get['errors'], 2)
+        self.assertEqual(post['statuses'], {'200': 3, '503': 2})
+        self.assertEqual(post['bytes'], 31)
+        self.assertEqual(post['latency']['max'], 0.5)
+        self.assertAlmostEqual(post['latency']['mean'], 0.56 / 5)
+        self.assertEqual(
+            sorted(post['latency']['samples']),
+            [0.01, 0.01, 0.02, 0.02, 0.5],
+        )
+
+    def test_tasks(self):
+        """Assert spawned tasks are recorded, merged and limited in number."""
+        self.recorder.record_tasks(['a', 'b'], 10)
+        other = metrics.Recorder()
+        other.record_tasks(['c'], 20)
+        other.merge(self.recorder.report())
+        self.assertEqual(other.report()['tasks'], {'a': 10, 'b': 10, 'c': 20})
+        with mock.patch.object(metrics, 'MAX_TASKS', 4):
+            other.record_tasks(['d', 'e'], 30)
+        self.assertEqual(set(other.report()['tasks']), {'a', 'b', 'c', 'd'})
+
+    def test_reset(self):
+        """Assert a recorder can be emptied."""
+        self.recorder.record_tasks(['a'], 10)
+        self.recorder.reset()
+        self.assertEqual(len(self.recorder), 0)
+        self.assertEqual(self.recorder.report()['tasks'], {})
+
+    def test_report_reset(self):
+        """Assert a recorder can be emptied as it reports."""
+        self.recorder.record_tasks(['a'], 10)
+        report = self.recorder.report(reset=True)
+        self.assertEqual(len(report['endpoints']), 2)
+        self.assertEqual(report['tasks'], {'a': 10})
+        self.assertEqual(len(self.recorder), 0)
+        self.assertEqual(self.recorder.report()['tasks'], {})
+
+    def test_write_report(self):
+        """Assert JSON and CSV reports are written."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.recorder.write_report(directory)
+        with open(join(directory, 'metrics.json')) as handle:
+            self.assertEqual(json.load(handle), json.loads(json.dumps(
+                self.recorder.report()
+            )))
+        with open(join(directory, 'metrics.csv')) as handle:
+            rows = tuple(csv.DictReader(handle))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1]['statuses'], '200:1 503:1')
+
+    def test_write_report_harvest(self):
+        """Assert harvested task timings are added to the JSON report."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.recorder.record_tasks(['a'], 10)
+        harvest = mock.Mock(return_value=[{'queued': 1}])
+        self.recorder.write_report(directory, harvest)
+        harvest.assert_called_once_with({'a': 10})
+        with open(join(directory, 'metrics.json')) as handle:
+            report = json.load(handle)
+        self.assertEqual(report['task_timings'], [{'queued': 1}])
+        self.assertEqual(report['tasks'], {'a': 10})
+
+    def test_write_report_at_exit(self):
+        """Assert the global report is written at exit only if asked for."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        harvest = mock.Mock(return_value=None)
+        with mock.patch.object(metrics, 'RECORDER', self.recorder):
+            with mock.patch.object(metrics.atexit, 'register') as register:
+                metrics.write_report_at_exit(directory, harvest)
+            func, args = register.call_args[0][0], register.call_args[0][1:]
+            func(*args)
+        with open(join(directory, 'metrics.json')) as handle:
+            report = json.load(handle)
+        self.assertEqual(len(report['endpoints']), 2)
+        self.assertIsNone(report['task_timings'])
+        harvest.assert_called_once_with({})
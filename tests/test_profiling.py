@@ -0,0 +1,84 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.profiling`."""
+from __future__ import unicode_literals
+
+import json
+import shutil
+import tempfile
+import time
+from unittest2 import TestCase
+from pulp_smash import profiling
+from pulp_smash.api import Client
+from pulp_smash.constants import STATUS_PATH
+from pulp_smash.stub import StubServer
+
+
+class ProfileTestCase(TestCase):
+    """Tests for profiling functions and collecting their profiles."""
+
+    def setUp(self):
+        """Pick a directory for profile files."""
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir)
+
+    def test_profile_class(self):
+        """Assert time blocked on sockets and sleeping is told apart."""
+        def func():
+            """Send some requests, and sleep."""
+            with StubServer(latency=0.05) as server:
+                with Client(server.server_config(), recorder=None) as client:
+                    for _ in range(2):
+                        client.get(STATUS_PATH)
+            time.sleep(0.05)
+
+        summary = profiling.profile_class(
+            'default',
+            'tests.FooTestCase',
+            func,
+            self.profile_dir,
+            top=5,
+        )
+        self.assertGreaterEqual(summary['blocked']['socket'], 0.09)
+        self.assertGreaterEqual(summary['blocked']['sleep'], 0.05)
+        self.assertGreaterEqual(summary['wall'], 0.15)
+        self.assertLess(summary['cpu'], summary['wall'])
+        self.assertEqual(len(summary['functions']), 5)
+        self.assertGreater(summary['peak_memory'], 0)
+        self.assertEqual(len(summary['allocations']), 5)
+        path = profiling.profile_path(
+            self.profile_dir,
+            'default',
+            'tests.FooTestCase',
+        )
+        with open(path + '.json') as handle:
+            self.assertEqual(json.load(handle), summary)
+
+    def test_load_profiles(self):
+        """Assert profiles are combined, and missing profiles skipped."""
+        paths = []
+        for class_id, seconds in (('Fast', 0), ('Slow', 0.02)):
+            profiling.profile_class(
+                'default',
+                class_id,
+                lambda seconds=seconds: time.sleep(seconds),
+                self.profile_dir,
+            )
+            paths.append(profiling.profile_path(
+                self.profile_dir,
+                'default',
+                class_id,
+            ))
+        paths.append(profiling.profile_path(self.profile_dir, 'a', 'b'))
+        profiles = profiling.load_profiles(paths)
+        self.assertEqual(
+            [summary['class'] for summary in profiles['classes']],
+            ['Slow', 'Fast'],
+        )
+        sleep, = [
+            row for row in profiles['functions']
+            if 'sleep' in row['function']
+        ]
+        self.assertEqual(sleep['calls'], 2)
+        lines = profiling.format_profiles(profiles).splitlines()
+        self.assertEqual(lines[0], 'Slowest test classes:')
+        self.assertTrue(lines[2].endswith('Slow [default]'))
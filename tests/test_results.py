@@ -0,0 +1,145 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.results`."""
+from __future__ import unicode_literals
+
+import io
+import multiprocessing
+import shutil
+import tempfile
+from os.path import join
+from xml.etree import ElementTree
+from unittest2 import TestCase
+from pulp_smash import results
+
+
+def _record(section, test, outcome, message=None):
+    """Return a test outcome record."""
+    return {
+        'section': section,
+        'class': 'tests.FooTestCase',
+        'test': 'tests.FooTestCase.{0}'.format(test),
+        'outcome': outcome,
+        'duration': 0.25,
+        'message': message,
+    }
+
+
+def _write_records(args):
+    """Append ``count`` large records to a results file."""
+    path, worker, count = args
+    with results.ResultWriter(path) as writer:
+        for i in range(count):
+            writer.write(_record(
+                'default',
+                'test_{0}_{1}'.format(worker, i),
+                'failure',
+                'x' * 100000,
+            ))
+
+
+class ResultWriterTestCase(TestCase):
+    """Tests for writing and reading results files."""
+
+    def setUp(self):
+        """Create a directory for results files."""
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = join(self.directory, 'results.jsonl')
+
+    def test_processes(self):
+        """Assert lines written by several processes are not interleaved."""
+        pool = multiprocessing.Pool(4)
+        try:
+            pool.map(_write_records, [(self.path, i, 10) for i in range(4)])
+        finally:
+            pool.close()
+            pool.join()
+        records = list(results.read_results(self.path))
+        self.assertEqual(len(records), 40)
+        self.assertEqual(len({record['test'] for record in records}), 40)
+
+    def test_truncated(self):
+        """Assert a line cut short by a crash is skipped."""
+        with results.ResultWriter(self.path) as writer:
+            writer.write(_record('default', 'test_foo', 'success'))
+        with open(self.path, 'ab') as handle:
+            handle.write(b'{"section": "def')
+        self.assertEqual(
+            list(results.read_results(self.path)),
+            [_record('default', 'test_foo', 'success')],
+        )
+
+
+class WriteJunitTestCase(TestCase):
+    """Tests for :func:`pulp_smash.results.write_junit`."""
+
+    def setUp(self):
+        """Write a results file with every outcome, in two sections."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = join(directory, 'results.jsonl')
+        with results.ResultWriter(self.path) as writer:
+            writer.write(_record('b', 'test_ok', 'success'))
+            writer.write(_record('a', 'test_ok', 'success'))
+            writer.write(_record(
+                'a',
+                'test_fail',
+                'failure',
+                'Traceback\n\x1b[1mAssertionError: 1 != 2\n',
+            ))
+            writer.write(_record('a', 'test_error', 'error', 'KeyError'))
+            writer.write(_record('a', 'test_skip', 'skip', 'Not today.'))
+            writer.write(_record('a', 'test_xfail', 'expected_failure', '.'))
+            writer.write(_record('a', 'test_xpass', 'unexpected_success'))
+            writer.write(dict(
+                _record('b', 'setUpClass', 'error', 'Boom'),
+                test='setUpClass (tests.FooTestCase)',
+                duration=None,
+            ))
+
+    def test_count_results(self):
+        """Assert outcomes are counted per section."""
+        counts = results.count_results(self.path)
+        self.assertEqual(counts['a'], {
+            'tests': 6,
+            'failures': 2,
+            'errors': 1,
+            'skipped': 2,
+            'time': 1.5,
+        })
+        self.assertEqual(counts['b']['tests'], 2)
+        self.assertEqual(counts['b']['time'], 0.25)
+
+    def test_write_junit(self):
+        """Assert each section becomes a test suite of test cases."""
+        handle = io.BytesIO()
+        results.write_junit(self.path, handle)
+        root = ElementTree.fromstring(handle.getvalue())
+        self.assertEqual(root.get('tests'), '8')
+        self.assertEqual(root.get('errors'), '2')
+        suites = root.findall('testsuite')
+        self.assertEqual([suite.get('name') for suite in suites], ['a', 'b'])
+        self.assertEqual(suites[0].get('failures'), '2')
+        self.assertEqual(suites[0].get('time'), '1.500')
+        cases = {case.get('name'): case for case in suites[0]}
+        self.assertEqual(set(cases), {
+            'test_ok', 'test_fail', 'test_error', 'test_skip', 'test_xfail',
+            'test_xpass',
+        })
+        self.assertEqual(
+            cases['test_ok'].get('classname'),
+            'tests.FooTestCase',
+        )
+        self.assertEqual(len(cases['test_ok']), 0)
+        failure = cases['test_fail'].find('failure')
+        self.assertEqual(failure.get('message'), '[1mAssertionError: 1 != 2')
+        self.assertIn('Traceback', failure.text)
+        self.assertEqual(
+            cases['test_skip'].find('skipped').get('message'),
+            'Not today.',
+        )
+        self.assertIsNotNone(cases['test_xfail'].find('skipped'))
+        self.assertIsNotNone(cases['test_xpass'].find('failure'))
+        fixture, = suites[1].findall("testcase[error]")
+        self.assertEqual(fixture.get('name'), 'setUpClass (tests.FooTestCase)')
+        self.assertEqual(fixture.get('time'), '0.000')
@@ -0,0 +1,290 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.runner`."""
+from __future__ import unicode_literals
+
+import json
+import os
+import shutil
+import tempfile
+from os.path import join
+import mock
+from unittest2 import TestCase
+from pulp_smash import (
+    api,
+    config,
+    incremental,
+    metrics,
+    results,
+    runner,
+    sharding,
+)
+from pulp_smash.config import base
+from pulp_smash.stub import StubServer
+
+LOGIN_CLASSES = [
+    'pulp_smash.tests.test_login.LoginSuccessTestCase',
+    'pulp_smash.tests.test_login.LoginFailureTestCase',
+]
+
+
+def _record(section, outcome):
+    """Return a test outcome record."""
+    return {
+        'section': section,
+        'class': 'tests.FooTestCase',
+        'test': 'tests.FooTestCase.test_foo',
+        'outcome': outcome,
+        'duration': 0.1,
+        'message': 'Traceback' if outcome in ('failure', 'error') else None,
+    }
+
+
+class DiscoverTestCase(TestCase):
+    """Tests for :func:`pulp_smash.runner.discover`."""
+
+    def test_default(self):
+        """Assert every test class in ``pulp_smash.tests`` is found."""
+        class_ids = runner.discover()
+        for class_id in LOGIN_CLASSES:
+            self.assertIn(class_id, class_ids)
+        self.assertEqual(len(class_ids), len(set(class_ids)))
+
+    def test_module(self):
+        """Assert the classes in a module are found."""
+        self.assertEqual(
+            set(runner.discover(['pulp_smash.tests.test_login'])),
+            set(LOGIN_CLASSES),
+        )
+
+    def test_class(self):
+        """Assert a single class may be selected."""
+        self.assertEqual(runner.discover(LOGIN_CLASSES[:1]), LOGIN_CLASSES[:1])
+
+
+class SummarizeTestCase(TestCase):
+    """Tests for :func:`pulp_smash.runner.summarize` and its relatives."""
+
+    def test_summarize(self):
+        """Assert outcomes are counted per section."""
+        summary = runner.summarize([
+            _record('a', 'success'),
+            _record('a', 'success'),
+            _record('b', 'skip'),
+        ])
+        self.assertEqual(set(summary), {'a', 'b'})
+        self.assertEqual(summary['a']['success'], 2)
+        self.assertEqual(summary['b']['skip'], 1)
+        self.assertEqual(sum(summary['b'].values()), 1)
+
+    def test_was_successful(self):
+        """Assert failures and errors in any section are unsuccessful."""
+        for outcome in ('success', 'skip', 'expected_failure'):
+            with self.subTest(outcome=outcome):
+                self.assertTrue(runner.was_successful(runner.summarize([
+                    _record('a', 'success'),
+                    _record('b', outcome),
+                ])))
+        for outcome in ('failure', 'error', 'unexpected_success'):
+            with self.subTest(outcome=outcome):
+                self.assertFalse(runner.was_successful(runner.summarize([
+                    _record('a', 'success'),
+                    _record('b', outcome),
+                ])))
+
+    def test_format_report(self):
+        """Assert failures are described, and a summary is appended."""
+        text = runner.format_report({'tests': [
+            _record('alpha', 'success'),
+            _record('beta', 'failure'),
+        ]})
+        self.assertIn('FAILURE: tests.FooTestCase.test_foo [beta]', text)
+        self.assertIn('Traceback', text)
+        lines = text.splitlines()
+        self.assertTrue(lines[-2].startswith('alpha '))
+        self.assertTrue(lines[-1].startswith('beta  '))
+
+
+class RunTestCase(TestCase):
+    """Tests for :func:`pulp_smash.runner.run`.
+
+    Two stub servers are started, and a configuration file with one section
+    per server is written. The "bad" section has the wrong credentials.
+
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """Start stub servers, and write a configuration file."""
+        cls.servers = {'good': StubServer(), 'bad': StubServer()}
+        for server in cls.servers.values():
+            server.start()
+        cls.config_dir = tempfile.mkdtemp()
+        cls.path = join(cls.config_dir, 'settings.json')
+        with open(cls.path, 'w') as handle:
+            json.dump({
+                'good': cls.servers['good'].server_config(),
+                'bad': dict(
+                    cls.servers['bad'].server_config(),
+                    auth=['admin', 'wrong'],
+                ),
+            }, handle)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the stub servers, and remove the configuration file."""
+        for server in cls.servers.values():
+            server.stop()
+        shutil.rmtree(cls.config_dir)
+
+    def setUp(self):
+        """Make workers read the configuration file written above."""
+        for patcher in (
+                mock.patch.object(
+                    base,
+                    '_get_config_file_path',
+                    return_value=self.path,
+                ),
+                mock.patch.dict(os.environ),
+                mock.patch.object(config, '_CONFIG'),
+                mock.patch.object(api, '_CLIENT'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # Tests run in this process record their requests globally.
+        self.addCleanup(metrics.RECORDER.reset)
+
+    def test_run(self):
+        """Run the login tests against both sections."""
+        report = runner.run(('good', 'bad'), ['pulp_smash.tests.test_login'])
+        summary = runner.summarize(report['tests'])
+        self.assertEqual(summary['good']['success'], 4)
+        self.assertEqual(summary['bad']['success'], 2)
+        self.assertEqual(summary['bad']['failure'], 2)
+        self.assertFalse(runner.was_successful(summary))
+        for record in report['tests']:
+            if record['section'] == 'bad' and record['outcome'] == 'failure':
+                self.assertEqual(record['class'], LOGIN_CLASSES[0])
+        self.assertEqual(set(report['durations']), {'good', 'bad'})
+        self.assertEqual(set(report['durations']['good']), set(LOGIN_CLASSES))
+        self.assertEqual(set(report['metrics']), {'good', 'bad'})
+
+    def test_shards(self):
+        """Split the tests for each section, guided by a timing database."""
+        timings = sharding.Timings(join(self.config_dir, 'timings.json'))
+        durations = {LOGIN_CLASSES[0]: 5, LOGIN_CLASSES[1]: 1}
+        timings.update('good', durations)
+        with mock.patch.object(
+                runner.sharding,
+                'shard',
+                wraps=sharding.shard) as shard:
+            report = runner.run(
+                ('good', 'bad'),
+                ['pulp_smash.tests.test_login'],
+                shards=2,
+                timings=timings,
+            )
+        self.assertEqual(shard.call_args_list[0][0][1], durations)
+        self.assertEqual(len(report['tests']), 8)
+        self.assertEqual(set(report['durations']['bad']), set(LOGIN_CLASSES))
+        endpoint, = report['metrics']['good']['endpoints']
+        self.assertEqual(endpoint['count'], 2)
+        saved = sharding.Timings(timings.path)
+        self.assertEqual(set(saved.get('bad')), set(LOGIN_CLASSES))
+        self.assertLess(saved.get('good')[LOGIN_CLASSES[0]], 5)
+
+    def test_incremental(self):
+        """Assert classes that passed are skipped until ``force`` is given."""
+        passes = incremental.PassCache(join(self.config_dir, 'passes.json'))
+        names = ['pulp_smash.tests.test_login']
+        report = runner.run(('good', 'bad'), names, passes=passes)
+        self.assertEqual(report['cached'], {'good': [], 'bad': []})
+        self.assertEqual(len(report['tests']), 8)
+
+        report = runner.run(('good', 'bad'), names, passes=passes)
+        self.assertEqual(report['cached']['good'], LOGIN_CLASSES[::-1])
+        self.assertEqual(report['cached']['bad'], LOGIN_CLASSES[1:])
+        self.assertEqual(
+            {record['class'] for record in report['tests']},
+            set(LOGIN_CLASSES[:1]),
+        )
+        self.assertIn('3 test classes were skipped', (
+            runner.format_report(report)
+        ))
+
+        report = runner.run(('good', 'bad'), names, passes=passes, force=True)
+        self.assertEqual(report['cached'], {'good': [], 'bad': []})
+        self.assertEqual(len(report['tests']), 8)
+
+    def test_task_timings(self):
+        """Assert the tasks spawned by tests are timed."""
+        report = runner.run(
+            ('good', 'bad'),
+            ['pulp_smash.tests.test_content_applicability'],
+        )
+        self.assertEqual(report['task_timings']['bad'], [])
+        breakdown = report['task_timings']['good']
+        self.assertEqual(sum(row['count'] for row in breakdown), 2)
+        self.assertEqual(
+            {row['worker'] for row in breakdown},
+            {'reserved_resource_worker-0@stub'},
+        )
+        self.assertIn('Task timings [good]:', runner.format_report(report))
+
+    def test_profile(self):
+        """Assert each class is profiled, and the profiles are summarized."""
+        profile_dir = join(self.config_dir, 'profiles')
+        report = runner.run(
+            ('good', 'bad'),
+            ['pulp_smash.tests.test_login'],
+            profile_dir=profile_dir,
+        )
+        profiles = report['profiles'] or {}
+        self.assertEqual(
+            {(row['section'], row['class'])
+             for row in profiles.get('classes', ())},
+            {(section, class_id)
+             for section in ('good', 'bad') for class_id in LOGIN_CLASSES},
+        )
+        self.assertTrue(profiles.get('functions'))
+        self.assertEqual(len(os.listdir(profile_dir)), 8)
+        self.assertIn('Slowest test classes:', runner.format_report(report))
+        self.assertIsNone(runner.run(('good',), LOGIN_CLASSES)['profiles'])
+
+    def test_results(self):
+        """Assert test outcomes are streamed to a results file."""
+        path = join(self.config_dir, 'results.jsonl')
+        with open(path, 'w') as handle:
+            handle.write('{"left over": "from an earlier run"}\n')
+        report = runner.run(
+            ('good', 'bad'),
+            ['pulp_smash.tests.test_login'],
+            results_path=path,
+        )
+        self.assertEqual(report['tests'], [])
+        self.assertEqual(report['results'], path)
+        summary = runner.summarize(runner.iter_tests(report))
+        self.assertEqual(summary['bad']['failure'], 2)
+        self.assertEqual(len(list(results.read_results(path))), 8)
+        self.assertIn('FAILURE: ', runner.format_report(report))
+
+    def test_run_classes(self):
+        """Run a class in this process, selecting and then closing a client."""
+        with mock.patch.object(
+                runner.api,
+                'reset_client',
+                wraps=runner.api.reset_client,
+        ) as reset_client:
+            records, durations, _ = runner.run_classes(
+                'good',
+                LOGIN_CLASSES[:1],
+            )
+        self.assertEqual(reset_client.call_count, 2)
+        self.assertEqual(os.environ['PULP_SMASH_SECTION'], 'good')
+        self.assertEqual(config.get_config()['base_url'], (
+            self.servers['good'].base_url
+        ))
+        self.assertEqual(
+            [record['outcome'] for record in records],
+            ['success', 'success'],
+        )
+        self.assertEqual(list(durations), LOGIN_CLASSES[:1])
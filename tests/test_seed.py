@@ -0,0 +1,196 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.seed`."""
+from __future__ import unicode_literals
+
+import json
+import os
+import shutil
+import tempfile
+from collections import Counter
+from os.path import join
+import mock
+from requests.exceptions import HTTPError
+from unittest2 import TestCase
+from pulp_smash import seed
+from pulp_smash.api import Client
+from pulp_smash.stub import StubServer
+from pulp_smash.tasks import TaskFailedError
+
+SPEC = {
+    'prefix': 'test',
+    'repositories': {'count': 5, 'attrs': {'notes': {'a': 'b'}}},
+    'consumers': {'count': 12},
+    'bindings': {'per_consumer': 2},
+    'profiles': {'content_type': 'rpm', 'packages': 3},
+}
+
+
+class LoadSpecTestCase(TestCase):
+    """Tests for :func:`pulp_smash.seed.load_spec`."""
+
+    def setUp(self):
+        """Pick a path for a spec."""
+        spec_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spec_dir)
+        self.path = join(spec_dir, 'spec.json')
+
+    def test_valid(self):
+        """Assert a spec is read."""
+        with open(self.path, 'w') as handle:
+            json.dump(SPEC, handle)
+        self.assertEqual(seed.load_spec(self.path), SPEC)
+
+    def test_no_prefix(self):
+        """Assert a spec with no prefix is rejected."""
+        with open(self.path, 'w') as handle:
+            json.dump({'consumers': {'count': 1}}, handle)
+        with self.assertRaises(ValueError):
+            seed.load_spec(self.path)
+
+
+class SeederTestCase(TestCase):
+    """Tests for :class:`pulp_smash.seed.Seeder`."""
+
+    def setUp(self):
+        """Start a stub server, and create a seeder for it."""
+        self.server = StubServer()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        client = Client(self.server.server_config(), recorder=None)
+        self.addCleanup(client.close)
+        journal_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, journal_dir)
+        self.progress = []
+        self.seeder = seed.Seeder(
+            client,
+            SPEC,
+            join(journal_dir, 'seed.journal'),
+            concurrency=4,
+            progress=lambda *args: self.progress.append(args),
+        )
+
+    def test_stages(self):
+        """Assert each stage yields as many steps as it claims."""
+        for name, total, steps in self.seeder.stages():
+            with self.subTest(name):
+                self.assertEqual(len(list(steps)), total)
+
+    def test_seed(self):
+        """Assert every resource is created, and bindings are spread out."""
+        self.assertEqual(self.seeder.seed(), {
+            'repositories': 5,
+            'consumers': 12,
+            'bindings': 24,
+            'profiles': 12,
+        })
+        self.assertEqual(len(self.server.repositories), 5)
+        self.assertEqual(
+            self.server.repositories['test-repository-00000']['notes'],
+            {'a': 'b'},
+        )
+        self.assertEqual(len(self.server.consumers), 12)
+        bound = Counter()
+        for bindings in self.server.bindings.values():
+            self.assertEqual(len(bindings), 2)
+            bound.update(binding['repo_id'] for binding in bindings)
+        self.assertLessEqual(max(bound.values()) - min(bound.values()), 1)
+        profile = self.server.profiles['test-consumer-00000']['rpm']
+        self.assertEqual(len(profile['profile']), 3)
+        self.assertIn(('bindings', 24, 24), self.progress)
+
+    def test_errata(self):
+        """Assert errata are imported into every repository."""
+        self.seeder.spec = dict(SPEC, errata={'per_repository': 4})
+        self.assertEqual(self.seeder.seed()['errata'], 20)
+        self.assertEqual(set(self.server.units), set(self.server.repositories))
+        for units in self.server.units.values():
+            self.assertEqual(
+                sorted(unit['unit_key']['id'] for unit in units),
+                [self.seeder.erratum_id(i) for i in range(4)],
+            )
+            self.assertEqual(
+                {unit['unit_type_id'] for unit in units},
+                {'erratum'},
+            )
+        self.assertEqual(self.server.uploads, {})
+
+    def test_failed_task(self):
+        """Assert an erratum whose import task fails is imported on resume."""
+        spawn_task = self.server.spawn_task
+
+        def fail_first_import(task_type):
+            """Spawn a task, and make the first import task fail."""
+            task = spawn_task(task_type)
+            if task_type.endswith('import_uploaded_unit') and not failed:
+                self.server.tasks[task['task_id']]['state'] = 'error'
+                failed.append(task['task_id'])
+            return task
+
+        failed = []
+        self.server.spawn_task = fail_first_import
+        self.seeder.spec = dict(SPEC, errata={'per_repository': 4})
+        with self.assertRaises(TaskFailedError):
+            self.seeder.seed()
+        with open(self.seeder.journal) as handle:
+            journaled = [line for line in handle if line.startswith('erratum')]
+        self.assertLess(len(journaled), 20)
+        self.assertEqual(self.server.uploads, {})
+        self.server.spawn_task = spawn_task
+        self.assertEqual(self.seeder.seed()['errata'], 20 - len(journaled))
+
+    def test_task_batches(self):
+        """Assert spawned tasks are waited for in batches of bounded size."""
+        wait_for_tasks = seed.wait_for_tasks
+        batches = []
+
+        def record_batch(client, hrefs):
+            """Record the size of a batch of tasks, and wait for them."""
+            batches.append(len(hrefs))
+            return wait_for_tasks(client, hrefs)
+
+        self.seeder.spec = dict(SPEC, errata={'per_repository': 4})
+        with mock.patch.object(seed, 'wait_for_tasks', record_batch):
+            self.assertEqual(self.seeder.seed()['errata'], 20)
+        self.assertEqual(sum(batches), 20)
+        self.assertLessEqual(max(batches), self.seeder.concurrency)
+
+    def test_resume(self):
+        """Assert an interrupted seeding resumes where it left off."""
+        def interrupt(name, done, total):  # pylint:disable=unused-argument
+            """Stop the seeding partway through registering consumers."""
+            if name == 'consumers' and done == 5:
+                raise RuntimeError
+        progress, self.seeder.progress = self.seeder.progress, interrupt
+        with self.assertRaises(RuntimeError):
+            self.seeder.seed()
+        with open(self.seeder.journal) as handle:
+            journaled = sum(
+                1 for line in handle if line.startswith('consumer:')
+            )
+        self.assertGreaterEqual(journaled, 5)
+        self.seeder.progress = progress
+        self.assertEqual(self.seeder.seed(), {
+            'repositories': 0,
+            'consumers': 12 - journaled,
+            'bindings': 24,
+            'profiles': 12,
+        })
+        self.assertEqual(len(self.server.consumers), 12)
+
+    def test_failure(self):
+        """Assert a failed step stops the seeding and is not journaled."""
+        self.server.auth = ('admin', 'other')
+        with self.assertRaises(HTTPError):
+            self.seeder.seed()
+        with open(self.seeder.journal) as handle:
+            self.assertEqual(handle.read(), '')
+
+    def test_teardown(self):
+        """Assert every resource is deleted, as is the journal."""
+        self.seeder.seed()
+        self.seeder.teardown()
+        self.assertEqual(self.server.repositories, {})
+        self.assertEqual(self.server.consumers, {})
+        self.assertEqual(self.server.bindings, {})
+        self.assertFalse(os.path.exists(self.seeder.journal))
+        self.seeder.teardown()  # Missing resources are ignored.
@@ -0,0 +1,79 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.sharding`."""
+from __future__ import unicode_literals
+
+import shutil
+import tempfile
+from os.path import join
+from unittest2 import TestCase
+from pulp_smash import sharding
+
+
+class ShardTestCase(TestCase):
+    """Tests for :func:`pulp_smash.sharding.shard`."""
+
+    def test_balanced(self):
+        """Assert the longest classes are spread across shards."""
+        durations = {'a': 10, 'b': 7, 'c': 5, 'd': 3, 'e': 3, 'f': 2}
+        shards = sharding.shard(list('abcdef'), durations, 2)
+        totals = sorted(
+            sum(durations[class_id] for class_id in shard)
+            for shard in shards
+        )
+        self.assertEqual(totals, [15, 15])
+
+    def test_whole_classes(self):
+        """Assert each class is in exactly one shard, in discovery order."""
+        class_ids = ['c', 'a', 'e', 'b', 'd']
+        shards = sharding.shard(class_ids, {'a': 5, 'e': 1}, 3)
+        self.assertEqual(len(shards), 3)
+        self.assertEqual(
+            sorted(class_id for shard in shards for class_id in shard),
+            sorted(class_ids),
+        )
+        for shard in shards:
+            self.assertEqual(shard, sorted(shard, key=class_ids.index))
+
+    def test_unknown_durations(self):
+        """Assert classes with no recorded duration are spread evenly."""
+        shards = sharding.shard(list('abcd'), {}, 2)
+        self.assertEqual([len(shard) for shard in shards], [2, 2])
+
+    def test_more_shards_than_classes(self):
+        """Assert no empty shards are returned."""
+        self.assertEqual(sharding.shard(['a'], {}, 4), [['a']])
+
+    def test_no_shards(self):
+        """Assert asking for fewer than one shard raises an error."""
+        for count in (0, -1):
+            with self.subTest(count=count):
+                with self.assertRaises(ValueError):
+                    sharding.shard(['a'], {}, count)
+
+
+class TimingsTestCase(TestCase):
+    """Tests for :class:`pulp_smash.sharding.Timings`."""
+
+    def setUp(self):
+        """Pick a path for a timing database."""
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        self.path = join(cache_dir, 'timings.json')
+
+    def test_missing(self):
+        """Assert a missing database is empty."""
+        self.assertEqual(sharding.Timings(self.path).get('default'), {})
+
+    def test_round_trip(self):
+        """Assert durations are saved, and smoothed as they are updated."""
+        timings = sharding.Timings(self.path)
+        timings.update('default', {'a': 2.0})
+        timings.save()
+        timings = sharding.Timings(self.path)
+        timings.update('default', {'a': 4.0, 'b': 1.0})
+        timings.save()
+        self.assertEqual(
+            sharding.Timings(self.path).get('default'),
+            {'a': 3.0, 'b': 1.0},
+        )
+        self.assertEqual(sharding.Timings(self.path).get('other'), {})
@@ -0,0 +1,159 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.soak`."""
+from __future__ import unicode_literals
+
+import csv
+import os
+import shutil
+import tempfile
+from os.path import join
+from unittest2 import TestCase
+from pulp_smash import load, metrics, soak
+from pulp_smash.api import Client
+from pulp_smash.stub import StubServer
+
+
+class SoakTestCase(TestCase):
+    """Tests for running workloads in windows."""
+
+    def test_request_mix(self):
+        """Assert a request mix is sent, and summarized in each window."""
+        recorder = metrics.Recorder()
+        windows = []
+        with StubServer() as server:
+            with Client(
+                    server.server_config(),
+                    pool_size=2,
+                    recorder=recorder) as client:
+                step = soak.request_mix(client, load.ENDPOINTS.values())
+                report = soak.soak(
+                    recorder,
+                    step,
+                    1,
+                    window=0.25,
+                    concurrency=2,
+                    on_window=windows.append,
+                )
+        self.assertEqual(report['windows'], windows)
+        self.assertEqual([row['window'] for row in windows], [0, 1, 2, 3])
+        for row in windows:
+            with self.subTest(window=row['window']):
+                self.assertEqual(set(row), set(soak.COLUMNS))
+                self.assertGreater(row['requests'], 0)
+                self.assertEqual(row['failures'], 0)
+                self.assertLessEqual(row['p50'], row['p99'])
+                self.assertIsNone(row['rss'])
+        self.assertEqual(len(recorder), 0)
+        self.assertIsNone(report['trends']['rss'])
+
+    def test_class_loop(self):
+        """Assert test classes are run, and their failures counted."""
+        step = soak.class_loop(['tests.test_stats.PercentileTestCase'])
+        self.assertEqual(step(), 0)
+        report = soak.soak(metrics.Recorder(), step, 0.2, window=0.1)
+        self.assertEqual(len(report['windows']), 2)
+        self.assertEqual(report['drifting'], [])
+
+    def test_invalid(self):
+        """Assert a run with no time or no threads is refused."""
+        for kwargs in (
+                {'duration': 0},
+                {'window': 0},
+                {'window': -1},
+                {'concurrency': 0}):
+            with self.subTest(kwargs=kwargs):
+                kwargs.setdefault('duration', 1)
+                with self.assertRaises(ValueError):
+                    soak.soak(metrics.Recorder(), lambda: 0, **kwargs)
+
+    def test_step_raises(self):
+        """Assert an exception raised by the workload ends the run."""
+        def step():
+            """Fail."""
+            raise RuntimeError('step failed')
+        with self.assertRaises(RuntimeError):
+            soak.soak(metrics.Recorder(), step, 60, window=30, concurrency=2)
+
+
+class ProcessRssTestCase(TestCase):
+    """Tests for :func:`pulp_smash.soak.process_rss`."""
+
+    def setUp(self):
+        """Create a fake ``/proc`` directory."""
+        self.proc_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.proc_dir)
+        processes = (
+            ('1', b'httpd\n', b'/usr/sbin/httpd\0-DFOREGROUND\0', 100),
+            ('2', b'httpd\n', b'/usr/sbin/httpd\0', 20),
+            ('3', b'python\n', b'python\0-m\0celery\0worker\0', 50),
+            ('4', b'httpd\n', b'', None),
+            (type('')(os.getpid()), b'httpd\n', b'', 1000),
+        )
+        for pid, comm, cmdline, rss in processes:
+            directory = join(self.proc_dir, pid)
+            os.mkdir(directory)
+            with open(join(directory, 'comm'), 'wb') as handle:
+                handle.write(comm)
+            with open(join(directory, 'cmdline'), 'wb') as handle:
+                handle.write(cmdline)
+            with open(join(directory, 'status'), 'wb') as handle:
+                handle.write(b'Name:\tx\n')
+                if rss is not None:
+                    handle.write('VmRSS:\t{0} kB\n'.format(rss).encode())
+        os.mkdir(join(self.proc_dir, 'self'))
+        os.mkdir(join(self.proc_dir, '5'))  # An exited process.
+
+    def test_process_rss(self):
+        """Assert the memory of matching processes is summed."""
+        for name, rss in (('httpd', 120), ('celery', 50), ('nginx', None)):
+            with self.subTest(name=name):
+                self.assertEqual(
+                    soak.process_rss(name, self.proc_dir),
+                    None if rss is None else rss * 1024,
+                )
+
+
+class DriftTestCase(TestCase):
+    """Tests for finding and reporting drift."""
+
+    def setUp(self):
+        """Create windows in which latency and memory creep upwards."""
+        self.windows = [{
+            'window': i,
+            'start': i * 60,
+            'requests': 100,
+            'errors': 0,
+            'failures': 0,
+            'p50': 0.01 * (1 + i % 2),
+            'p95': 0.05 + 0.001 * i,
+            'p99': None,
+            'rss': 10 ** 8 + (i // 2) * 10 ** 6,
+        } for i in range(12)]
+
+    def test_find_drift(self):
+        """Assert rising series, and only those, are flagged."""
+        drift = soak.find_drift(self.windows)
+        self.assertEqual(drift['drifting'], ['p95', 'rss'])
+        self.assertFalse(drift['trends']['p50']['drifting'])
+        self.assertIsNone(drift['trends']['p99'])
+
+    def test_format(self):
+        """Assert a report can be formatted, and written to CSV."""
+        report = {'windows': self.windows}
+        report.update(soak.find_drift(self.windows))
+        lines = soak.format_report(report).splitlines()
+        self.assertEqual(lines[0], soak.WINDOW_HEADER)
+        self.assertEqual(len(lines), 1 + 12 + 1 + len(soak.SERIES))
+        self.assertIn('DRIFTING', lines[-1])
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = join(directory, 'soak.csv')
+        with open(path, 'w') as handle:
+            writer = soak.csv_writer(handle)
+            for row in self.windows:
+                writer.writerow(row)
+        with open(path) as handle:
+            rows = tuple(csv.DictReader(handle))
+        self.assertEqual(len(rows), 12)
+        self.assertEqual(rows[1]['p99'], '')
+        self.assertEqual(rows[2]['rss'], '101000000')
@@ -0,0 +1,120 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.stats`."""
+from __future__ import division, unicode_literals
+
+from unittest2 import TestCase
+from pulp_smash import stats
+
+
+class PercentileTestCase(TestCase):
+    """Tests for :func:`pulp_smash.stats.percentile`."""
+
+    def test_nearest_rank(self):
+        """Assert the nearest-rank method is used."""
+        samples = tuple(range(1, 101))
+        for pct, value in ((0, 1), (50, 50), (95, 95), (99.5, 100)):
+            with self.subTest(pct):
+                self.assertEqual(stats.percentile(samples, pct), value)
+
+    def test_empty(self):
+        """Assert ``None`` is returned if there are no samples."""
+        self.assertIsNone(stats.percentile((), 50))
+
+
+class SummarizeTestCase(TestCase):
+    """Tests for :func:`pulp_smash.stats.summarize`."""
+
+    def test_summary(self):
+        """Assert unsorted samples are summarized."""
+        summary = stats.summarize((3, 1, 2, 4))
+        self.assertEqual(summary['count'], 4)
+        self.assertEqual(summary['mean'], 2.5)
+        self.assertEqual(summary['max'], 4)
+        self.assertEqual(summary['p50'], 2)
+        self.assertEqual(summary['p99'], 4)
+
+    def test_empty(self):
+        """Assert an empty summary is returned if there are no samples."""
+        summary = stats.summarize(())
+        self.assertEqual(summary['count'], 0)
+        self.assertIsNone(summary['p95'])
+
+
+class PowerLawExponentTestCase(TestCase):
+    """Tests for :func:`pulp_smash.stats.power_law_exponent`."""
+
+    def test_exponents(self):
+        """Assert the exponents of exact power laws are recovered."""
+        sizes = (10, 100, 1000)
+        for exponent in (0, 0.5, 1, 2):
+            with self.subTest(exponent):
+                self.assertAlmostEqual(
+                    stats.power_law_exponent(
+                        sizes,
+                        [3 * size ** exponent for size in sizes],
+                    ),
+                    exponent,
+                )
+
+    def test_too_few_points(self):
+        """Assert ``None`` is returned if there is nothing to fit."""
+        self.assertIsNone(stats.power_law_exponent((10, 10), (1, 2)))
+        self.assertIsNone(stats.power_law_exponent((10, 100), (1, 0)))
+        self.assertIsNone(stats.power_law_exponent((10, 100), (1, None)))
+
+
+class MannWhitneyUTestCase(TestCase):
+    """Tests for :func:`pulp_smash.stats.mann_whitney_u`."""
+
+    def test_u(self):
+        """Assert U counts the pairs in which ``xs`` wins, ties being half."""
+        self.assertEqual(stats.mann_whitney_u((1, 2, 3), (0, 2))[0], 4.5)
+
+    def test_shifted(self):
+        """Assert a shifted sample gives a small p-value."""
+        xs = [i / 10 for i in range(50)]
+        _, p_value = stats.mann_whitney_u(xs, [x + 5 for x in xs])
+        self.assertLess(p_value, 1e-6)
+
+    def test_same(self):
+        """Assert interleaved samples give a large p-value."""
+        _, p_value = stats.mann_whitney_u(range(0, 100, 2), range(1, 100, 2))
+        self.assertGreater(p_value, 0.5)
+
+    def test_ties(self):
+        """Assert samples that are all equal give a p-value of 1."""
+        self.assertEqual(stats.mann_whitney_u((1, 1), (1, 1, 1)), (3, 1.0))
+
+    def test_empty(self):
+        """Assert an empty sample is rejected."""
+        with self.assertRaises(ValueError):
+            stats.mann_whitney_u((), (1,))
+
+
+class MannKendallTestCase(TestCase):
+    """Tests for :func:`pulp_smash.stats.mann_kendall`."""
+
+    def test_s(self):
+        """Assert S counts rising pairs less falling pairs."""
+        self.assertEqual(stats.mann_kendall((1, 3, 2))[0], 1)
+
+    def test_rising(self):
+        """Assert a noisy but rising series gives a small p-value."""
+        values = [i + (3 if i % 2 else 0) for i in range(30)]
+        s_value, p_value = stats.mann_kendall(values)
+        self.assertGreater(s_value, 0)
+        self.assertLess(p_value, 1e-6)
+
+    def test_flat(self):
+        """Assert a series with no trend gives a large p-value."""
+        _, p_value = stats.mann_kendall((1, 3, 2, 4, 1, 3, 2, 4, 1, 3, 2, 4))
+        self.assertGreater(p_value, 0.2)
+
+    def test_ties(self):
+        """Assert a series of equal values gives a p-value of 1."""
+        self.assertEqual(stats.mann_kendall((1, 1, 1)), (0, 1.0))
+
+    def test_short(self):
+        """Assert a series of one value is rejected."""
+        with self.assertRaises(ValueError):
+            stats.mann_kendall((1,))
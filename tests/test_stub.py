@@ -0,0 +1,208 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.stub`."""
+from __future__ import unicode_literals
+
+from os.path import dirname
+import mock
+import requests
+import unittest2
+from unittest2 import TestCase
+from pulp_smash import api, config, tests
+from pulp_smash.api import Client
+from pulp_smash.constants import (
+    CALL_REPORT_KEYS,
+    CONSUMER_APPLICABILITY_PATH,
+    CONSUMER_PATH,
+    CONTENT_UPLOAD_PATH,
+    LOGIN_KEYS,
+    LOGIN_PATH,
+    REPO_APPLICABILITY_PATH,
+    REPOSITORY_PATH,
+    STATUS_PATH,
+    TASK_SEARCH_PATH,
+)
+from pulp_smash.stub import StubServer
+from tests import StubTestCase
+
+
+class StubServerTestCase(StubTestCase):
+    """Tests for :class:`pulp_smash.stub.StubServer`."""
+
+    def test_login(self):
+        """Log in with good and bad credentials."""
+        response = self.client.post(LOGIN_PATH)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()), LOGIN_KEYS)
+        response = self.client.post(LOGIN_PATH, auth=('', ''))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['http_status'], 401)
+
+    def test_applicability(self):
+        """Regenerate applicability, and look up the spawned tasks."""
+        responses = self.client.request_many((
+            ('POST', CONSUMER_APPLICABILITY_PATH, {'consumer_criteria': {}}),
+            ('POST', REPO_APPLICABILITY_PATH, {'repo_criteria': {}}),
+        ))
+        task_ids = []
+        for response in responses:
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(set(response.json()), CALL_REPORT_KEYS)
+            task, = response.json()['spawned_tasks']
+            self.assertEqual(
+                self.client.get(task['_href']).json()['state'],
+                'finished',
+            )
+            task_ids.append(task['task_id'])
+        response = self.client.post(TASK_SEARCH_PATH, json={
+            'criteria': {'filters': {'task_id': {'$in': task_ids}}}
+        })
+        self.assertEqual(
+            sorted(task['task_id'] for task in response.json()),
+            sorted(task_ids),
+        )
+
+    def test_bad_criteria(self):
+        """Regenerate applicability with a bad body."""
+        response = self.client.post(REPO_APPLICABILITY_PATH, json={})
+        self.assertEqual(response.status_code, 400)
+        self.assertNotEqual(set(response.json()), CALL_REPORT_KEYS)
+
+    def test_status(self):
+        """Assert the server's status can be read without credentials."""
+        response = requests.get(
+            self.server.base_url + STATUS_PATH,
+            timeout=10,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()['versions']['platform_version'],
+            self.server.version,
+        )
+
+    def test_resources(self):
+        """Create, read and delete a consumer and a repository."""
+        for path in (CONSUMER_PATH, REPOSITORY_PATH):
+            with self.subTest(path):
+                href = path + 'stub-test/'
+                responses = [
+                    self.client.post(path, json={'id': 'stub-test'}),
+                    self.client.post(path, json={'id': 'stub-test'}),
+                    self.client.post(path, json={}),
+                    self.client.get(href),
+                    self.client.delete(href),
+                    self.client.get(href),
+                ]
+                statuses = [response.status_code for response in responses]
+                self.assertEqual(statuses[:4], [201, 409, 400, 200])
+                self.assertIn(statuses[4], (200, 202))
+                self.assertEqual(statuses[5], 404)
+
+    def test_import_upload(self):
+        """Create an upload request, import a unit from it, and delete it."""
+        repo_href = REPOSITORY_PATH + 'stub-import/'
+        self.client.post(REPOSITORY_PATH, json={'id': 'stub-import'})
+        self.addCleanup(self.client.delete, repo_href)
+        response = self.client.post(CONTENT_UPLOAD_PATH)
+        self.assertEqual(response.status_code, 201)
+        upload = response.json()
+        body = {
+            'unit_key': {'id': 'RHBA-1'},
+            'unit_type_id': 'erratum',
+            'upload_id': upload['upload_id'],
+        }
+        import_path = repo_href + 'actions/import_upload/'
+        responses = [
+            self.client.post(import_path, json=body),
+            self.client.post(import_path, json={}),
+            self.client.delete(upload['_href']),
+            self.client.post(import_path, json=body),
+            self.client.delete(upload['_href']),
+        ]
+        self.assertEqual(
+            [response.status_code for response in responses],
+            [202, 400, 200, 404, 404],
+        )
+        self.assertEqual(
+            self.server.units['stub-import'][0]['unit_key'],
+            {'id': 'RHBA-1'},
+        )
+
+    def test_search_units(self):
+        """Search for a repository's units, by type."""
+        self.client.post(REPOSITORY_PATH, json={'id': 'stub-search'})
+        self.addCleanup(self.client.delete, REPOSITORY_PATH + 'stub-search/')
+        self.server.units['stub-search'] = [{
+            'metadata': {'size': 1},
+            'unit_key': {'name': 'a.iso'},
+            'unit_type_id': 'iso',
+        }]
+        search_path = REPOSITORY_PATH + '{0}/search/units/'
+        responses = [
+            self.client.post(
+                search_path.format('stub-search'),
+                json={'criteria': {'type_ids': ids}},
+            )
+            for ids in (['iso'], ['rpm'])
+        ]
+        responses.append(self.client.post(search_path.format('missing')))
+        self.assertEqual(
+            [response.status_code for response in responses],
+            [200, 200, 404],
+        )
+        self.assertEqual(responses[0].json(), [{
+            'metadata': {'name': 'a.iso', 'size': 1},
+            'repo_id': 'stub-search',
+            'unit_type_id': 'iso',
+        }])
+        self.assertEqual(responses[1].json(), [])
+
+    def test_upload_bits(self):
+        """Write chunks into an upload request, out of order."""
+        upload = self.client.post(CONTENT_UPLOAD_PATH).json()
+        self.addCleanup(self.client.delete, upload['_href'])
+        responses = [
+            self.client.put(upload['_href'] + '3/', data=b'def'),
+            self.client.put(upload['_href'] + '0/', data=b'abc'),
+            self.client.put(CONTENT_UPLOAD_PATH + 'missing/0/', data=b'abc'),
+        ]
+        self.assertEqual(
+            [response.status_code for response in responses],
+            [200, 200, 404],
+        )
+        self.assertEqual(
+            bytes(self.server.uploads[upload['upload_id']]),
+            b'abcdef',
+        )
+
+    def test_not_found(self):
+        """Request an unknown path and an unknown task."""
+        for path in ('/foo/', '/pulp/api/v2/tasks/foo/'):
+            with self.subTest(path):
+                self.assertEqual(self.client.get(path).status_code, 404)
+
+    def test_latency(self):
+        """Assert the server can be slowed down."""
+        self.server.latency = 0.1
+        self.addCleanup(setattr, self.server, 'latency', 0)
+        response = self.client.post(LOGIN_PATH)
+        self.assertGreaterEqual(response.elapsed.total_seconds(), 0.1)
+
+
+class SuiteTestCase(TestCase):
+    """Run :mod:`pulp_smash.tests` against a stub server."""
+
+    def test_suite(self):
+        """Assert the test suite passes."""
+        tests_dir = dirname(tests.__file__)
+        suite = unittest2.defaultTestLoader.discover(
+            tests_dir,
+            top_level_dir=dirname(dirname(tests_dir)),
+        )
+        result = unittest2.TestResult()
+        with StubServer() as server:
+            client = Client(server.server_config(), recorder=None)
+            with mock.patch.object(config, '_CONFIG', server.server_config()):
+                with mock.patch.object(api, '_CLIENT', client):
+                    suite.run(result)
+        self.assertEqual(result.errors + result.failures, [])
+        self.assertGreater(result.testsRun, 0)
@@ -0,0 +1,210 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.tasks`."""
+from __future__ import unicode_literals
+
+import mock
+from unittest2 import TestCase
+from pulp_smash import tasks
+from pulp_smash.constants import TASK_SEARCH_PATH
+
+
+def _response(*states):
+    """Return a mock search response listing tasks in the given states.
+
+    The tasks are given the IDs "0", "1" and so on.
+
+    """
+    response = mock.Mock()
+    response.json.return_value = [
+        {'task_id': type('')(i), 'state': state}
+        for i, state in enumerate(states)
+    ]
+    return response
+
+
+class HelpersTestCase(TestCase):
+    """Tests for :func:`pulp_smash.tasks.spawned_task_hrefs` and friends."""
+
+    def test_spawned_task_hrefs(self):
+        """Assert hrefs are extracted from a call report."""
+        call_report = {'error': None, 'result': None, 'spawned_tasks': [
+            {'_href': '/pulp/api/v2/tasks/1/', 'task_id': '1'},
+            {'_href': '/pulp/api/v2/tasks/2/', 'task_id': '2'},
+        ]}
+        self.assertEqual(
+            tasks.spawned_task_hrefs(call_report),
+            ('/pulp/api/v2/tasks/1/', '/pulp/api/v2/tasks/2/'),
+        )
+
+    def test_raise_for_tasks(self):
+        """Assert an exception is raised if, and only if, a task failed."""
+        report = tasks.TaskReport({
+            '1': {'state': 'finished'},
+            '2': {'state': 'finished'},
+        }, {}, 0, 1)
+        tasks.raise_for_tasks(report)
+        report.tasks['2']['state'] = 'error'
+        with self.assertRaises(tasks.TaskFailedError) as context:
+            tasks.raise_for_tasks(report)
+        self.assertIn('2 (error)', type('')(context.exception))
+
+    def test_task_id(self):
+        """Assert task IDs are extracted from hrefs and IDs alike."""
+        for href in ('/pulp/api/v2/tasks/abc/', 'abc'):
+            with self.subTest(href):
+                self.assertEqual(tasks.task_id(href), 'abc')
+
+
+class TimingsTestCase(TestCase):
+    """Tests for :func:`pulp_smash.tasks.harvest_timings` and friends."""
+
+    def setUp(self):
+        """Describe tasks of two types, some of which have not finished."""
+        self.tasks = [
+            {
+                'task_id': '0',
+                'task_type': 'pulp.sync',
+                'worker_name': 'worker-0',
+                'start_time': '2015-07-13T18:50:04Z',
+                'finish_time': '2015-07-13T18:50:10Z',
+            },
+            {
+                'task_id': '1',
+                'task_type': 'pulp.sync',
+                'worker_name': 'worker-0',
+                'start_time': '2015-07-13T18:50:10Z',
+                'finish_time': None,
+            },
+            {
+                'task_id': '2',
+                'task_type': 'pulp.publish',
+                'worker_name': None,
+                'start_time': None,
+                'finish_time': None,
+            },
+        ]
+        start = tasks.parse_timestamp('2015-07-13T18:50:00Z')
+        self.received = {'0': start, '1': start + 1, '2': start + 2}
+
+    def test_parse_timestamp(self):
+        """Assert fractions of seconds and offsets are honoured."""
+        for timestamp, seconds in (
+                ('1970-01-01T00:01:00Z', 60),
+                ('1970-01-01T00:01:00', 60),
+                ('1970-01-01T00:01:00.25Z', 60.25),
+                ('1970-01-01T01:01:00+01:00', 60),
+                ('1970-01-01T00:00:00-0001', 60)):
+            with self.subTest(timestamp):
+                self.assertEqual(tasks.parse_timestamp(timestamp), seconds)
+        with self.assertRaises(ValueError):
+            tasks.parse_timestamp('yesterday')
+
+    def test_timing_breakdown(self):
+        """Assert queue waits and run times are grouped by type and worker."""
+        publish, sync = tasks.timing_breakdown(self.tasks, self.received)
+        self.assertEqual((publish['task_type'], publish['worker']), (
+            'pulp.publish', ''
+        ))
+        self.assertEqual(publish['unstarted'], 1)
+        self.assertEqual(publish['queue_wait']['count'], 0)
+        self.assertEqual(sync['count'], 2)
+        self.assertEqual(sync['queue_wait']['max'], 9)
+        self.assertEqual(sync['queue_wait']['mean'], 6.5)
+        self.assertEqual(sync['run']['count'], 1)
+        self.assertEqual(sync['run']['max'], 6)
+
+    def test_harvest_timings(self):
+        """Assert tasks are fetched with a search, and broken down."""
+        client = mock.Mock()
+        client.request_many.return_value = [
+            mock.Mock(**{'json.return_value': self.tasks})
+        ]
+        breakdown = tasks.harvest_timings(client, self.received)
+        call, = client.request_many.call_args[0][0]
+        self.assertEqual(
+            call[2]['criteria']['filters']['task_id']['$in'],
+            ['0', '1', '2'],
+        )
+        self.assertEqual(breakdown, tasks.timing_breakdown(
+            self.tasks,
+            self.received,
+        ))
+        lines = tasks.format_timings(breakdown).splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[2].startswith('sync '))
+        self.assertIn('4.000s', lines[2])
+
+
+class WaitForTasksTestCase(TestCase):
+    """Tests for :func:`pulp_smash.tasks.wait_for_tasks`."""
+
+    def setUp(self):
+        """Create a mock client, and replace the clock with a mock."""
+        self.responses = []
+        self.client = mock.Mock()
+        self.client.request_many.side_effect = lambda calls: [
+            self.responses.pop(0) for _ in calls
+        ]
+        patcher = mock.patch.object(tasks, 'monotonic', return_value=0)
+        self.monotonic = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(tasks, 'time')
+        self.time = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_finished(self):
+        """Assert polling stops once all tasks reach a final state."""
+        self.responses.extend((
+            _response('running', 'waiting'),
+            _response('finished', 'running'),
+            _response('finished', 'error'),
+        ))
+        report = tasks.wait_for_tasks(self.client, ('0', '1'))
+        self.assertEqual(report.polls, 3)
+        self.assertEqual(report.tasks['0']['state'], 'finished')
+        self.assertEqual(report.tasks['1']['state'], 'error')
+        self.assertEqual(set(report.durations), {'0', '1'})
+
+    def test_backoff(self):
+        """Assert the interval between polls grows up to a maximum."""
+        self.responses.extend([_response('running')] * 4)
+        self.responses.append(_response('finished'))
+        tasks.wait_for_tasks(
+            self.client, ('0',), interval=1, backoff=2, max_interval=5
+        )
+        self.assertEqual(
+            [call[0][0] for call in self.time.sleep.call_args_list],
+            [1, 2, 4, 5],
+        )
+
+    def test_batches(self):
+        """Assert tasks are searched for in batches."""
+        calls = []
+
+        def request_many(calls_):
+            """Record each call, and report each searched task finished."""
+            calls.extend(calls_)
+            return [mock.Mock(**{'json.return_value': [
+                {'task_id': id_, 'state': 'finished'}
+                for id_ in call[2]['criteria']['filters']['task_id']['$in']
+            ]}) for call in calls]
+
+        self.client.request_many.side_effect = request_many
+        ids = tuple(type('')(i) for i in range(5))
+        report = tasks.wait_for_tasks(self.client, ids, batch_size=2)
+        self.assertEqual(set(report.tasks), set(ids))
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(
+            calls[-1],
+            ('POST', TASK_SEARCH_PATH, {
+                'criteria': {'filters': {'task_id': {'$in': ['4']}}}
+            }),
+        )
+
+    def test_timeout(self):
+        """Assert an exception is raised if tasks do not finish in time."""
+        self.responses.extend([_response('running')] * 2)
+        self.monotonic.side_effect = (0, 5, 11)
+        with self.assertRaises(tasks.TaskTimedOutError):
+            tasks.wait_for_tasks(self.client, ('0',), timeout=10)
+        self.assertEqual(len(self.responses), 0)
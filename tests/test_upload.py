@@ -0,0 +1,104 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.upload`."""
+from __future__ import division, unicode_literals
+
+import hashlib
+import os
+import shutil
+import tempfile
+from os.path import join
+import mock
+from requests.exceptions import HTTPError
+from unittest2 import TestCase
+from pulp_smash import stub, upload
+from pulp_smash.api import Client
+from pulp_smash.constants import REPOSITORY_PATH
+from pulp_smash.stub import StubServer
+
+
+class UploadTestCase(TestCase):
+    """Tests for uploading files to a stub server."""
+
+    def setUp(self):
+        """Start a stub server, create a repository, and write some files."""
+        self.server = StubServer()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.client = Client(self.server.server_config(), recorder=None)
+        self.addCleanup(self.client.close)
+        self.client.post(REPOSITORY_PATH, json={'id': 'isos'})
+        file_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, file_dir)
+        self.contents = {}
+        for name, size in (('a.iso', 10000), ('b.iso', 1), ('c.iso', 0)):
+            path = join(file_dir, name)
+            self.contents[path] = os.urandom(size)
+            with open(path, 'wb') as handle:
+                handle.write(self.contents[path])
+        self.paths = sorted(self.contents)
+
+    def test_upload_file(self):
+        """Assert a file is sent in chunks, checksummed and imported."""
+        path = self.paths[0]
+        progress = mock.Mock()
+        # Keep the upload request, so that its contents can be checked.
+        with mock.patch.object(
+            stub._Handler,  # pylint:disable=protected-access
+            '_delete_upload',
+            return_value=(200, None),
+        ):
+            result = upload.upload_file(
+                self.client,
+                'isos',
+                path,
+                chunk_size=3000,
+                progress=progress,
+            )
+        checksum = hashlib.sha256(self.contents[path]).hexdigest()
+        self.assertEqual(result['checksum'], checksum)
+        self.assertEqual(result['chunks'], 4)
+        self.assertEqual(result['size'], 10000)
+        self.assertGreater(result['mb_per_s'], 0)
+        self.assertEqual(
+            [bytes(data) for data in self.server.uploads.values()],
+            [self.contents[path]],
+        )
+        self.assertEqual(self.server.units['isos'], [{
+            'metadata': {},
+            'unit_key': {'checksum': checksum, 'name': 'a.iso', 'size': 10000},
+            'unit_type_id': 'iso',
+        }])
+        self.assertEqual(progress.call_count, 4)
+        progress.assert_called_with(path, 10000, 10000)
+
+    def test_upload_files(self):
+        """Assert several files are uploaded, and the report is formatted."""
+        report = upload.upload_files(self.client, 'isos', self.paths)
+        self.assertEqual(
+            [result['chunks'] for result in report['files']],
+            [1, 1, 0],
+        )
+        self.assertEqual(report['size'], 10001)
+        self.assertEqual(len(self.server.units['isos']), 3)
+        self.assertEqual(self.server.uploads, {})
+        lines = upload.format_report(report).splitlines()
+        self.assertEqual(len(lines), 1 + 3 + 2)
+        self.assertTrue(lines[-1].startswith('3 files, 0.0MB in '))
+
+    def test_missing_repository(self):
+        """Assert failures are raised, and the upload request is deleted."""
+        with self.assertRaises(HTTPError):
+            upload.upload_file(self.client, 'missing', self.paths[0])
+        self.assertEqual(self.server.uploads, {})
+
+
+class UnitKeyTestCase(TestCase):
+    """Tests for :func:`pulp_smash.upload.unit_key`."""
+
+    def test_unit_key(self):
+        """Assert ISOs are keyed by name, size and checksum, and RPMs not."""
+        self.assertEqual(
+            upload.unit_key('iso', '/tmp/a.iso', 1, 'abc'),
+            {'checksum': 'abc', 'name': 'a.iso', 'size': 1},
+        )
+        self.assertEqual(upload.unit_key('rpm', '/tmp/a.rpm', 1, 'abc'), {})
@@ -0,0 +1,73 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.utils`."""
+from __future__ import unicode_literals
+
+import os
+import shutil
+import stat
+import tempfile
+from os.path import join
+import mock
+from unittest2 import TestCase
+from pulp_smash import utils
+from pulp_smash.api import Client
+from pulp_smash.stub import StubServer
+
+
+class GetServerVersionTestCase(TestCase):
+    """Tests for :func:`pulp_smash.utils.get_server_version`."""
+
+    def test_version(self):
+        """Assert the server's version is returned."""
+        with StubServer(version='2.8.0') as server:
+            with Client(server.server_config(), recorder=None) as client:
+                self.assertEqual(utils.get_server_version(client), '2.8.0')
+
+
+class MappedFileTestCase(TestCase):
+    """Tests for :func:`pulp_smash.utils.mapped_file`."""
+
+    def setUp(self):
+        """Create a temporary directory."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+
+    def test_contents(self):
+        """Assert a file's contents can be read, even once it is unmapped."""
+        for data in (b'', b'abc' * 1000):
+            path = join(self.tmp_dir, type('')(len(data)))
+            with open(path, 'wb') as handle:
+                handle.write(data)
+            with self.subTest(size=len(data)):
+                with utils.mapped_file(path) as view:
+                    self.assertEqual(len(view), len(data))
+                    self.assertEqual(bytes(view[:]), data)
+                    head = view[:3]
+                self.assertEqual(bytes(head), data[:3])
+
+
+class WriteAtomicallyTestCase(TestCase):
+    """Tests for :func:`pulp_smash.utils.write_atomically`."""
+
+    def setUp(self):
+        """Create a temporary directory."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.path = join(self.tmp_dir, 'data')
+
+    def test_permissions(self):
+        """Assert a new file is private, and an existing mode is kept."""
+        utils.write_atomically(self.path, 'a')
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+        os.chmod(self.path, 0o644)
+        utils.write_atomically(self.path, b'b')
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o644)
+        with open(self.path, 'rb') as handle:
+            self.assertEqual(handle.read(), b'b')
+
+    def test_failure(self):
+        """Assert the temporary file is removed if the rename fails."""
+        with mock.patch.object(os, 'rename', side_effect=OSError):
+            with self.assertRaises(OSError):
+                utils.write_atomically(self.path, 'a')
+        self.assertEqual(os.listdir(self.tmp_dir), [])
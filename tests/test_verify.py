@@ -0,0 +1,147 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.verify`."""
+from __future__ import unicode_literals
+
+import hashlib
+import os
+import shutil
+import tempfile
+from os.path import join
+import mock
+from unittest2 import TestCase
+from pulp_smash import upload, verify
+from pulp_smash.api import Client
+from pulp_smash.constants import REPOSITORY_PATH
+from pulp_smash.stub import StubServer
+
+
+def _sha256(data):
+    """Return the SHA-256 checksum of ``data``."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class VerifyTestCase(TestCase):
+    """Tests for checking a tree of files."""
+
+    def setUp(self):
+        """Write a tree of files, and a manifest describing them."""
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        os.mkdir(join(self.root, 'sub'))
+        self.contents = {
+            'good.iso': os.urandom(5000),
+            'sub/good.iso': b'',
+            'corrupt.iso': b'abc',
+            'short.iso': b'abc',
+        }
+        for name, data in self.contents.items():
+            with open(join(self.root, name), 'wb') as handle:
+                handle.write(data)
+        lines = [
+            'corrupt.iso,{0},3'.format(_sha256(b'abd')),
+            'good.iso,{0},5000'.format(_sha256(self.contents['good.iso'])),
+            'gone.iso,{0},3'.format(_sha256(b'abc')),
+            'short.iso,{0},4'.format(_sha256(b'abcd')),
+            'sub/good.iso,{0},0'.format(_sha256(b'')),
+        ]
+        self.manifest = join(self.root, 'PULP_MANIFEST')
+        with open(self.manifest, 'w') as handle:
+            handle.write('\n'.join(lines) + '\n')
+
+    def test_read_manifest(self):
+        """Assert each line of a manifest is read."""
+        expected = verify.read_manifest(self.manifest)
+        self.assertEqual(len(expected), 5)
+        self.assertEqual(expected[1], verify.Expected(
+            'good.iso',
+            'sha256',
+            _sha256(self.contents['good.iso']),
+            5000,
+        ))
+
+    def test_verify(self):
+        """Assert each kind of problem is found, in a pool of processes."""
+        mismatches = sorted(verify.verify(
+            self.root,
+            verify.read_manifest(self.manifest),
+            processes=2,
+        ))
+        self.assertEqual(mismatches, [
+            verify.Mismatch(
+                'corrupt.iso',
+                'checksum',
+                _sha256(b'abd'),
+                _sha256(b'abc'),
+            ),
+            verify.Mismatch('gone.iso', 'missing', None, None),
+            verify.Mismatch('short.iso', 'size', 4, 3),
+        ])
+        self.assertEqual(
+            [verify.format_mismatch(mismatch) for mismatch in mismatches][1:],
+            ['gone.iso: missing', 'short.iso: size: expected 4, got 3'],
+        )
+
+    def test_hash_file(self):
+        """Assert files are hashed a window at a time, with any algorithm."""
+        path = join(self.root, 'good.iso')
+        data = self.contents['good.iso']
+        with mock.patch.object(verify, 'WINDOW_SIZE', 1024):
+            for algorithm, hasher in (
+                    ('md5', hashlib.md5),
+                    ('sha', hashlib.sha1),
+                    ('sha256', hashlib.sha256)):
+                with self.subTest(algorithm=algorithm):
+                    self.assertEqual(
+                        verify.hash_file(path, algorithm),
+                        hasher(data).hexdigest(),
+                    )
+
+    def test_unreadable(self):
+        """Assert a file that cannot be read is reported."""
+        expected = verify.Expected('sub', 'sha256', '', None)
+        mismatch = verify.check_file(self.root, expected)
+        self.assertEqual(mismatch.problem, 'unreadable')
+
+
+class ExpectedFromUnitsTestCase(TestCase):
+    """Tests for reading expected files from units."""
+
+    def test_expected_from_units(self):
+        """Assert paths and checksum types are read from unit metadata."""
+        units = [
+            {'metadata': {'checksum': 'ab', 'name': 'a.iso', 'size': 1}},
+            {
+                'checksum': 'CD',
+                'checksumtype': 'sha',
+                'name': 'b',
+                'relativepath': 'b-1.0-1.noarch.rpm',
+            },
+        ]
+        self.assertEqual(list(verify.expected_from_units(units)), [
+            verify.Expected('a.iso', 'sha256', 'ab', 1),
+            verify.Expected('b-1.0-1.noarch.rpm', 'sha', 'CD', None),
+        ])
+        with self.assertRaises(KeyError):
+            list(verify.expected_from_units([{'checksum': 'ab'}]))
+
+    def test_fetch_expected(self):
+        """Assert a repository's units are fetched from a stub server."""
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        path = join(root, 'a.iso')
+        with open(path, 'wb') as handle:
+            handle.write(b'abc')
+        with StubServer() as server:
+            with Client(server.server_config(), recorder=None) as client:
+                client.post(REPOSITORY_PATH, json={'id': 'isos'})
+                upload.upload_file(client, 'isos', path)
+                expected = list(verify.fetch_expected(client, 'isos', ['iso']))
+                self.assertEqual(
+                    list(verify.fetch_expected(client, 'isos', ['rpm'])),
+                    [],
+                )
+        self.assertEqual(
+            expected,
+            [verify.Expected('a.iso', 'sha256', _sha256(b'abc'), 3)],
+        )
+        self.assertEqual(list(verify.verify(root, expected, 1)), [])